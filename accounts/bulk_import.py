@@ -0,0 +1,143 @@
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import User
+from .serializers import check_role_assignment
+
+CSV_COLUMNS = ("username", "email", "password", "role")
+
+# Below this many passwords a process pool costs more than it saves.
+PARALLEL_HASH_THRESHOLD = 16
+
+_ROLES = {value for value, _label in User.ROLE_CHOICES}
+_username_field = User._meta.get_field("username")
+
+
+def _init_hash_worker():
+    # Needed when the platform spawns rather than forks worker processes.
+    django.setup()
+
+
+def hash_passwords(passwords, workers=1):
+    """
+    Hash ``passwords`` with the configured hasher, spread over ``workers``
+    processes. Only the import_users command asks for more than one: a web
+    worker must not fork a pool per request.
+    """
+    if workers <= 1 or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [make_password(password) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def _row_errors(row, creator):
+    errors = {}
+
+    try:
+        _username_field.clean(row["username"], None)
+    except DjangoValidationError as exc:
+        errors["username"] = exc.messages
+
+    if row["email"]:
+        try:
+            validate_email(row["email"])
+        except DjangoValidationError as exc:
+            errors["email"] = exc.messages
+
+    if not row["password"]:
+        errors["password"] = ["This field may not be blank."]
+    else:
+        try:
+            validate_password(row["password"], User(username=row["username"], email=row["email"]))
+        except DjangoValidationError as exc:
+            errors["password"] = exc.messages
+
+    if row["role"] not in _ROLES:
+        errors["role"] = [f'"{row["role"]}" is not a valid choice.']
+    else:
+        try:
+            check_role_assignment(creator, row["role"])
+        except serializers.ValidationError as exc:
+            errors["role"] = exc.detail
+
+    return errors
+
+
+def read_user_rows(stream):
+    """
+    Read ``username,email,password,role`` rows from a text CSV stream with a
+    header line. ``role`` defaults to ``passenger`` like the API does.
+    """
+    reader = csv.DictReader(stream)
+    missing = {"username", "password"} - set(reader.fieldnames or ())
+    if missing:
+        raise serializers.ValidationError(
+            {"file": f"Missing CSV columns: {', '.join(sorted(missing))}"}
+        )
+
+    rows = []
+    for line, record in enumerate(reader, start=2):
+        row = {column: (record.get(column) or "").strip() for column in CSV_COLUMNS}
+        row["role"] = row["role"] or "passenger"
+        row["line"] = line
+        rows.append(row)
+    return rows
+
+
+def import_users(rows, creator, workers=1, batch_size=500):
+    """
+    Validate every row, then hash passwords (in ``workers`` processes, see
+    ``hash_passwords``) and insert all users with bulk_create. Nothing is
+    created if any row is invalid; the returned ``errors`` list points at
+    the offending CSV lines.
+    """
+    errors = []
+    seen = set()
+    for row in rows:
+        row_errors = _row_errors(row, creator)
+        if row["username"] in seen:
+            row_errors.setdefault("username", []).append("Duplicate username in file.")
+        seen.add(row["username"])
+        if row_errors:
+            errors.append({"line": row["line"], "errors": row_errors})
+
+    taken = set(
+        User.objects.filter(username__in=seen).values_list("username", flat=True)
+    )
+    for row in rows:
+        if row["username"] in taken:
+            errors.append(
+                {
+                    "line": row["line"],
+                    "errors": {"username": ["A user with that username already exists."]},
+                }
+            )
+
+    if errors:
+        errors.sort(key=lambda error: error["line"])
+        return {"created": 0, "errors": errors}
+
+    hashes = hash_passwords([row["password"] for row in rows], workers=workers)
+    users = [
+        User(
+            username=row["username"],
+            email=row["email"],
+            role=row["role"],
+            organization_id=creator.organization_id,
+            password=password_hash,
+        )
+        for row, password_hash in zip(rows, hashes)
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+    return {"created": len(users), "errors": []}
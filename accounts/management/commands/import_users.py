@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from accounts.bulk_import import import_users, read_user_rows
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create users from a username,email,password,role CSV. Roles are "
+        "checked against --creator and users join the creator's organization."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--creator", required=True, help="Username acting as the creator.")
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Hashing processes (default: one per CPU)."
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            creator = User.objects.get(username=options["creator"])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown creator {options['creator']!r}")
+
+        with open(options["csv_path"], newline="", encoding="utf-8-sig") as stream:
+            try:
+                rows = read_user_rows(stream)
+            except ValidationError as exc:
+                raise CommandError(exc.detail["file"])
+
+        result = import_users(
+            rows,
+            creator=creator,
+            workers=options["workers"] or os.cpu_count() or 1,
+            batch_size=options["batch_size"],
+        )
+        if result["errors"]:
+            for error in result["errors"]:
+                self.stderr.write(f"line {error['line']}: {error['errors']}")
+            raise CommandError(f"{len(result['errors'])} invalid rows; nothing imported")
+
+        self.stdout.write(f"created {result['created']} users")
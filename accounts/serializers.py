@@ -1,3 +1,5 @@
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 from organization.models import Organization
 from .models import User
@@ -17,6 +19,18 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'organization', 'role']
 
 
+def check_role_assignment(creator, role):
+    """Raise ValidationError unless ``creator`` may create users with ``role``."""
+    if creator.is_superuser:
+        return role
+
+    if not creator.is_org_admin:
+        raise serializers.ValidationError(
+            "You are not allowed to assign roles."
+        )
+    return role
+
+
 class UserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
@@ -30,16 +44,15 @@ class UserCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Request context is required to validate role."
             )
-        user = request.user
+        return check_role_assignment(request.user, role)
 
-        if user.is_superuser:
-            return role
-
-        if not user.is_org_admin:
-            raise serializers.ValidationError(
-                "You are not allowed to assign roles."
-            )
-        return role
+    def validate(self, attrs):
+        user = User(username=attrs.get('username'), email=attrs.get('email', ''))
+        try:
+            validate_password(attrs['password'], user)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'password': exc.messages})
+        return attrs
 
     def create(self, validated_data):
         request = self.context.get('request')
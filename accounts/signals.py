@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from organization.models import Organization
+
+from .models import User
+from .user_cache import invalidate_user, user_cache
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    # Role, organization, activation and password changes all go through save().
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Organization)
+def organization_saved(sender, instance, created, **kwargs):
+    # Cached users carry their organization; renames are rare, so drop everything.
+    if not created:
+        user_cache.clear()
@@ -1,8 +1,21 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.bulk_import import PARALLEL_HASH_THRESHOLD, hash_passwords
 from accounts.models import User
+from accounts.user_cache import user_cache
 from organization.models import Organization
 
 class UserPermissionsTestCase(APITestCase):
@@ -58,6 +71,18 @@ class UserPermissionsTestCase(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_create_rejects_weak_password(self):
+        self.client.force_authenticate(user=self.org_admin)
+        url = reverse("user-list")
+        data = {"username": "newdriver", "email": "", "password": "12345678", "role": "driver"}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("password", response.data)
+
+        data["password"] = "route-key-1"
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
     def test_user_can_retrieve_self(self):
         self.client.force_authenticate(user=self.driver)
         url = reverse("user-detail", args=[self.driver.id])
@@ -124,3 +149,150 @@ class UserPermissionsTestCase(APITestCase):
         self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_403_FORBIDDEN])
         if response.status_code == status.HTTP_200_OK:
             self.assertNotEqual(response.data["role"], "admin")
+
+
+class JWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.org = Organization.objects.create(name="JwtOrg")
+        self.org_admin = User.objects.create_user(
+            username="jwtadmin", email="jwt@admin.com", password="jwtpass", role="admin", organization=self.org
+        )
+
+    def _login(self):
+        response = self.client.post(
+            reverse("token_obtain_pair"), {"username": "jwtadmin", "password": "jwtpass"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_token_embeds_role_and_organization(self):
+        access = AccessToken(self._login()["access"])
+        self.assertEqual(access["role"], "admin")
+        self.assertEqual(access["organization"], self.org.id)
+
+    def test_refreshed_token_keeps_claims(self):
+        response = self.client.post(reverse("token_refresh"), {"refresh": self._login()["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data["access"])["role"], "admin")
+
+    def test_bearer_token_authenticates_without_auth_queries_when_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self._login()['access']}")
+        url = reverse("user-list")
+
+        with CaptureQueriesContext(connection) as cold:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The user row and its organization both come from the cache.
+        self.assertEqual(len(warm), len(cold) - 2)
+
+    def test_role_change_invalidates_cached_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self._login()['access']}")
+        url = reverse("user-list")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.org_admin.role = "passenger"
+        self.org_admin.save()
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self._login()['access']}")
+        self.org_admin.is_active = False
+        self.org_admin.save()
+        response = self.client.get(reverse("user-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BulkUserImportTestCase(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="ImportOrg")
+        self.org_admin = User.objects.create_user(
+            username="importadmin", email="import@admin.com", password="importpass", role="admin", organization=self.org
+        )
+        self.driver = User.objects.create_user(
+            username="importdriver", email="driver@import.com", password="driverpass", role="driver", organization=self.org
+        )
+
+    def _upload(self, text):
+        upload = SimpleUploadedFile("users.csv", text.encode(), content_type="text/csv")
+        return self.client.post(reverse("user-import-users"), {"file": upload}, format="multipart")
+
+    def test_org_admin_imports_users_into_own_org(self):
+        self.client.force_authenticate(user=self.org_admin)
+        response = self._upload(
+            "username,email,password,role\n"
+            "d1,d1@x.com,secret-1,driver\n"
+            "p1,,secret-2,\n"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+
+        d1 = User.objects.get(username="d1")
+        self.assertEqual(d1.role, "driver")
+        self.assertEqual(d1.organization, self.org)
+        self.assertTrue(d1.check_password("secret-1"))
+        self.assertEqual(User.objects.get(username="p1").role, "passenger")
+
+    def test_invalid_rows_abort_whole_import(self):
+        self.client.force_authenticate(user=self.org_admin)
+        response = self._upload(
+            "username,email,password,role\n"
+            "ok1,,route-key-1,driver\n"
+            "importdriver,,route-key-2,driver\n"
+            "bad2,not-an-email,route-key-3,pilot\n"
+            "ok1,,route-key-4,driver\n"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [3, 4, 5])
+        self.assertIn("role", response.data["errors"][1]["errors"])
+        self.assertIn("email", response.data["errors"][1]["errors"])
+        self.assertFalse(User.objects.filter(username="ok1").exists())
+
+    def test_weak_passwords_are_rejected(self):
+        self.client.force_authenticate(user=self.org_admin)
+        response = self._upload(
+            "username,email,password,role\n"
+            "weak1,,12345678,passenger\n"
+            "weak2,,password,passenger\n"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [2, 3])
+        self.assertIn("password", response.data["errors"][0]["errors"])
+        self.assertFalse(User.objects.filter(username__startswith="weak").exists())
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_api_import_hashes_in_process(self):
+        self.client.force_authenticate(user=self.org_admin)
+        rows = "".join(f"bulk{i},,route-key-{i},passenger\n" for i in range(PARALLEL_HASH_THRESHOLD))
+        with mock.patch("accounts.bulk_import.ProcessPoolExecutor") as pool:
+            response = self._upload(f"username,email,password,role\n{rows}")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        pool.assert_not_called()
+
+    def test_driver_cannot_import(self):
+        self.client.force_authenticate(user=self.driver)
+        response = self._upload("username,password\nx,y\n")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_parallel_hashing_matches_serial(self):
+        passwords = [f"pw-{i}" for i in range(PARALLEL_HASH_THRESHOLD)]
+        hashes = hash_passwords(passwords, workers=2)
+        self.assertEqual(len(hashes), len(passwords))
+        for password, encoded in zip(passwords, hashes):
+            self.assertTrue(check_password(password, encoded))
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write("username,email,password,role\ncmd1,,route-key-1,passenger\n")
+        self.addCleanup(os.remove, handle.name)
+
+        out = io.StringIO()
+        call_command("import_users", handle.name, creator="importadmin", stdout=out)
+        self.assertIn("created 1 users", out.getvalue())
+        self.assertEqual(User.objects.get(username="cmd1").organization, self.org)
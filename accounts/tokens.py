@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Embed the user's role and organization in issued tokens."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["role"] = user.role
+        token["organization"] = user.organization_id
+        token["is_superuser"] = user.is_superuser
+        return token
+
+
+class RoleTokenObtainPairView(TokenObtainPairView):
+    serializer_class = RoleTokenObtainPairSerializer
@@ -0,0 +1,27 @@
+import copy
+
+from django.conf import settings
+
+from core.cache import TTLCache
+
+user_cache = TTLCache(
+    ttl=getattr(settings, "USER_CACHE_TTL", 60),
+    maxsize=getattr(settings, "USER_CACHE_MAXSIZE", 4096),
+)
+
+
+def get_cached_user(user_id):
+    # Token claims carry the id as a string; key everything the same way.
+    user = user_cache.get(str(user_id))
+    if user is None:
+        return None
+    # Each request gets its own copy so per-request attributes never leak.
+    return copy.copy(user)
+
+
+def cache_user(user):
+    user_cache.set(str(user.pk), copy.copy(user))
+
+
+def invalidate_user(user_id):
+    user_cache.delete(str(user_id))
@@ -1,13 +1,22 @@
+import io
+
 from accounts.permissions import IsSuperAdminorOrgAdmin
 from accounts.permissions import IsOwnerOrAdmin
+from core.sparse_fields import SparseFieldsMixin
+from .bulk_import import import_users, read_user_rows
 from .serializers import UserCreateSerializer, UserSerializer
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from .models import User
 from typing import cast
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(SparseFieldsMixin, ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return UserCreateSerializer
@@ -22,21 +31,23 @@ class UserViewSet(ModelViewSet):
         # Type cast for static analysis
         user = cast(User, user)
 
+        # UserSerializer nests the organization.
+        users = User.objects.select_related("organization")
         if user.is_superuser:
-            return User.objects.all()
+            return users
         elif user.is_org_admin:
             if user.organization:
-                return User.objects.filter(organization=user.organization)
+                return users.filter(organization=user.organization)
             else:
                 return User.objects.none()
         else:
             if user.id:
-                return User.objects.filter(id=user.id)
+                return users.filter(id=user.id)
             else:
                 return User.objects.none()
     
     def get_permissions(self):
-        if self.action in ['list', 'create', 'destroy']:
+        if self.action in ['list', 'create', 'destroy', 'import_users']:
             return [IsSuperAdminorOrgAdmin()]
         elif self.action == 'retrieve':
             return [IsAuthenticated()]
@@ -44,3 +55,14 @@ class UserViewSet(ModelViewSet):
             return [IsOwnerOrAdmin()]
         return [IsAuthenticated()]
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_users(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Upload a CSV file.'})
+
+        rows = read_user_rows(io.TextIOWrapper(upload.file, encoding='utf-8-sig'))
+        result = import_users(rows, creator=request.user)
+        if result['errors']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
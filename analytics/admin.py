@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import RouteDayOccupancy
+
+
+@admin.register(RouteDayOccupancy)
+class RouteDayOccupancyAdmin(admin.ModelAdmin):
+    list_display = ("route", "date", "trip_count", "seat_capacity", "reservation_count")
+    list_filter = ("date",)
+    list_select_related = ("route",)
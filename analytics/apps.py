@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = "django.db.models.AutoField"
+    name = "analytics"
+
+    def ready(self):
+        from . import signals  # noqa: F401
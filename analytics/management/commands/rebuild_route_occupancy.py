@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from analytics.occupancy import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the route occupancy summary from trips and reservations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--route",
+            type=int,
+            action="append",
+            dest="routes",
+            help="Only rebuild this route (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild(route_ids=options["routes"])
+        self.stdout.write(f"rebuilt {count} route/day rows")
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('routes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteDayOccupancy',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('trip_count', models.PositiveIntegerField(default=0)),
+                ('seat_capacity', models.PositiveIntegerField(default=0)),
+                ('reservation_count', models.PositiveIntegerField(default=0)),
+                ('ended_trip_count', models.PositiveIntegerField(default=0)),
+                ('ended_seat_capacity', models.PositiveIntegerField(default=0)),
+                ('ended_reservation_count', models.PositiveIntegerField(default=0)),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_occupancy', to='routes.route')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'route'], name='occupancy_date_route_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='routedayoccupancy',
+            constraint=models.UniqueConstraint(fields=('route', 'date'), name='unique_route_day_occupancy'),
+        ),
+    ]
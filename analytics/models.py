@@ -0,0 +1,50 @@
+from django.db import models
+
+
+class RouteDayOccupancy(models.Model):
+    """
+    Per-route, per-day load summary maintained incrementally by
+    analytics.signals; ``manage.py rebuild_route_occupancy`` recomputes it
+    from scratch.
+
+    ``date`` is the local date of the trips' ``depart_time``. The ``ended_*``
+    columns only count trips that have finished, giving the realised load.
+    """
+
+    route = models.ForeignKey(
+        "routes.Route",
+        on_delete=models.CASCADE,
+        related_name="daily_occupancy",
+    )
+    date = models.DateField()
+
+    trip_count = models.PositiveIntegerField(default=0)
+    seat_capacity = models.PositiveIntegerField(default=0)
+    reservation_count = models.PositiveIntegerField(default=0)
+
+    ended_trip_count = models.PositiveIntegerField(default=0)
+    ended_seat_capacity = models.PositiveIntegerField(default=0)
+    ended_reservation_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["route", "date"], name="unique_route_day_occupancy"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "route"], name="occupancy_date_route_idx"),
+        ]
+
+    @property
+    def load_factor(self):
+        if not self.seat_capacity:
+            return None
+        return self.reservation_count / self.seat_capacity
+
+    @property
+    def ended_load_factor(self):
+        if not self.ended_seat_capacity:
+            return None
+        return self.ended_reservation_count / self.ended_seat_capacity
+
+    def __str__(self):
+        return f"Route {self.route_id} on {self.date}"
@@ -0,0 +1,280 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from archive.models import ArchivedTrip
+from buses.models import Bus
+from reservations.models import Reservation
+from routes.models import Route
+from trips.models import Trip
+
+from .models import RouteDayOccupancy
+
+COUNTERS = (
+    "trip_count",
+    "seat_capacity",
+    "reservation_count",
+    "ended_trip_count",
+    "ended_seat_capacity",
+    "ended_reservation_count",
+)
+
+# Buckets per flush of a deferred batch, keeping the CASE well under
+# SQLite's bound-parameter limit.
+FLUSH_CHUNK_SIZE = 100
+
+
+class _Batch:
+    """Deltas collected by ``deferred()``, keyed by (route_id, date)."""
+
+    def __init__(self):
+        self.deltas = defaultdict(Counter)
+        # Trips whose seats are priced in at flush time with one capacity lookup.
+        self.seated = defaultdict(Counter)
+
+
+_batch = ContextVar("occupancy_batch", default=None)
+
+
+def occupancy_date(depart_time):
+    return timezone.localdate(depart_time)
+
+
+def bump(route_id, date, **deltas):
+    """Add ``deltas`` to the (route, date) row with a single UPDATE, creating it if needed."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    batch = _batch.get()
+    if batch is not None:
+        batch.deltas[(route_id, date)].update(deltas)
+        return
+
+    updates = {name: F(name) + delta for name, delta in deltas.items()}
+    rows = RouteDayOccupancy.objects.filter(route_id=route_id, date=date)
+    if rows.update(**updates):
+        return
+
+    try:
+        with transaction.atomic():
+            RouteDayOccupancy.objects.create(
+                route_id=route_id,
+                date=date,
+                **{name: max(delta, 0) for name, delta in deltas.items()},
+            )
+    except IntegrityError:
+        # Another writer created the row first.
+        rows.update(**updates)
+
+
+def bump_many(buckets):
+    """
+    Apply ``{(route_id, date): {counter: delta}}`` with one conditional
+    UPDATE per chunk of buckets, creating the rows that do not exist yet.
+    """
+    buckets = {
+        key: {name: delta for name, delta in deltas.items() if delta}
+        for key, deltas in buckets.items()
+    }
+    buckets = {key: deltas for key, deltas in buckets.items() if deltas}
+    keys = list(buckets)
+    for start in range(0, len(keys), FLUSH_CHUNK_SIZE):
+        _bump_chunk({key: buckets[key] for key in keys[start : start + FLUSH_CHUNK_SIZE]})
+
+
+def _bucket_q(route_id, date):
+    return Q(route_id=route_id, date=date)
+
+
+def _bump_chunk(buckets):
+    match = Q()
+    for key in buckets:
+        match |= _bucket_q(*key)
+    rows = RouteDayOccupancy.objects.filter(match)
+    existing = set(rows.values_list("route_id", "date"))
+
+    updates = {}
+    for name in COUNTERS:
+        whens = [
+            When(_bucket_q(*key), then=Value(deltas[name]))
+            for key, deltas in buckets.items()
+            if key in existing and name in deltas
+        ]
+        if whens:
+            updates[name] = F(name) + Case(*whens, default=Value(0))
+    if updates:
+        rows.update(**updates)
+
+    missing = [key for key in buckets if key not in existing]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            RouteDayOccupancy.objects.bulk_create(
+                RouteDayOccupancy(
+                    route_id=route_id,
+                    date=date,
+                    **{name: max(delta, 0) for name, delta in buckets[(route_id, date)].items()},
+                )
+                for route_id, date in missing
+            )
+    except IntegrityError:
+        # Another writer created some of the rows first.
+        for key in missing:
+            bump(*key, **buckets[key])
+
+
+@contextmanager
+def deferred():
+    """
+    Collect the bumps made inside the block, e.g. by the signal receivers
+    of a bulk delete, and apply them grouped by (route, day) on exit: one
+    capacity lookup and a fixed number of writes however many rows changed.
+    Use it inside the transaction doing the writes: nothing is applied if
+    the block raises.
+    """
+    if _batch.get() is not None:
+        yield
+        return
+
+    batch = _Batch()
+    token = _batch.set(batch)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+
+    if batch.seated:
+        capacities = dict(
+            Route.objects.filter(id__in={route_id for route_id, _ in batch.seated}).values_list(
+                "id", "bus__capacity"
+            )
+        )
+        for key, trips in batch.seated.items():
+            capacity = capacities.get(key[0]) or 0
+            for name, count in trips.items():
+                batch.deltas[key][name] += count * capacity
+    bump_many(batch.deltas)
+
+
+def _route_capacity(route_id):
+    return Bus.objects.filter(routes=route_id).values_list("capacity", flat=True).first() or 0
+
+
+def apply_trip(route_id, depart_time, status, seat_capacity, reservations, sign):
+    """
+    Add (sign=1) or remove (sign=-1) one trip and its reservations from its
+    bucket. Ended trips count their own ``seat_capacity``; the others the
+    seats their route's bus has now.
+    """
+    ended = status == Trip.STATUS_ENDED
+    key = (route_id, occupancy_date(depart_time))
+    deltas = {"trip_count": sign, "reservation_count": sign * reservations}
+    if ended:
+        deltas.update(ended_trip_count=sign, ended_reservation_count=sign * reservations)
+
+    batch = _batch.get()
+    if batch is not None and seat_capacity is None:
+        batch.deltas[key].update(deltas)
+        batch.seated[key].update({"seat_capacity": sign, "ended_seat_capacity": sign if ended else 0})
+        return
+
+    capacity = _route_capacity(route_id) if seat_capacity is None else seat_capacity
+    deltas["seat_capacity"] = sign * capacity
+    if ended:
+        deltas["ended_seat_capacity"] = sign * capacity
+    bump(*key, **deltas)
+
+
+def apply_reservation(trip_values, sign):
+    route_id, depart_time, status, _ = trip_values
+    deltas = {"reservation_count": sign}
+    if status == Trip.STATUS_ENDED:
+        deltas["ended_reservation_count"] = sign
+    bump(route_id, occupancy_date(depart_time), **deltas)
+
+
+def rebuild(route_ids=None):
+    """
+    Recompute occupancy rows from Trip/Reservation and the archived trips
+    with three grouped aggregates. Restrict to ``route_ids`` when given.
+    """
+    trips = Trip.objects.all()
+    reservations = Reservation.objects.all()
+    # Archived trips outlive their route; the summary only has live routes.
+    archived = ArchivedTrip.objects.filter(route_id__in=Route.objects.values("id"))
+    existing = RouteDayOccupancy.objects.all()
+    if route_ids is not None:
+        trips = trips.filter(route_id__in=route_ids)
+        reservations = reservations.filter(trip__route_id__in=route_ids)
+        archived = archived.filter(route_id__in=route_ids)
+        existing = existing.filter(route_id__in=route_ids)
+
+    ended = Q(status=Trip.STATUS_ENDED)
+    rows = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    # Ended trips keep the seats they ran with (Trip.seat_capacity).
+    seats = Coalesce("seat_capacity", "route__bus__capacity")
+    trip_totals = (
+        trips.annotate(day=TruncDate("depart_time"))
+        .values("route_id", "day")
+        .annotate(
+            trips=Count("id"),
+            seats=Sum(seats),
+            ended_trips=Count("id", filter=ended),
+            ended_seats=Sum(seats, filter=ended),
+        )
+    )
+    for total in trip_totals:
+        row = rows[(total["route_id"], total["day"])]
+        row["trip_count"] = total["trips"]
+        row["seat_capacity"] = total["seats"] or 0
+        row["ended_trip_count"] = total["ended_trips"]
+        row["ended_seat_capacity"] = total["ended_seats"] or 0
+
+    reservation_totals = (
+        reservations.annotate(day=TruncDate("trip__depart_time"))
+        .values("trip__route_id", "day")
+        .annotate(
+            reservations=Count("id"),
+            ended_reservations=Count("id", filter=Q(trip__status=Trip.STATUS_ENDED)),
+        )
+    )
+    for total in reservation_totals:
+        row = rows[(total["trip__route_id"], total["day"])]
+        row["reservation_count"] = total["reservations"]
+        row["ended_reservation_count"] = total["ended_reservations"]
+
+    # Archived trips all ended and carry their own seat and reservation counts.
+    archived_totals = (
+        archived.annotate(day=TruncDate("depart_time"))
+        .values("route_id", "day")
+        .annotate(
+            trips=Count("id"),
+            seats=Sum("seat_capacity"),
+            reservations=Sum("reservation_count"),
+        )
+    )
+    for total in archived_totals:
+        row = rows[(total["route_id"], total["day"])]
+        for prefix in ("", "ended_"):
+            row[f"{prefix}trip_count"] += total["trips"]
+            row[f"{prefix}seat_capacity"] += total["seats"]
+            row[f"{prefix}reservation_count"] += total["reservations"]
+
+    with transaction.atomic():
+        existing.delete()
+        RouteDayOccupancy.objects.bulk_create(
+            [
+                RouteDayOccupancy(route_id=route_id, date=date, **counters)
+                for (route_id, date), counters in rows.items()
+            ],
+            batch_size=1000,
+        )
+    return len(rows)
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from .models import RouteDayOccupancy
+
+
+class RouteDayOccupancySerializer(serializers.ModelSerializer):
+    load_factor = serializers.FloatField(read_only=True)
+    ended_load_factor = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = RouteDayOccupancy
+        fields = [
+            "route",
+            "date",
+            "trip_count",
+            "seat_capacity",
+            "reservation_count",
+            "load_factor",
+            "ended_trip_count",
+            "ended_seat_capacity",
+            "ended_reservation_count",
+            "ended_load_factor",
+        ]
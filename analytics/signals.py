@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from reservations.models import Reservation
+from routes.models import Route
+from trips.models import Trip
+
+from . import occupancy
+
+TRIP_STATE_FIELDS = ("route_id", "depart_time", "status", "seat_capacity")
+
+
+def _trip_state(trip):
+    return tuple(getattr(trip, name) for name in TRIP_STATE_FIELDS)
+
+
+@receiver(pre_save, sender=Trip)
+def remember_trip_state(sender, instance, raw=False, **kwargs):
+    instance._occupancy_state = None
+    if raw or instance.pk is None:
+        return
+    instance._occupancy_state = (
+        Trip.objects.filter(pk=instance.pk).values_list(*TRIP_STATE_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Trip)
+def trip_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous = getattr(instance, "_occupancy_state", None)
+    current = _trip_state(instance)
+    if created or previous is None:
+        occupancy.apply_trip(*current, reservations=0, sign=1)
+        return
+
+    moved = (
+        previous[0] != current[0]
+        or occupancy.occupancy_date(previous[1]) != occupancy.occupancy_date(current[1])
+    )
+    ended_changed = (previous[2] == Trip.STATUS_ENDED) != (current[2] == Trip.STATUS_ENDED)
+    if not (moved or ended_changed):
+        return
+
+    reservations = instance.reservations.count()
+    occupancy.apply_trip(*previous, reservations=reservations, sign=-1)
+    occupancy.apply_trip(*current, reservations=reservations, sign=1)
+
+
+@receiver(post_delete, sender=Trip)
+def trip_deleted(sender, instance, **kwargs):
+    # Reservations PROTECT their trip, so a deleted trip has none left.
+    occupancy.apply_trip(*_trip_state(instance), reservations=0, sign=-1)
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        occupancy.apply_reservation(_trip_state(instance.trip), sign=1)
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    occupancy.apply_reservation(_trip_state(instance.trip), sign=-1)
+
+
+@receiver(pre_save, sender=Route)
+def remember_route_bus(sender, instance, raw=False, **kwargs):
+    instance._occupancy_bus_id = None
+    if not raw and instance.pk is not None:
+        instance._occupancy_bus_id = (
+            Route.objects.filter(pk=instance.pk).values_list("bus_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Route)
+def route_saved(sender, instance, created, raw=False, **kwargs):
+    previous_bus_id = getattr(instance, "_occupancy_bus_id", None)
+    # The bus is the only route field occupancy depends on.
+    if raw or created or previous_bus_id in (None, instance.bus_id):
+        return
+    # Moving a route to another bus changes the seats of every trip not yet
+    # ended. The rebuild recomputes from committed rows, so it runs once the
+    # save commits instead of inside the saving transaction.
+    route_id = instance.pk
+    transaction.on_commit(lambda: occupancy.rebuild(route_ids=[route_id]))
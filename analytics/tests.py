@@ -0,0 +1,157 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analytics import occupancy
+from analytics.models import RouteDayOccupancy
+from buses.models import Bus
+from reservations.models import Reservation
+from routes.models import Route
+from trips.models import Trip
+
+
+class RouteOccupancyMaintenanceTests(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(matricule="AN-01", capacity=4)
+        self.route = Route.objects.create(bus=self.bus, direction="A -> B")
+        # Early enough that a later trip the same day does not overlap it.
+        self.depart = timezone.localtime().replace(hour=8, minute=0, second=0, microsecond=0)
+        self.later = self.depart + timedelta(hours=3)
+        self.trip = Trip.objects.create(route=self.route, depart_time=self.depart)
+
+    def _row(self, route=None, date=None):
+        return RouteDayOccupancy.objects.get(
+            route=route or self.route,
+            date=date or timezone.localdate(self.depart),
+        )
+
+    def test_trip_creation_adds_seats(self):
+        Trip.objects.create(route=self.route, depart_time=self.later)
+        row = self._row()
+        self.assertEqual(row.trip_count, 2)
+        self.assertEqual(row.seat_capacity, 8)
+        self.assertEqual(row.reservation_count, 0)
+
+    def test_reservations_update_load_factor(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        reservation = Reservation.objects.create(trip=self.trip, passenger_name="Sara")
+        self.assertEqual(self._row().load_factor, 0.5)
+
+        reservation.delete()
+        self.assertEqual(self._row().reservation_count, 1)
+
+    def test_ending_trip_records_realised_load(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        self.trip.start()
+        self.trip.end()
+        row = self._row()
+        self.assertEqual(row.ended_trip_count, 1)
+        self.assertEqual(row.ended_seat_capacity, 4)
+        self.assertEqual(row.ended_reservation_count, 1)
+        self.assertEqual(row.ended_load_factor, 0.25)
+
+    def test_moving_trip_to_another_day_moves_its_counts(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        self.trip.depart_time = self.depart + timedelta(days=1)
+        self.trip.save()
+
+        self.assertEqual(self._row().trip_count, 0)
+        moved = self._row(date=timezone.localdate(self.trip.depart_time))
+        self.assertEqual(moved.trip_count, 1)
+        self.assertEqual(moved.reservation_count, 1)
+
+    def test_trip_deletion_removes_seats(self):
+        self.trip.delete()
+        row = self._row()
+        self.assertEqual(row.trip_count, 0)
+        self.assertEqual(row.seat_capacity, 0)
+
+    def test_moving_route_to_another_bus_reprices_after_commit(self):
+        bigger = Bus.objects.create(matricule="AN-02", capacity=9)
+        self.route.direction = "A -> C"
+        with mock.patch("analytics.signals.occupancy.rebuild") as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.route.save()
+        rebuild.assert_not_called()
+
+        self.route.bus = bigger
+        with self.captureOnCommitCallbacks(execute=True):
+            self.route.save()
+            self.assertEqual(self._row().seat_capacity, 4)
+        self.assertEqual(self._row().seat_capacity, 9)
+
+    def test_rebuild_matches_incremental_rows(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        self.trip.start()
+        self.trip.end()
+        Trip.objects.create(route=self.route, depart_time=self.depart + timedelta(days=2))
+        expected = self._counters()
+
+        RouteDayOccupancy.objects.all().delete()
+        call_command("rebuild_route_occupancy", stdout=StringIO())
+
+        self.assertEqual(self._counters(), expected)
+
+    def test_deferred_batch_matches_immediate_rows(self):
+        with occupancy.deferred():
+            for day in range(3):
+                Trip.objects.create(route=self.route, depart_time=self.later + timedelta(days=day))
+            self.assertEqual(self._row().trip_count, 1)
+        expected = self._counters()
+
+        RouteDayOccupancy.objects.all().delete()
+        occupancy.rebuild()
+        self.assertEqual(self._counters(), expected)
+
+    def test_deferred_batch_is_dropped_when_block_fails(self):
+        with self.assertRaises(RuntimeError), occupancy.deferred():
+            Trip.objects.create(route=self.route, depart_time=self.later)
+            raise RuntimeError
+        self.assertEqual(self._row().trip_count, 1)
+
+    def _counters(self):
+        return list(
+            RouteDayOccupancy.objects.order_by("date").values(
+                "route_id", "date", *occupancy.COUNTERS
+            )
+        )
+
+
+class RouteOccupancyApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        bus = Bus.objects.create(matricule="AN-10", capacity=2)
+        self.route = Route.objects.create(bus=bus, direction="C -> D")
+        trip = Trip.objects.create(route=self.route, depart_time=timezone.now())
+        Reservation.objects.create(trip=trip, passenger_name="Ali")
+
+    def test_list_occupancy(self):
+        response = self.client.get("/api/v1/analytics/route-occupancy/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["load_factor"], 0.5)
+
+    def test_filter_by_route_and_date(self):
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            "/api/v1/analytics/route-occupancy/",
+            {"route": self.route.id, "date_from": today, "date_to": today},
+        )
+        self.assertEqual(len(response.data), 1)
+
+        response = self.client.get(
+            "/api/v1/analytics/route-occupancy/", {"route": self.route.id + 1}
+        )
+        self.assertEqual(response.data, [])
+
+    def test_rejects_invalid_date(self):
+        response = self.client.get(
+            "/api/v1/analytics/route-occupancy/", {"date_from": "yesterday"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import RouteOccupancyView
+
+
+urlpatterns = [
+    path("analytics/route-occupancy/", RouteOccupancyView.as_view()),
+]
@@ -0,0 +1,43 @@
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
+
+from core.sparse_fields import SparseFieldsMixin
+
+from .models import RouteDayOccupancy
+from .serializers import RouteDayOccupancySerializer
+
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValidationError({name: "Expected a YYYY-MM-DD date."})
+    return parsed
+
+
+class RouteOccupancyView(SparseFieldsMixin, ListAPIView):
+    """Load factor per route and day, read from the RouteDayOccupancy summary."""
+
+    serializer_class = RouteDayOccupancySerializer
+
+    def get_queryset(self):
+        queryset = RouteDayOccupancy.objects.order_by("date", "route_id")
+
+        route = self.request.query_params.get("route")
+        if route is not None:
+            if not route.isdigit():
+                raise ValidationError({"route": "Expected a route id."})
+            queryset = queryset.filter(route_id=route)
+
+        date_from = _date_param(self.request, "date_from")
+        if date_from is not None:
+            queryset = queryset.filter(date__gte=date_from)
+
+        date_to = _date_param(self.request, "date_to")
+        if date_to is not None:
+            queryset = queryset.filter(date__lte=date_to)
+
+        return queryset
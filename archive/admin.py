@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from core.admin import LargeTableAdminMixin
+
+from .models import ArchivedReservation, ArchivedTrip
+
+
+class ArchivedReservationInline(admin.TabularInline):
+    model = ArchivedReservation
+    extra = 0
+    can_delete = False
+    readonly_fields = ("id", "passenger_name", "created_at", "board_stop", "alight_stop")
+
+
+@admin.register(ArchivedTrip)
+class ArchivedTripAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    inlines = [ArchivedReservationInline]
+    list_display = ("id", "direction", "depart_time", "reservation_count", "seat_capacity", "archived_at")
+    list_filter = ("depart_time",)
+    search_fields = ("direction",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
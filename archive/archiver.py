@@ -0,0 +1,148 @@
+"""
+Move ENDED trips and their reservations into the archive tables.
+
+Trips go in batches, each in its own transaction: copy the trips and their
+reservations with bulk INSERTs, then remove the live rows with plain SQL
+DELETEs. The per-row delete signals are skipped on purpose; for a trip that
+has ended they would release seats, push live updates and take the trip
+out of the occupancy summary, none of which should happen. What still
+matters is done here explicitly: sync tombstones, outbox events and
+dropping cached manifests.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from events.outbox import record_events
+from reservations.models import Reservation
+from sync.models import record_tombstones
+from trips.manifest import manifest_cache_key
+from trips.models import Trip, TripSegmentInventory
+
+from .models import ArchivedReservation, ArchivedTrip
+
+DEFAULT_BATCH_SIZE = 500
+# Values per DELETE ... IN (...), well under SQLite's bound-parameter limit.
+DELETE_CHUNK_SIZE = 500
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = getattr(settings, "ARCHIVE_AFTER_DAYS", 90)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable_trips(cutoff):
+    return Trip.objects.filter(status=Trip.STATUS_ENDED, depart_time__lt=cutoff)
+
+
+def _delete_where_in(model, field, values, using):
+    """``DELETE FROM <model's table> WHERE <field> IN (values)``, without signals or cascades."""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.get_field(field).column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(values), DELETE_CHUNK_SIZE):
+            chunk = values[start : start + DELETE_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", chunk)
+
+
+def _archive_batch(cutoff, batch_size, actor):
+    with transaction.atomic():
+        trip_ids = list(
+            archivable_trips(cutoff)
+            .order_by("depart_time", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not trip_ids:
+            return 0
+
+        trips = (
+            Trip.objects.filter(id__in=trip_ids)
+            # The seats the trip ran with, not what its bus has today.
+            .annotate(
+                reserved=Count("reservations"),
+                capacity=Coalesce("seat_capacity", "route__bus__capacity"),
+            )
+            .values_list(
+                "id",
+                "route_id",
+                "route__direction",
+                "driver_id",
+                "depart_time",
+                "start_trip_at",
+                "end_trip_at",
+                "capacity",
+                "reserved",
+            )
+        )
+        ArchivedTrip.objects.bulk_create(
+            ArchivedTrip(
+                id=trip_id,
+                route_id=route_id,
+                direction=direction,
+                driver_id=driver_id,
+                depart_time=depart_time,
+                start_trip_at=start_trip_at,
+                end_trip_at=end_trip_at,
+                seat_capacity=capacity,
+                reservation_count=reserved,
+            )
+            for trip_id, route_id, direction, driver_id, depart_time, start_trip_at, end_trip_at, capacity, reserved in trips
+        )
+
+        reservations = Reservation.objects.filter(trip_id__in=trip_ids)
+        rows = list(
+            reservations.values_list(
+                "id", "trip_id", "passenger_name", "created_at", "board_stop__name", "alight_stop__name"
+            )
+        )
+        ArchivedReservation.objects.bulk_create(
+            (
+                ArchivedReservation(
+                    id=reservation_id,
+                    trip_id=trip_id,
+                    passenger_name=passenger_name,
+                    created_at=created_at,
+                    board_stop=board_stop,
+                    alight_stop=alight_stop,
+                )
+                for reservation_id, trip_id, passenger_name, created_at, board_stop, alight_stop in rows
+            ),
+            batch_size=1000,
+        )
+
+        using = reservations.db
+        if rows:
+            record_tombstones(Reservation, [row[0] for row in rows], using)
+        record_tombstones(Trip, trip_ids, using)
+        # No collector, no per-row signals (see module docstring).
+        _delete_where_in(Reservation, "trip", trip_ids, using)
+        _delete_where_in(TripSegmentInventory, "trip", trip_ids, using)
+        _delete_where_in(Trip, "id", trip_ids, using)
+        record_events("trip.archive", Trip, trip_ids, actor)
+
+        transaction.on_commit(
+            lambda: cache.delete_many([manifest_cache_key(trip_id) for trip_id in trip_ids])
+        )
+    return len(trip_ids)
+
+
+def archive_ended_trips(cutoff, batch_size=DEFAULT_BATCH_SIZE, actor="system"):
+    """
+    Archive every ENDED trip that departed before ``cutoff``, ``batch_size``
+    trips per transaction. Returns how many trips were archived.
+    """
+    archived = 0
+    while True:
+        count = _archive_batch(cutoff, batch_size, actor)
+        archived += count
+        if count < batch_size:
+            return archived
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from archive.archiver import DEFAULT_BATCH_SIZE, archive_cutoff, archive_ended_trips
+
+
+class Command(BaseCommand):
+    help = (
+        "Move ENDED trips that departed more than --days ago, with their "
+        "reservations, into the archive tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Default: ARCHIVE_AFTER_DAYS.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        archived = archive_ended_trips(archive_cutoff(options["days"]), options["batch_size"])
+        self.stdout.write(f"Archived {archived} trips.")
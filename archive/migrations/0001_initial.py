@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('routes', '0005_route_duration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTrip',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('direction', models.CharField(max_length=100)),
+                ('depart_time', models.DateTimeField()),
+                ('start_trip_at', models.DateTimeField(blank=True, null=True)),
+                ('end_trip_at', models.DateTimeField(blank=True, null=True)),
+                ('seat_capacity', models.PositiveIntegerField()),
+                ('reservation_count', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('driver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_trips', to=settings.AUTH_USER_MODEL)),
+                ('route', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_trips', to='routes.route')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedReservation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('passenger_name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('board_stop', models.CharField(blank=True, max_length=100, null=True)),
+                ('alight_stop', models.CharField(blank=True, max_length=100, null=True)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='archive.archivedtrip')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedtrip',
+            index=models.Index(fields=['route', 'depart_time'], name='archived_trip_route_depart'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtrip',
+            index=models.Index(fields=['depart_time'], name='archived_trip_depart'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db import models
+
+
+class ArchivedTrip(models.Model):
+    """
+    An ENDED trip moved out of trips_trip by archive.archiver. It keeps the
+    original id and snapshots what its history needs (direction, seats,
+    reservation count), so it still reads correctly after the route or bus
+    changes or is deleted.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    # No database constraint: archived history must not block deleting a route.
+    route = models.ForeignKey(
+        "routes.Route",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="archived_trips",
+        db_index=False,
+    )
+    direction = models.CharField(max_length=100)
+    driver = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_trips",
+    )
+    depart_time = models.DateTimeField()
+    start_trip_at = models.DateTimeField(null=True, blank=True)
+    end_trip_at = models.DateTimeField(null=True, blank=True)
+    seat_capacity = models.PositiveIntegerField()
+    reservation_count = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["route", "depart_time"], name="archived_trip_route_depart"),
+            models.Index(fields=["depart_time"], name="archived_trip_depart"),
+        ]
+
+    def __str__(self):
+        return f"Archived trip {self.id} - {self.direction}"
+
+
+class ArchivedReservation(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    trip = models.ForeignKey(ArchivedTrip, on_delete=models.CASCADE, related_name="reservations")
+    passenger_name = models.CharField(max_length=100)
+    created_at = models.DateTimeField()
+    # Stop names at archive time; both null for a whole-route ride.
+    board_stop = models.CharField(max_length=100, null=True, blank=True)
+    alight_stop = models.CharField(max_length=100, null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.passenger_name} -> Archived trip {self.trip_id}"
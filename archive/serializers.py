@@ -0,0 +1,33 @@
+from rest_framework import serializers
+
+from .models import ArchivedReservation, ArchivedTrip
+
+
+class ArchivedReservationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedReservation
+        fields = ["id", "trip", "passenger_name", "created_at", "board_stop", "alight_stop"]
+
+
+class ArchivedTripSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedTrip
+        fields = [
+            "id",
+            "route",
+            "direction",
+            "driver",
+            "depart_time",
+            "start_trip_at",
+            "end_trip_at",
+            "seat_capacity",
+            "reservation_count",
+            "archived_at",
+        ]
+
+
+class ArchivedTripDetailSerializer(ArchivedTripSerializer):
+    reservations = ArchivedReservationSerializer(many=True, read_only=True)
+
+    class Meta(ArchivedTripSerializer.Meta):
+        fields = ArchivedTripSerializer.Meta.fields + ["reservations"]
@@ -0,0 +1,192 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analytics import occupancy
+from analytics.models import RouteDayOccupancy
+from archive.archiver import archive_cutoff, archive_ended_trips
+from archive.models import ArchivedReservation, ArchivedTrip
+from buses.models import Bus
+from events.models import OutboxEvent
+from reservations.models import Reservation
+from routes.models import Route
+from sync.models import Tombstone
+from trips.models import Trip, TripSegmentInventory
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(matricule="AR-01", capacity=4)
+        self.route = Route.objects.create(bus=self.bus, direction="A -> B")
+        self.old = timezone.now() - timedelta(days=120)
+
+    def _ended_trip(self, depart_time, passengers=("Ali",)):
+        trip = Trip.objects.create(route=self.route, depart_time=depart_time)
+        for name in passengers:
+            Reservation.objects.create(trip=trip, passenger_name=name)
+        trip.start()
+        trip.end()
+        return trip
+
+    def _occupancy(self):
+        return list(
+            RouteDayOccupancy.objects.order_by("route_id", "date").values(
+                "route_id",
+                "date",
+                "trip_count",
+                "seat_capacity",
+                "reservation_count",
+                "ended_trip_count",
+                "ended_seat_capacity",
+                "ended_reservation_count",
+            )
+        )
+
+    def test_ended_trips_move_to_archive_in_batches(self):
+        trips = [
+            self._ended_trip(self.old + timedelta(days=day), passengers=("Ali", "Sara"))
+            for day in range(3)
+        ]
+
+        archived = archive_ended_trips(archive_cutoff(90), batch_size=2)
+
+        self.assertEqual(archived, 3)
+        self.assertFalse(Trip.objects.exists())
+        self.assertFalse(Reservation.objects.exists())
+        self.assertEqual(
+            set(ArchivedTrip.objects.values_list("id", flat=True)), {trip.id for trip in trips}
+        )
+        archived_trip = ArchivedTrip.objects.get(id=trips[0].id)
+        self.assertEqual(archived_trip.route_id, self.route.id)
+        self.assertEqual(archived_trip.direction, "A -> B")
+        self.assertEqual(archived_trip.seat_capacity, 4)
+        self.assertEqual(archived_trip.reservation_count, 2)
+        self.assertEqual(archived_trip.end_trip_at, trips[0].end_trip_at)
+        self.assertEqual(
+            sorted(archived_trip.reservations.values_list("passenger_name", flat=True)),
+            ["Ali", "Sara"],
+        )
+        self.assertEqual(ArchivedReservation.objects.count(), 6)
+
+    def test_archive_keeps_capacity_the_trip_ran_with(self):
+        trip = self._ended_trip(self.old)
+        Route.objects.filter(pk=self.route.pk).update(
+            bus=Bus.objects.create(matricule="AR-03", capacity=40)
+        )
+
+        archive_ended_trips(archive_cutoff(90))
+
+        self.assertEqual(ArchivedTrip.objects.get(id=trip.id).seat_capacity, 4)
+
+    def test_archiving_clears_seat_inventory(self):
+        trip = self._ended_trip(self.old)
+        TripSegmentInventory.objects.get_or_create(trip=trip, defaults={"counts": [1]})
+
+        archive_ended_trips(archive_cutoff(90))
+
+        self.assertFalse(TripSegmentInventory.objects.filter(trip_id=trip.id).exists())
+
+    def test_recent_and_unfinished_trips_stay(self):
+        recent = self._ended_trip(timezone.now() - timedelta(days=10))
+        planned = Trip.objects.create(route=self.route, depart_time=self.old)
+
+        self.assertEqual(archive_ended_trips(archive_cutoff(90)), 0)
+
+        self.assertEqual(set(Trip.objects.values_list("id", flat=True)), {recent.id, planned.id})
+        self.assertFalse(ArchivedTrip.objects.exists())
+
+    def test_archiving_leaves_tombstones_and_events(self):
+        trip = self._ended_trip(self.old)
+        reservation_id = trip.reservations.get().id
+
+        archive_ended_trips(archive_cutoff(90))
+
+        self.assertTrue(Tombstone.objects.filter(resource="trips", object_id=trip.id).exists())
+        self.assertTrue(
+            Tombstone.objects.filter(resource="reservations", object_id=reservation_id).exists()
+        )
+        self.assertTrue(
+            OutboxEvent.objects.filter(event_type="trip.archive", aggregate_id=trip.id).exists()
+        )
+
+    def test_occupancy_history_survives_archiving_and_rebuild(self):
+        self._ended_trip(self.old, passengers=("Ali", "Sara", "Omar"))
+        self._ended_trip(self.old + timedelta(days=1))
+        before = self._occupancy()
+
+        archive_ended_trips(archive_cutoff(90))
+        self.assertEqual(self._occupancy(), before)
+
+        occupancy.rebuild()
+        self.assertEqual(self._occupancy(), before)
+
+    def test_rebuild_skips_archived_trips_of_deleted_routes(self):
+        self._ended_trip(self.old)
+        archive_ended_trips(archive_cutoff(90))
+
+        self.route.delete()
+        occupancy.rebuild()
+
+        self.assertFalse(RouteDayOccupancy.objects.exists())
+        self.assertTrue(ArchivedTrip.objects.exists())
+
+    def test_command_reports_archived_trips(self):
+        self._ended_trip(self.old)
+        out = StringIO()
+        call_command("archive_trips", "--days", "90", stdout=out)
+        self.assertIn("Archived 1 trips.", out.getvalue())
+
+
+class ArchiveApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        bus = Bus.objects.create(matricule="AR-02", capacity=4)
+        self.route = Route.objects.create(bus=bus, direction="A -> B")
+        self.other_route = Route.objects.create(bus=bus, direction="B -> A")
+        now = timezone.now()
+        self.first = ArchivedTrip.objects.create(
+            id=101, route=self.route, direction="A -> B", depart_time=now - timedelta(days=100),
+            seat_capacity=4, reservation_count=1,
+        )
+        self.second = ArchivedTrip.objects.create(
+            id=102, route=self.other_route, direction="B -> A", depart_time=now - timedelta(days=95),
+            seat_capacity=4, reservation_count=0,
+        )
+        ArchivedReservation.objects.create(
+            id=501, trip=self.first, passenger_name="Ali", created_at=now - timedelta(days=101)
+        )
+
+    def test_list_is_newest_first_and_filterable(self):
+        response = self.client.get("/api/v1/archive/trips/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.data], [102, 101])
+
+        response = self.client.get("/api/v1/archive/trips/", {"route": self.route.id})
+        self.assertEqual([row["id"] for row in response.data], [101])
+
+        day = timezone.localdate(self.second.depart_time).isoformat()
+        response = self.client.get("/api/v1/archive/trips/", {"date_from": day, "date_to": day})
+        self.assertEqual([row["id"] for row in response.data], [102])
+
+        response = self.client.get("/api/v1/archive/trips/", {"limit": 1})
+        self.assertEqual([row["id"] for row in response.data], [102])
+
+    def test_list_rejects_bad_params(self):
+        for params in ({"limit": "0"}, {"route": "x"}, {"date_from": "yesterday"}):
+            response = self.client.get("/api/v1/archive/trips/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_detail_includes_reservations(self):
+        response = self.client.get(f"/api/v1/archive/trips/{self.first.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["direction"], "A -> B")
+        self.assertEqual([row["passenger_name"] for row in response.data["reservations"]], ["Ali"])
+
+    def test_archive_is_read_only(self):
+        response = self.client.post("/api/v1/archive/trips/", {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import ArchivedTripDetailView, ArchivedTripListView
+
+
+urlpatterns = [
+    path("archive/trips/", ArchivedTripListView.as_view()),
+    path("archive/trips/<int:pk>/", ArchivedTripDetailView.as_view()),
+]
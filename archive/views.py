@@ -0,0 +1,77 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+
+from core.fast_serializers import ValuesSerializer
+from core.mixins import FastListMixin
+from core.sparse_fields import SparseFieldsMixin
+
+from .models import ArchivedTrip
+from .serializers import ArchivedTripDetailSerializer, ArchivedTripSerializer
+
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValidationError({name: "Expected a YYYY-MM-DD date."})
+    return parsed
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class ArchivedTripListView(SparseFieldsMixin, FastListMixin, ListAPIView):
+    """
+    Read-only history of archived trips, newest first. Filter with
+    ``route`` and ``date_from``/``date_to`` (YYYY-MM-DD, inclusive);
+    ``limit`` caps the page (default 100, max 1000).
+    """
+
+    serializer_class = ArchivedTripSerializer
+    fast_serializer = ValuesSerializer(ArchivedTripSerializer)
+    default_limit = 100
+    max_limit = 1000
+
+    def _limit(self):
+        value = self.request.query_params.get("limit")
+        if value is None:
+            return self.default_limit
+        if not value.isdigit() or int(value) == 0:
+            raise ValidationError({"limit": "Expected a positive integer."})
+        return min(int(value), self.max_limit)
+
+    def get_queryset(self):
+        queryset = ArchivedTrip.objects.order_by("-depart_time", "-id")
+
+        route = self.request.query_params.get("route")
+        if route is not None:
+            if not route.isdigit():
+                raise ValidationError({"route": "Expected a route id."})
+            queryset = queryset.filter(route_id=route)
+
+        date_from = _date_param(self.request, "date_from")
+        if date_from is not None:
+            queryset = queryset.filter(depart_time__gte=_start_of_day(date_from))
+
+        date_to = _date_param(self.request, "date_to")
+        if date_to is not None:
+            queryset = queryset.filter(depart_time__lt=_start_of_day(date_to + timedelta(days=1)))
+
+        return queryset
+
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(queryset)[: self._limit()]
+
+
+class ArchivedTripDetailView(RetrieveAPIView):
+    """One archived trip with its reservations."""
+
+    queryset = ArchivedTrip.objects.prefetch_related("reservations")
+    serializer_class = ArchivedTripDetailSerializer
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bus',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buses', '0002_bus_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bus',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -1,9 +1,11 @@
 from django.db import models
 
 from core.exceptions import FreezeError
+from core.versioning import VersionedModel
+from sync.models import SyncedModel
 
 
-class Bus(models.Model):
+class Bus(VersionedModel, SyncedModel):
     matricule = models.CharField(max_length=50)
     capacity = models.PositiveIntegerField()
 
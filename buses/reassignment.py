@@ -0,0 +1,134 @@
+"""
+Move routes between buses and change capacities of buses already in
+service, which ``Bus.save`` refuses once routes are assigned.
+
+A plan is checked with one grouped aggregate over the future CREATED trips
+it affects, then applied with one UPDATE per table, so swapping a whole
+fleet costs a handful of queries however many trips are involved. Moved
+routes are also checked against the other trips of their new bus
+(trips.schedule.reassignment_conflicts): the UPDATEs bypass Trip.save and
+its double-booking check.
+"""
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from analytics.occupancy import rebuild
+from routes.models import Route
+from trips.models import Trip
+from trips.schedule import reassignment_conflicts
+
+from .models import Bus
+
+
+def _case(mapping, output_field):
+    return Case(
+        *(When(pk=pk, then=Value(value)) for pk, value in mapping.items()),
+        output_field=output_field,
+    )
+
+
+def find_conflicts(route_buses, capacities):
+    """
+    Future CREATED trips that would hold more passengers on some segment
+    than the seats of their route's bus once the plan is applied.
+
+    ``route_buses`` maps route id -> bus id after the plan and
+    ``capacities`` bus id -> capacity after the plan.
+
+    The reservation count bounds a trip's busiest segment from above, so
+    the query only returns trips whose count exceeds the new seats; their
+    segment inventory then gives the actual peak. Trips without an
+    inventory row are judged by the count.
+    """
+    if not route_buses:
+        return []
+    seats = {route_id: capacities[bus_id] for route_id, bus_id in route_buses.items()}
+    candidates = (
+        Trip.objects.filter(
+            route_id__in=route_buses,
+            status=Trip.STATUS_CREATED,
+            depart_time__gte=timezone.now(),
+        )
+        .annotate(
+            reserved=Count("reservations"),
+            seats=Case(
+                *(When(route_id=route_id, then=Value(count)) for route_id, count in seats.items()),
+                output_field=models.IntegerField(),
+            ),
+        )
+        .filter(reserved__gt=F("seats"))
+        .order_by("depart_time", "id")
+        .values_list("id", "route_id", "reserved", "seats", "segment_inventory__counts")
+    )
+    conflicts = []
+    for trip_id, route_id, reserved, capacity, counts in candidates:
+        peak = max(counts) if counts else reserved
+        if peak > capacity:
+            conflicts.append(
+                {
+                    "trip": trip_id,
+                    "route": route_id,
+                    "bus": route_buses[route_id],
+                    "reserved": peak,
+                    "capacity": capacity,
+                }
+            )
+    return conflicts
+
+
+def plan_reassignment(assignments, new_capacities):
+    """
+    Resolve a plan into ``(route_buses, capacities)`` covering every route
+    whose seat count changes: the moved routes plus all routes of buses
+    whose capacity changes.
+    """
+    bus_ids = set(new_capacities) | set(assignments.values())
+    capacities = dict(Bus.objects.filter(id__in=bus_ids).values_list("id", "capacity"))
+    capacities.update(new_capacities)
+
+    route_buses = dict(
+        Route.objects.filter(Q(id__in=assignments) | Q(bus_id__in=new_capacities)).values_list(
+            "id", "bus_id"
+        )
+    )
+    route_buses.update(assignments)
+    return route_buses, capacities
+
+
+def check_reassignment(assignments, new_capacities):
+    """``(overbooked trips, bus schedule conflicts)`` the plan would cause."""
+    return (
+        find_conflicts(*plan_reassignment(assignments, new_capacities)),
+        reassignment_conflicts(assignments),
+    )
+
+
+@transaction.atomic
+def apply_reassignment(assignments, new_capacities):
+    """
+    Check and apply a plan atomically. Returns ``check_reassignment``'s
+    conflicts; when there are any nothing is changed.
+    """
+    route_buses, capacities = plan_reassignment(assignments, new_capacities)
+    conflicts = find_conflicts(route_buses, capacities)
+    schedule_conflicts = reassignment_conflicts(assignments)
+    if conflicts or schedule_conflicts:
+        return conflicts, schedule_conflicts
+
+    if assignments:
+        Route.objects.filter(id__in=assignments).update(
+            bus_id=_case(assignments, models.IntegerField())
+        )
+    if new_capacities:
+        # Bypasses Bus.save's freeze on purpose; bump the version by hand
+        # so outstanding ETags for these buses stop matching.
+        Bus.objects.filter(id__in=new_capacities).update(
+            capacity=_case(new_capacities, models.PositiveIntegerField()),
+            version=F("version") + 1,
+        )
+    # Queryset updates skip the analytics signals. The rebuild reprices
+    # trips that have not ended; ended ones keep their Trip.seat_capacity.
+    rebuild(route_ids=list(route_buses))
+    return [], []
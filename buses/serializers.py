@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from routes.models import Route
+
 from .models import Bus
 
 
@@ -8,4 +10,47 @@ class BusSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Bus
-        fields = "__all__"
+        fields = ["id", "matricule", "capacity", "version"]
+
+
+class RouteAssignmentSerializer(serializers.Serializer):
+    route = serializers.IntegerField(min_value=1)
+    bus = serializers.IntegerField(min_value=1)
+
+
+class CapacityChangeSerializer(serializers.Serializer):
+    bus = serializers.IntegerField(min_value=1)
+    capacity = serializers.IntegerField(min_value=1)
+
+
+class BusReassignmentSerializer(serializers.Serializer):
+    assignments = RouteAssignmentSerializer(many=True, required=False, default=list)
+    capacities = CapacityChangeSerializer(many=True, required=False, default=list)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if not attrs["assignments"] and not attrs["capacities"]:
+            raise serializers.ValidationError("Provide assignments and/or capacities.")
+
+        assignments = {item["route"]: item["bus"] for item in attrs["assignments"]}
+        capacities = {item["bus"]: item["capacity"] for item in attrs["capacities"]}
+        if len(assignments) != len(attrs["assignments"]):
+            raise serializers.ValidationError({"assignments": "Each route may appear only once."})
+        if len(capacities) != len(attrs["capacities"]):
+            raise serializers.ValidationError({"capacities": "Each bus may appear only once."})
+
+        missing_routes = set(assignments) - set(
+            Route.objects.filter(id__in=assignments).values_list("id", flat=True)
+        )
+        if missing_routes:
+            raise serializers.ValidationError(
+                {"assignments": f"Unknown routes: {sorted(missing_routes)}"}
+            )
+        bus_ids = set(assignments.values()) | set(capacities)
+        missing_buses = bus_ids - set(Bus.objects.filter(id__in=bus_ids).values_list("id", flat=True))
+        if missing_buses:
+            raise serializers.ValidationError({"bus": f"Unknown buses: {sorted(missing_buses)}"})
+
+        attrs["assignments"] = assignments
+        attrs["capacities"] = capacities
+        return attrs
@@ -1,10 +1,18 @@
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from analytics.models import RouteDayOccupancy
 from buses.models import Bus
-from core.exceptions import FreezeError
+from core.exceptions import FreezeError, PreconditionFailed
+from reservations.models import Reservation
 from routes.models import Route
+from trips.models import Trip
 
 
 class BusModelTests(TestCase):
@@ -96,3 +104,256 @@ class BusApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
         self.assertEqual(response.data["code"], "protected_delete")
 
+
+class BusBulkDeleteApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.free = [Bus.objects.create(matricule=f"BD-{i}", capacity=10) for i in range(3)]
+        self.assigned = Bus.objects.create(matricule="BD-X", capacity=10)
+        Route.objects.create(bus=self.assigned, direction="A -> B")
+        Route.objects.create(bus=self.assigned, direction="B -> A")
+
+    def _post(self, ids, **extra):
+        return self.client.post("/api/v1/buses/bulk-delete/", {"ids": ids, **extra}, format="json")
+
+    def test_deletes_unblocked_and_reports_blocked(self):
+        ids = [bus.id for bus in self.free] + [self.assigned.id, 999999]
+        response = self._post(ids)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted"], [bus.id for bus in self.free])
+        self.assertEqual(
+            response.data["blocked"],
+            [
+                {
+                    "id": self.assigned.id,
+                    "dependents": 2,
+                    "reason": "Cannot delete bus assigned to routes",
+                }
+            ],
+        )
+        self.assertEqual(response.data["not_found"], [999999])
+        self.assertEqual(list(Bus.objects.values_list("id", flat=True)), [self.assigned.id])
+
+    def test_dry_run_deletes_nothing(self):
+        response = self._post([self.free[0].id], dry_run=True)
+        self.assertEqual(response.data["deleted"], [self.free[0].id])
+        self.assertTrue(Bus.objects.filter(id=self.free[0].id).exists())
+
+    def test_query_count_does_not_grow_with_ids(self):
+        more = [Bus.objects.create(matricule=f"BD-M{i}", capacity=10) for i in range(20)]
+        with self.assertNumQueries(12):
+            self._post([bus.id for bus in self.free])
+        with self.assertNumQueries(12):
+            self._post([bus.id for bus in more])
+
+    def test_rejects_empty_ids(self):
+        response = self._post([])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BusOptimisticConcurrencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.bus = Bus.objects.create(matricule="OC-01", capacity=10)
+        self.url = f"/api/v1/buses/{self.bus.id}/"
+
+    def test_save_from_stale_copy_is_refused(self):
+        stale = Bus.objects.get(pk=self.bus.pk)
+        self.bus.capacity = 12
+        self.bus.save()
+        self.assertEqual(self.bus.version, 2)
+
+        stale.capacity = 14
+        with self.assertRaises(PreconditionFailed):
+            stale.save()
+        self.bus.refresh_from_db()
+        self.assertEqual(self.bus.capacity, 12)
+
+    def test_responses_carry_version_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["ETag"], '"1"')
+        response = self.client.patch(self.url, {"capacity": 11}, format="json")
+        self.assertEqual(response["ETag"], '"2"')
+        self.assertEqual(response.data["version"], 2)
+
+    def test_matching_if_match_updates(self):
+        response = self.client.patch(
+            self.url, {"capacity": 11}, format="json", HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_stale_if_match_is_rejected(self):
+        self.client.patch(self.url, {"capacity": 11}, format="json")
+        response = self.client.patch(
+            self.url, {"capacity": 15}, format="json", HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response.data["code"], "precondition_failed")
+        self.bus.refresh_from_db()
+        self.assertEqual(self.bus.capacity, 11)
+
+    def test_stale_if_match_blocks_delete(self):
+        self.client.patch(self.url, {"capacity": 11}, format="json")
+        response = self.client.delete(self.url, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Bus.objects.filter(pk=self.bus.pk).exists())
+
+
+class BusReassignApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.old_bus = Bus.objects.create(matricule="RA-OLD", capacity=3)
+        self.new_bus = Bus.objects.create(matricule="RA-NEW", capacity=2)
+        self.route = Route.objects.create(bus=self.old_bus, direction="Swap -> Here")
+        self.soon = Trip.objects.create(
+            route=self.route, depart_time=timezone.now() + timedelta(days=1)
+        )
+        for name in ("Ali", "Sara", "Mina"):
+            Reservation.objects.create(trip=self.soon, passenger_name=name)
+
+    def _post(self, expected_status=status.HTTP_200_OK, **body):
+        response = self.client.post("/api/v1/buses/reassign/", body, format="json")
+        self.assertEqual(response.status_code, expected_status, response.data)
+        return response.data
+
+    def test_overbooked_future_trip_blocks_move(self):
+        data = self._post(
+            status.HTTP_409_CONFLICT,
+            assignments=[{"route": self.route.id, "bus": self.new_bus.id}],
+        )
+        self.assertFalse(data["applied"])
+        self.assertEqual(
+            data["conflicts"],
+            [
+                {
+                    "trip": self.soon.id,
+                    "route": self.route.id,
+                    "bus": self.new_bus.id,
+                    "reserved": 3,
+                    "capacity": 2,
+                }
+            ],
+        )
+        self.route.refresh_from_db()
+        self.assertEqual(self.route.bus_id, self.old_bus.id)
+
+    def test_move_and_resize_together(self):
+        data = self._post(
+            assignments=[{"route": self.route.id, "bus": self.new_bus.id}],
+            capacities=[{"bus": self.new_bus.id, "capacity": 4}],
+        )
+        self.assertTrue(data["applied"])
+        self.route.refresh_from_db()
+        self.new_bus.refresh_from_db()
+        self.assertEqual(self.route.bus_id, self.new_bus.id)
+        self.assertEqual(self.new_bus.capacity, 4)
+        self.assertEqual(self.new_bus.version, 2)
+        self.assertEqual(RouteDayOccupancy.objects.get(route=self.route).seat_capacity, 4)
+
+    def test_ended_trips_keep_the_capacity_they_ran_with(self):
+        past = Trip.objects.create(route=self.route, depart_time=timezone.now() - timedelta(days=2))
+        Reservation.objects.create(trip=past, passenger_name="Omar")
+        past.start()
+        past.end()
+
+        self._post(
+            assignments=[{"route": self.route.id, "bus": self.new_bus.id}],
+            capacities=[{"bus": self.new_bus.id, "capacity": 5}],
+        )
+        ended = RouteDayOccupancy.objects.get(route=self.route, date=timezone.localdate(past.depart_time))
+        self.assertEqual((ended.seat_capacity, ended.ended_seat_capacity), (3, 3))
+        upcoming = RouteDayOccupancy.objects.get(
+            route=self.route, date=timezone.localdate(self.soon.depart_time)
+        )
+        self.assertEqual(upcoming.seat_capacity, 5)
+
+    def test_shrinking_capacity_checks_routes_already_on_the_bus(self):
+        self._post(
+            status.HTTP_409_CONFLICT,
+            capacities=[{"bus": self.old_bus.id, "capacity": 2}],
+        )
+        self.old_bus.refresh_from_db()
+        self.assertEqual(self.old_bus.capacity, 3)
+
+    def test_past_and_started_trips_are_not_checked(self):
+        Trip.objects.filter(id=self.soon.id).update(depart_time=timezone.now() - timedelta(days=1))
+        data = self._post(capacities=[{"bus": self.old_bus.id, "capacity": 1}])
+        self.assertTrue(data["applied"])
+
+    def test_dry_run_reports_without_applying(self):
+        data = self._post(
+            dry_run=True, assignments=[{"route": self.route.id, "bus": self.new_bus.id}]
+        )
+        self.assertEqual(len(data["conflicts"]), 1)
+        self.assertFalse(data["applied"])
+
+    def test_fleet_swap_query_count_is_flat(self):
+        buses = [Bus.objects.create(matricule=f"RA-F{index}", capacity=10) for index in range(6)]
+        routes = [Route.objects.create(bus=bus, direction=f"F{index}") for index, bus in enumerate(buses)]
+        for route in routes:
+            Trip.objects.create(route=route, depart_time=timezone.now() + timedelta(hours=2))
+        # Every bus ends up with one route, so no bus is double-booked.
+        pair = [{"route": routes[0].id, "bus": buses[1].id}, {"route": routes[1].id, "bus": buses[0].id}]
+        swap = [
+            {"route": route.id, "bus": buses[(index + 1) % len(buses)].id}
+            for index, route in enumerate(routes)
+        ]
+        with CaptureQueriesContext(connection) as small:
+            self._post(assignments=pair)
+        with CaptureQueriesContext(connection) as large:
+            self._post(assignments=swap)
+        self.assertEqual(len(small), len(large))
+
+    def test_segment_bookings_are_checked_at_their_peak(self):
+        route = Route.objects.create(bus=self.old_bus, direction="A -> C")
+        stops = [route.stops.create(position=index, name=name) for index, name in enumerate("ABC")]
+        trip = Trip.objects.create(route=route, depart_time=self.soon.depart_time + timedelta(hours=3))
+        for board, alight in ((0, 1), (0, 1), (1, 2), (1, 2)):
+            Reservation.objects.create(
+                trip=trip, passenger_name="Rider", board_stop=stops[board], alight_stop=stops[alight]
+            )
+
+        # Four reservations, but never more than two aboard at once.
+        data = self._post(assignments=[{"route": route.id, "bus": self.new_bus.id}], dry_run=True)
+        self.assertEqual(data["conflicts"], [])
+
+        Reservation.objects.create(
+            trip=trip, passenger_name="Through", board_stop=stops[0], alight_stop=stops[2]
+        )
+        data = self._post(assignments=[{"route": route.id, "bus": self.new_bus.id}], dry_run=True)
+        self.assertEqual(
+            [(row["trip"], row["reserved"], row["capacity"]) for row in data["conflicts"]],
+            [(trip.id, 3, 2)],
+        )
+
+    def test_move_onto_a_busy_bus_is_rejected(self):
+        busy = Route.objects.create(bus=self.new_bus, direction="Busy -> There")
+        clash = Trip.objects.create(route=busy, depart_time=self.soon.depart_time + timedelta(hours=1))
+        spare = Bus.objects.create(matricule="RA-SPARE", capacity=5)
+
+        data = self._post(
+            status.HTTP_409_CONFLICT,
+            assignments=[{"route": self.route.id, "bus": spare.id}, {"route": busy.id, "bus": spare.id}],
+        )
+        self.assertEqual(data["conflicts"], [])
+        self.assertEqual(
+            [(row["bus"], row["trip"], row["other_trip"]) for row in data["schedule_conflicts"]],
+            [(spare.id, self.soon.id, clash.id)],
+        )
+        self.route.refresh_from_db()
+        self.assertEqual(self.route.bus_id, self.old_bus.id)
+
+        # Moving the busy route away from the bus it shares frees it.
+        data = self._post(
+            assignments=[{"route": self.route.id, "bus": spare.id}, {"route": busy.id, "bus": self.old_bus.id}],
+            dry_run=True,
+        )
+        self.assertEqual(data["schedule_conflicts"], [])
+
+    def test_rejects_unknown_ids(self):
+        data = self._post(
+            status.HTTP_400_BAD_REQUEST,
+            assignments=[{"route": 999999, "bus": self.new_bus.id}],
+        )
+        self.assertIn("assignments", data)
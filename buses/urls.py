@@ -1,9 +1,11 @@
 from django.urls import path
 
-from .views import BusDetailView, BusListCreateView
+from .views import BusBulkDeleteView, BusDetailView, BusListCreateView, BusReassignView
 
 
 urlpatterns = [
     path("buses/", BusListCreateView.as_view()),
+    path("buses/bulk-delete/", BusBulkDeleteView.as_view()),
+    path("buses/reassign/", BusReassignView.as_view()),
     path("buses/<int:pk>/", BusDetailView.as_view()),
 ]
@@ -1,9 +1,22 @@
 import logging
 
+from django.db import transaction
+from rest_framework import status
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.bulk_delete import BulkDeleteView
+from core.fast_serializers import ValuesSerializer
+from core.mixins import FastListMixin
+from core.sparse_fields import SparseFieldsMixin
+from core.versioning import ConditionalWriteMixin
+from events.outbox import record_event, record_events
+from routes.models import Route
 
 from .models import Bus
-from .serializers import BusSerializer
+from .reassignment import apply_reassignment, check_reassignment
+from .serializers import BusReassignmentSerializer, BusSerializer
 
 audit_logger = logging.getLogger("audit")
 
@@ -15,12 +28,15 @@ def _audit_user(request):
     return "anonymous"
 
 
-class BusListCreateView(ListCreateAPIView):
+class BusListCreateView(SparseFieldsMixin, FastListMixin, ListCreateAPIView):
     queryset = Bus.objects.all()
     serializer_class = BusSerializer
+    fast_serializer = ValuesSerializer(BusSerializer)
 
     def perform_create(self, serializer):
-        bus = serializer.save()
+        with transaction.atomic():
+            bus = serializer.save()
+            record_event("bus.create", bus, _audit_user(self.request), serializer.data)
         audit_logger.info(
             "user=%s action=bus.create bus=%s",
             _audit_user(self.request),
@@ -28,15 +44,78 @@ class BusListCreateView(ListCreateAPIView):
         )
 
 
-class BusDetailView(RetrieveUpdateDestroyAPIView):
+class BusDetailView(ConditionalWriteMixin, SparseFieldsMixin, RetrieveUpdateDestroyAPIView):
     queryset = Bus.objects.all()
     serializer_class = BusSerializer
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            bus = serializer.save()
+            record_event("bus.update", bus, _audit_user(self.request), serializer.data)
+
     def perform_destroy(self, instance):
         bus_id = instance.id
-        super().perform_destroy(instance)
+        with transaction.atomic():
+            super().perform_destroy(instance)
+            record_event("bus.delete", instance, _audit_user(self.request), aggregate_id=bus_id)
         audit_logger.info(
             "user=%s action=bus.delete bus=%s",
             _audit_user(self.request),
             bus_id,
         )
+
+
+class BusBulkDeleteView(BulkDeleteView):
+    model = Bus
+    dependent_model = Route
+    dependent_field = "bus"
+    blocked_reason = "Cannot delete bus assigned to routes"
+
+
+class BusReassignView(APIView):
+    """
+    Move routes to other buses and/or change bus capacities in one atomic
+    step. Every future CREATED trip on an affected route is checked against
+    its new seat count with one grouped query, and the trips of moved
+    routes against the other trips of their new bus. Any overbooked trip
+    (``conflicts``) or double-booked bus (``schedule_conflicts``) is
+    reported and blocks the whole plan (409). ``dry_run`` only reports.
+    """
+
+    def post(self, request):
+        serializer = BusReassignmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        assignments = serializer.validated_data["assignments"]
+        capacities = serializer.validated_data["capacities"]
+        dry_run = serializer.validated_data["dry_run"]
+
+        if dry_run:
+            conflicts, schedule_conflicts = check_reassignment(assignments, capacities)
+        else:
+            actor = _audit_user(request)
+            with transaction.atomic():
+                conflicts, schedule_conflicts = apply_reassignment(assignments, capacities)
+                blocked = bool(conflicts or schedule_conflicts)
+                if not blocked:
+                    record_events("route.update", Route, list(assignments), actor)
+                    record_events("bus.update", Bus, list(capacities), actor)
+            if not blocked:
+                for route_id, bus_id in assignments.items():
+                    audit_logger.info(
+                        "user=%s action=route.reassign route=%s bus=%s", actor, route_id, bus_id
+                    )
+                for bus_id, capacity in capacities.items():
+                    audit_logger.info(
+                        "user=%s action=bus.capacity bus=%s capacity=%s", actor, bus_id, capacity
+                    )
+
+        blocked = bool(conflicts or schedule_conflicts)
+        return Response(
+            {
+                "dry_run": dry_run,
+                "applied": not dry_run and not blocked,
+                "conflicts": conflicts,
+                "schedule_conflicts": schedule_conflicts,
+            },
+            status=status.HTTP_409_CONFLICT if blocked and not dry_run else status.HTTP_200_OK,
+        )
@@ -7,4 +7,8 @@ urlpatterns = [
     path("", include("routes.urls")),
     path("", include("trips.urls")),
     path("", include("reservations.urls")),
+    path("", include("analytics.urls")),
+    path("", include("events.urls")),
+    path("", include("sync.urls")),
+    path("", include("archive.urls")),
 ]
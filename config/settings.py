@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 import copy
+import os
 
 from django.template.context import BaseContext
 
@@ -60,6 +63,10 @@ INSTALLED_APPS = [
     'routes',
     'trips',
     'reservations',
+    'analytics',
+    'events',
+    'sync',
+    'archive',
 ]
 
 MIDDLEWARE = [
@@ -68,6 +75,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReadReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -102,6 +110,24 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma-separated SQLite files kept in sync with
+# `manage.py sync_replicas`. Safe-method requests read from them through
+# core.db_router.ReadReplicaRouter; writes always go to `default`.
+DATABASE_REPLICAS = []
+
+for _index, _replica_name in enumerate(
+    filter(None, os.environ.get('SQLITE_REPLICAS', '').split(',')), start=1
+):
+    _alias = f'replica{_index}'
+    DATABASES[_alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / _replica_name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReadReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -141,10 +167,60 @@ STATIC_URL = 'static/'
 
 REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'core.exception_handler.api_exception_handler',
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'accounts.authentication.CachedJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    # FastJSONRenderer uses orjson when installed and the stdlib otherwise.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# MessagePack is only offered when the optional msgpack package is installed.
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('core.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('core.parsers.MessagePackParser')
+
 AUTH_USER_MODEL = 'accounts.User'
 
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+}
+
+# In-process cache of authenticated users (accounts.user_cache).
+USER_CACHE_TTL = 60
+USER_CACHE_MAXSIZE = 4096
+
+# Lifetime of cached passenger manifests (trips.manifest). Reservation
+# writes invalidate entries through the cache; deploy a shared cache backend
+# in CACHES so all workers see the same entries and invalidations.
+MANIFEST_CACHE_TTL = 3600
+
+# In-memory connection index behind itinerary search (trips.itinerary).
+ITINERARY_HORIZON = timedelta(hours=36)
+ITINERARY_REFRESH_SECONDS = 2
+ITINERARY_MIN_TRANSFER = timedelta(minutes=10)
+
+# How long a trip holds its bus when its route has no duration (trips.schedule).
+TRIP_DEFAULT_DURATION = timedelta(hours=2)
+# Shortest break a driver gets between two trips (trips.drivers).
+DRIVER_MIN_REST = timedelta(minutes=30)
+
+# Admin changelists show an estimated row count above this size (core.admin).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# ENDED trips older than this move to the archive tables (archive_trips command).
+ARCHIVE_AFTER_DAYS = 90
+
 
 LOGGING = {
     'version': 1,
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(model, using):
+    """
+    Cheap row-count estimate for ``model``'s table, or None when the backend
+    has none. PostgreSQL and MySQL report their planner statistics; on
+    SQLite the highest rowid comes from the end of the primary-key b-tree,
+    an upper bound once rows have been deleted.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        # PostgreSQL reports -1 for tables that were never analyzed.
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator for very large tables: an unfiltered list shows the
+    table's estimated size instead of running COUNT(*). Filtered lists and
+    tables below ADMIN_ESTIMATED_COUNT_THRESHOLD rows are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            threshold = getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", 100_000)
+            if estimate is not None and estimate >= threshold:
+                return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin defaults for tables with millions of rows. Admins using it
+    filter dates with a ``list_filter`` on the field, whose choices are
+    fixed ranges, rather than ``date_hierarchy``: the hierarchy's top level
+    reads the distinct dates of the whole table.
+    """
+
+    paginator = EstimatedCountPaginator
+    # Otherwise every filtered changelist also counts the whole table.
+    show_full_result_count = False
@@ -0,0 +1,190 @@
+"""
+Offset index over the audit log.
+
+Audit lines look like ``2026-10-19 17:21:55,132 INFO user=7 action=trip.start
+trip=123 ...``. The log is read through ``mmap`` and every complete line is
+recorded in a SQLite sidecar (``<log>.idx``) as its byte offset and length
+plus the timestamp, user, action and trip it mentions. Lookups go through
+the sidecar's indexes and then slice the matching lines straight out of
+the mapped log, so answering "timeline of trip 123" never scans the file.
+
+The sidecar remembers how far it got and the log's first bytes: later
+updates parse only what was appended, and a rotated or truncated log is
+re-indexed from the start.
+"""
+
+import mmap
+import os
+import re
+import sqlite3
+
+LINE = re.compile(rb"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) \S+ (.*)")
+FIELD = re.compile(rb"(\w+)=(\S*)")
+HEAD_BYTES = 128
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S,000"
+
+TABLES = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+CREATE TABLE IF NOT EXISTS entry (
+    offset INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL,
+    at TEXT NOT NULL,
+    user TEXT,
+    action TEXT,
+    trip INTEGER
+);
+"""
+INDEXES = """
+CREATE INDEX IF NOT EXISTS entry_trip ON entry (trip, at) WHERE trip IS NOT NULL;
+CREATE INDEX IF NOT EXISTS entry_user ON entry (user, at);
+CREATE INDEX IF NOT EXISTS entry_action ON entry (action, at);
+CREATE INDEX IF NOT EXISTS entry_at ON entry (at);
+"""
+DROP_INDEXES = """
+DROP INDEX IF EXISTS entry_trip;
+DROP INDEX IF EXISTS entry_user;
+DROP INDEX IF EXISTS entry_action;
+DROP INDEX IF EXISTS entry_at;
+"""
+
+
+def parse_line(line):
+    """``(timestamp, user, action, trip)`` of one audit line, or None if it is not one."""
+    match = LINE.match(line)
+    if match is None:
+        return None
+    fields = dict(FIELD.findall(match.group(2)))
+    trip = fields.get(b"trip", b"")
+    return (
+        match.group(1).decode(),
+        fields[b"user"].decode() if b"user" in fields else None,
+        fields[b"action"].decode() if b"action" in fields else None,
+        int(trip) if trip.isdigit() else None,
+    )
+
+
+def format_timestamp(value):
+    """Datetime in the log's own timestamp layout, for range comparisons."""
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+class _Scan:
+    """Iterator of index rows for the complete lines of ``view`` from ``offset`` on."""
+
+    def __init__(self, view, offset):
+        self.view = view
+        self.offset = offset
+        self.count = 0
+
+    def __iter__(self):
+        view = self.view
+        view.seek(self.offset)
+        for line in iter(view.readline, b""):
+            if not line.endswith(b"\n"):
+                # Still being written; picked up by the next update.
+                break
+            parsed = parse_line(line.rstrip(b"\r\n"))
+            if parsed is not None:
+                self.count += 1
+                yield (self.offset, len(line)) + parsed
+            self.offset += len(line)
+
+
+class AuditLogIndex:
+    def __init__(self, log_path, index_path=None):
+        self.log_path = os.fspath(log_path)
+        self.index_path = os.fspath(index_path) if index_path else f"{self.log_path}.idx"
+        self.db = sqlite3.connect(self.index_path)
+        # The sidecar can always be rebuilt from the log, so trade
+        # durability for indexing speed.
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.executescript(TABLES + INDEXES)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM entry")
+            self.db.execute("DELETE FROM meta")
+
+    def update(self):
+        """Index lines appended since the last update; returns how many were added."""
+        try:
+            size = os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            size = 0
+        if size == 0:
+            self.clear()
+            return 0
+
+        with open(self.log_path, "rb") as log, mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            indexed = self._meta("indexed_bytes", 0)
+            head = self._meta("head", b"")
+            if indexed > size or view[: len(head)] != head:
+                # Rotated or truncated: start over.
+                self.clear()
+                indexed = 0
+
+            if indexed == 0:
+                # Building the indexes once after a bulk load is much faster
+                # than maintaining them row by row.
+                self.db.executescript(DROP_INDEXES)
+
+            scan = _Scan(view, indexed)
+            with self.db:
+                # executemany pulls rows from the scan lazily, so memory stays
+                # flat however large the log is.
+                self.db.executemany("INSERT INTO entry VALUES (?, ?, ?, ?, ?, ?)", scan)
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    [("indexed_bytes", scan.offset), ("head", bytes(view[:HEAD_BYTES]))],
+                )
+            self.db.executescript(INDEXES)
+        return scan.count
+
+    def find(self, trip=None, user=None, action=None, since=None, until=None, limit=None):
+        """
+        Matching log lines, oldest first. ``since``/``until`` are datetimes
+        in the log's clock (inclusive / exclusive); ``user`` is matched as
+        logged, e.g. ``"7"`` or ``"anonymous"``.
+        """
+        clauses, params = [], []
+        for column, value in (("trip", trip), ("user", user), ("action", action)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("at >= ?")
+            params.append(format_timestamp(since))
+        if until is not None:
+            clauses.append("at < ?")
+            params.append(format_timestamp(until))
+
+        sql = "SELECT offset, length FROM entry"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY at, offset"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        spans = self.db.execute(sql, params).fetchall()
+        if not spans:
+            return []
+        with open(self.log_path, "rb") as log, mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return [
+                view[offset : offset + length].rstrip(b"\r\n").decode("utf-8", "replace")
+                for offset, length in spans
+            ]
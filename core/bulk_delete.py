@@ -0,0 +1,88 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Count
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from events.outbox import record_events
+
+audit_logger = logging.getLogger("audit")
+
+MAX_BULK_IDS = 1000
+
+
+def _audit_user(request):
+    user = getattr(request, "user", None)
+    if user is not None and getattr(user, "is_authenticated", False):
+        return getattr(user, "id", str(user))
+    return "anonymous"
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_IDS,
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+
+class BulkDeleteView(APIView):
+    """
+    Delete many objects at once, skipping those that still have dependents.
+
+    Subclasses set ``model``, the PROTECTing ``dependent_model`` and its
+    foreign key ``dependent_field``. Dependents of every requested id are
+    counted with one grouped aggregate; all unblocked ids are then removed
+    with a single DELETE. ``dry_run`` reports the impact without deleting.
+    Subclasses whose models have per-row delete receivers override
+    ``perform_delete`` to batch that work, keeping the query count flat.
+    """
+
+    model = None
+    dependent_model = None
+    dependent_field = None
+    blocked_reason = "Cannot delete object with protected dependencies"
+
+    def post(self, request):
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = list(dict.fromkeys(serializer.validated_data["ids"]))
+        name = self.model._meta.model_name
+
+        existing = set(
+            self.model.objects.filter(id__in=requested).values_list("id", flat=True)
+        )
+        dependents = dict(
+            self.dependent_model.objects.filter(**{f"{self.dependent_field}__in": existing})
+            .values_list(self.dependent_field)
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        deletable = [pk for pk in requested if pk in existing and pk not in dependents]
+
+        if deletable and not serializer.validated_data["dry_run"]:
+            actor = _audit_user(request)
+            with transaction.atomic():
+                self.perform_delete(deletable)
+                record_events(f"{name}.delete", self.model, deletable, actor)
+            for pk in deletable:
+                audit_logger.info("user=%s action=%s.delete %s=%s", actor, name, name, pk)
+
+        return Response(
+            {
+                "dry_run": serializer.validated_data["dry_run"],
+                "deleted": deletable,
+                "blocked": [
+                    {"id": pk, "dependents": dependents[pk], "reason": self.blocked_reason}
+                    for pk in requested
+                    if pk in dependents
+                ],
+                "not_found": [pk for pk in requested if pk not in existing],
+            }
+        )
+
+    def perform_delete(self, ids):
+        self.model.objects.filter(id__in=ids).delete()
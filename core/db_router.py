@@ -0,0 +1,83 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_routing_state = ContextVar("db_routing_state", default=None)
+
+
+class _RoutingState:
+    __slots__ = ("use_replica", "pinned")
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.pinned = False
+
+
+def _replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+@contextmanager
+def routing_scope(use_replica):
+    """
+    Route reads issued inside the block to a read replica when ``use_replica``
+    is true. The first write inside the block pins every later read to the
+    primary, so a request always sees its own writes.
+    """
+    token = _routing_state.set(_RoutingState(use_replica))
+    try:
+        yield
+    finally:
+        _routing_state.reset(token)
+
+
+def pin_to_primary():
+    state = _routing_state.get()
+    if state is not None:
+        state.pinned = True
+
+
+def use_primary_database(view):
+    """Opt a function-based view out of replica reads."""
+    view.use_read_replica = False
+    return view
+
+
+class ReadReplicaRouter:
+    """
+    Send reads to ``settings.DATABASE_REPLICAS`` while a replica-enabled
+    routing scope is active and nothing has been written yet; everything else
+    (writes, migrations, reads outside a request) stays on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or not state.use_replica or state.pinned:
+            return DEFAULT_DB_ALIAS
+
+        replicas = _replica_aliases()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+
+        # Reads inside an open transaction must see its uncommitted rows.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold a copy of the primary, so objects loaded from any of
+        # them may reference each other.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in _replica_aliases():
+            return False
+        return None
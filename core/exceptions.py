@@ -35,3 +35,21 @@ class IntegrityError(DomainError):
     default_message = "Integrity constraint violated"
     default_code = "integrity_error"
     status_code = status.HTTP_409_CONFLICT
+
+
+class ResyncRequired(DomainError):
+    default_message = "Sync cursor is older than the retained history; download everything again with since=0"
+    default_code = "resync_required"
+    status_code = status.HTTP_410_GONE
+
+
+class PreconditionFailed(DomainError):
+    default_message = "The resource has changed since it was fetched; reload it and retry"
+    default_code = "precondition_failed"
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+
+
+class ScheduleConflict(DomainError):
+    default_message = "The bus is already scheduled for another trip at that time"
+    default_code = "schedule_conflict"
+    status_code = status.HTTP_409_CONFLICT
@@ -0,0 +1,127 @@
+from functools import lru_cache
+
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ValidationError
+
+MAX_EXPAND_DEPTH = 3
+
+
+def _resolve(serializer_class):
+    if isinstance(serializer_class, str):
+        return import_string(serializer_class)
+    return serializer_class
+
+
+@lru_cache(maxsize=None)
+def expandable_paths(serializer_class, depth=MAX_EXPAND_DEPTH):
+    """
+    Map every dotted expansion reachable from ``serializer_class`` (up to
+    ``depth`` levels) to the ORM lookups that load it: ``select_related``
+    for paths made only of forward relations, ``prefetch_related`` as soon
+    as a to-many relation is crossed.
+    """
+    paths = {}
+
+    def walk(cls, prefix, lookup, many, level):
+        if level > depth:
+            return
+        for name, (child, child_many) in getattr(cls, "expandable_fields", {}).items():
+            path = f"{prefix}{name}"
+            child_lookup = f"{lookup}{name}"
+            is_many = many or child_many
+            paths[path] = ("prefetch" if is_many else "select", child_lookup)
+            walk(_resolve(child), f"{path}.", f"{child_lookup}__", is_many, level + 1)
+
+    walk(serializer_class, "", "", False, 1)
+    return paths
+
+
+def parse_expand(value, allowed):
+    """
+    Turn ``"route,route.bus"`` into the tree ``{"route": {"bus": {}}}`` plus
+    the list of ``(kind, lookup)`` pairs from ``allowed`` needed to load it.
+    """
+    tree = {}
+    lookups = []
+    for path in filter(None, (part.strip() for part in value.split(","))):
+        if path not in allowed:
+            raise ValidationError(
+                {"expand": f"Cannot expand '{path}'. Allowed: {', '.join(sorted(allowed))}."}
+            )
+        lookups.append(allowed[path])
+        node = tree
+        for name in path.split("."):
+            node = node.setdefault(name, {})
+    return tree, lookups
+
+
+class ExpandableSerializerMixin:
+    """
+    Serializer mixin that inlines related objects named in ``expand`` (a tree
+    from parse_expand) in place of their primary keys.
+
+    ``expandable_fields`` maps a model relation name to ``(serializer, many)``;
+    the serializer may be given as a dotted path to avoid import cycles.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, expand=None, **kwargs):
+        self._expand = expand or {}
+        super().__init__(*args, **kwargs)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for name, subtree in self._expand.items():
+            serializer_class, many = self.expandable_fields[name]
+            value = getattr(instance, name)
+            if value is None:
+                data[name] = None
+                continue
+            if many:
+                value = value.all()
+            # Leaf serializers (e.g. BusSerializer) need not be expandable.
+            nested_kwargs = {"expand": subtree} if subtree else {}
+            data[name] = _resolve(serializer_class)(
+                value, many=many, context=self.context, **nested_kwargs
+            ).data
+        return data
+
+
+class ExpandMixin:
+    """
+    View mixin for ``?expand=a,a.b``: validates the paths against the
+    serializer's expandable fields, adds the matching select_related /
+    prefetch_related to the queryset and hands the tree to the serializer.
+    """
+
+    _expand = None
+
+    def get_expand(self):
+        if self._expand is None:
+            self._expand = parse_expand(
+                self.request.query_params.get("expand", ""),
+                expandable_paths(self.get_serializer_class()),
+            )
+        return self._expand[0]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.get_expand():
+            return queryset
+
+        lookups = self._expand[1]
+        select = [lookup for kind, lookup in lookups if kind == "select"]
+        prefetch = [lookup for kind, lookup in lookups if kind == "prefetch"]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("expand", self.get_expand())
+        return super().get_serializer(*args, **kwargs)
+
+    def use_fast_list(self):
+        return not self.get_expand() and super().use_fast_list()
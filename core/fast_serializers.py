@@ -0,0 +1,79 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import relations, serializers
+
+# Fields whose to_representation() returns the database value unchanged.
+_PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+class ValuesSerializer:
+    """
+    Read-only twin of a ModelSerializer for list responses.
+
+    The field layout of ``serializer_class`` is compiled once into a list of
+    (output name, model column, converter) entries, and rows are built
+    straight from ``queryset.values_list()`` without instantiating models or
+    running the per-field serializer machinery. The output matches what
+    ``serializer_class(queryset, many=True).data`` renders.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._plan = None
+
+    @property
+    def plan(self):
+        if self._plan is None:
+            self._plan = self._compile()
+        return self._plan
+
+    def _compile(self):
+        plan = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, (serializers.BaseSerializer, relations.ManyRelatedField)):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} cannot be read from values()"
+                )
+            if field.source == "*" or "." in field.source:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} has an unsupported source"
+                )
+
+            if isinstance(field, _PASSTHROUGH_FIELDS):
+                converter = None
+            else:
+                converter = field.to_representation
+            plan.append((name, field.source, converter))
+        return plan
+
+    def serialize(self, queryset, field_names=None):
+        plan = self.plan
+        if field_names is not None:
+            plan = [entry for entry in plan if entry[0] in field_names]
+        names = tuple(name for name, _source, _converter in plan)
+        converters = tuple(
+            (index, converter)
+            for index, (_name, _source, converter) in enumerate(plan)
+            if converter is not None
+        )
+        rows = queryset.values_list(*(source for _name, source, _converter in plan))
+
+        if not converters:
+            return [dict(zip(names, row)) for row in rows]
+
+        data = []
+        for row in rows:
+            row = list(row)
+            for index, converter in converters:
+                if row[index] is not None:
+                    row[index] = converter(row[index])
+            data.append(dict(zip(names, row)))
+        return data
@@ -0,0 +1,86 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.audit_index import AuditLogIndex
+
+
+def _default_log_path():
+    try:
+        return settings.LOGGING["handlers"]["audit_file"]["filename"]
+    except KeyError:
+        raise CommandError("No audit_file log handler configured; pass --log")
+
+
+def _day(value):
+    if value == "today":
+        return timezone.localdate()
+    if value == "yesterday":
+        return timezone.localdate() - timedelta(days=1)
+    parsed = parse_date(value)
+    if parsed is None:
+        raise CommandError(f"Expected today, yesterday or YYYY-MM-DD, got {value!r}")
+    return parsed
+
+
+def _moment(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Expected YYYY-MM-DD[ HH:MM[:SS]], got {value!r}")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_aware(parsed):
+        # The log is written in the server's local time.
+        parsed = timezone.make_naive(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Query the audit log through its offset index, e.g. "
+        "'audit_log --trip 123' or 'audit_log --user 7 --date yesterday'. "
+        "Without filters it only brings the index up to date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", default=None, help="Audit log path (default: the audit_file handler's).")
+        parser.add_argument("--index", default=None, help="Index path (default: <log>.idx).")
+        parser.add_argument("--trip", type=int, default=None)
+        parser.add_argument("--user", default=None, help="User id as logged, or 'anonymous'.")
+        parser.add_argument("--action", default=None, help="Exact action, e.g. trip.start.")
+        parser.add_argument("--date", type=_day, default=None, help="today, yesterday or YYYY-MM-DD.")
+        parser.add_argument("--since", type=_moment, default=None)
+        parser.add_argument("--until", type=_moment, default=None)
+        parser.add_argument("--limit", type=int, default=None)
+        parser.add_argument("--rebuild", action="store_true", help="Re-index the whole log.")
+
+    def handle(self, *args, **options):
+        since, until = options["since"], options["until"]
+        if options["date"] is not None:
+            since = datetime.combine(options["date"], time.min)
+            until = since + timedelta(days=1)
+
+        with AuditLogIndex(options["log"] or _default_log_path(), options["index"]) as index:
+            if options["rebuild"]:
+                index.clear()
+            added = index.update()
+
+            filters = (options["trip"], options["user"], options["action"], since, until)
+            if all(value is None for value in filters):
+                if options["verbosity"]:
+                    self.stdout.write(f"indexed {added} new line(s)")
+                return
+
+            for line in index.find(
+                trip=options["trip"],
+                user=options["user"],
+                action=options["action"],
+                since=since,
+                until=until,
+                limit=options["limit"],
+            ):
+                self.stdout.write(line)
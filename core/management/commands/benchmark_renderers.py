@@ -0,0 +1,77 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+class Command(BaseCommand):
+    help = "Compare render time and payload size of the API renderers on trip/reservation lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        repeat = options["repeat"]
+        payloads = {
+            "trips": self._trips(rows),
+            "reservations": self._reservations(rows),
+        }
+
+        renderers = [("json (stdlib)", JSONRenderer())]
+        if orjson is not None:
+            renderers.append(("json (orjson)", FastJSONRenderer()))
+        else:
+            self.stdout.write("orjson not installed; skipping FastJSONRenderer")
+        if msgpack is not None:
+            renderers.append(("msgpack", MessagePackRenderer()))
+        else:
+            self.stdout.write("msgpack not installed; skipping MessagePackRenderer")
+
+        self.stdout.write(f"{'payload':<14}{'renderer':<16}{'ms/render':>12}{'bytes':>12}")
+        for payload_name, data in payloads.items():
+            for renderer_name, renderer in renderers:
+                elapsed, size = self._measure(renderer, data, repeat)
+                self.stdout.write(
+                    f"{payload_name:<14}{renderer_name:<16}{elapsed * 1000:>12.2f}{size:>12}"
+                )
+
+    def _measure(self, renderer, data, repeat):
+        body = renderer.render(data, renderer.media_type, {})
+        started = time.perf_counter()
+        for _ in range(repeat):
+            renderer.render(data, renderer.media_type, {})
+        return (time.perf_counter() - started) / repeat, len(body)
+
+    def _trips(self, rows):
+        # Shaped like TripSerializer output, with datetimes left for the
+        # renderer to encode as the fast list path can produce them.
+        now = timezone.now()
+        return [
+            {
+                "id": index,
+                "route": index % 50,
+                "depart_time": now + timedelta(minutes=index),
+                "status": "CREATED",
+                "start_trip_at": None,
+                "end_trip_at": None,
+            }
+            for index in range(rows)
+        ]
+
+    def _reservations(self, rows):
+        now = timezone.now()
+        return [
+            {
+                "id": index,
+                "passenger_name": f"Passenger {index}",
+                "created_at": now,
+                "trip": index % 500,
+            }
+            for index in range(rows)
+        ]
@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database onto every configured read replica."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--watch",
+            type=float,
+            default=None,
+            metavar="SECONDS",
+            help="Keep running and re-sync every SECONDS.",
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("sync_replicas only supports SQLite databases")
+
+        replicas = list(getattr(settings, "DATABASE_REPLICAS", ()))
+        if not replicas:
+            raise CommandError("No read replicas configured (set SQLITE_REPLICAS)")
+
+        while True:
+            for alias in replicas:
+                self._copy(primary["NAME"], settings.DATABASES[alias]["NAME"])
+                self.stdout.write(f"synced {alias}")
+
+            if options["watch"] is None:
+                return
+            time.sleep(options["watch"])
+
+    def _copy(self, source_path, target_path):
+        source = sqlite3.connect(str(source_path))
+        target = sqlite3.connect(str(target_path))
+        try:
+            # The online backup API gives a consistent snapshot even while
+            # the primary is being written to.
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
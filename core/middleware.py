@@ -0,0 +1,41 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .db_router import pin_to_primary, routing_scope
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadReplicaMiddleware:
+    """
+    Open a database routing scope per request: safe methods read from the
+    replicas unless the view sets ``use_read_replica = False``.
+
+    Supports both sync and async stacks, so this middleware adds no thread
+    hop of its own in front of async views (the seat streams). Django's
+    MiddlewareMixin-based middleware in MIDDLEWARE still run their hooks
+    through sync_to_async, once per request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routing_scope(use_replica=request.method in SAFE_METHODS):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with routing_scope(use_replica=request.method in SAFE_METHODS):
+            return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", None) or getattr(view_func, "cls", None)
+        if not getattr(view_class or view_func, "use_read_replica", True):
+            pin_to_primary()
+        return None
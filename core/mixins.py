@@ -0,0 +1,26 @@
+from rest_framework.response import Response
+
+
+class FastListMixin:
+    """
+    Serve unpaginated list GETs through ``fast_serializer`` (a
+    core.fast_serializers.ValuesSerializer); ``serializer_class`` still
+    handles validation, writes and detail responses.
+    """
+
+    fast_serializer = None
+
+    def use_fast_list(self):
+        return self.fast_serializer is not None and self.paginator is None
+
+    def get_list_field_names(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(
+            self.fast_serializer.serialize(queryset, self.get_list_field_names())
+        )
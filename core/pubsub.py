@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    """
+    One subscriber's mailbox, bound to the event loop that created it.
+
+    Messages published while the subscriber is slow are coalesced: once
+    ``max_pending`` messages are queued the oldest are dropped, which is safe
+    for state snapshots where only the latest value matters.
+    """
+
+    def __init__(self, broker, topic, max_pending):
+        self.broker = broker
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.max_pending = max_pending
+
+    def _push(self, message):
+        while self.queue.qsize() >= self.max_pending:
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """
+    In-process topic pub/sub. Subscribers are asyncio queues, so an idle
+    subscriber costs a queue rather than a thread; ``publish`` may be called
+    from any thread (sync views, signal handlers, on_commit callbacks).
+    """
+
+    def __init__(self):
+        self._topics = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, max_pending=16):
+        subscription = Subscription(self, topic, max_pending)
+        with self._lock:
+            self._topics[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._topics[subscription.topic]
+
+    def has_subscribers(self, topic):
+        return topic in self._topics
+
+    def publish(self, topic, message):
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._push, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down; drop it.
+                self.unsubscribe(subscription)
+        return len(subscribers)
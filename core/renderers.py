@@ -0,0 +1,79 @@
+import math
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+_fallback_encoder = JSONEncoder()
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def encode_default(obj):
+    """Convert values orjson/msgpack do not know into DRF's JSON representation."""
+    return _fallback_encoder.default(obj)
+
+
+def _check_finite(data):
+    """Raise ValueError, as ``json.dumps(allow_nan=False)`` does, on NaN or infinity."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                raise ValueError("Out of range float values are not JSON compliant: " + repr(value))
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson when it is installed.
+
+    orjson encodes datetimes natively and writes compact UTF-8 directly, which
+    is what DRF produces with its default COMPACT_JSON/UNICODE_JSON settings.
+    Indented output (browsable API, ``; indent=`` media types) and
+    non-default settings go through the stdlib encoder. orjson writes NaN
+    and infinity as ``null``; with STRICT_JSON (the default) they are
+    rejected up front like the stdlib renderer does, and without it the
+    stdlib encoder writes them.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        _check_finite(data)
+        ret = orjson.dumps(data, default=encode_default, option=_ORJSON_OPTIONS)
+        # Match JSONRenderer: keep the output a strict javascript subset.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer for ``Accept: application/msgpack`` clients (requires msgpack)."""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
@@ -0,0 +1,102 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_fields(value, available):
+    requested = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise ValidationError(
+            {"fields": f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}."}
+        )
+    return set(requested)
+
+
+def concrete_columns(model, serializer_fields, names):
+    """
+    Model fields backing ``names``, or None when any of them is computed
+    (method fields, properties, nested sources) and the row must stay whole.
+    """
+    columns = set()
+    for name in names:
+        if name not in serializer_fields:
+            continue
+        source = serializer_fields[name].source
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete:
+            return None
+        columns.add(model_field.name)
+    return columns
+
+
+class SparseFieldsMixin:
+    """
+    View mixin for ``?fields=a,b`` on reads: drops the other fields from the
+    serializer output and defers their columns with ``QuerySet.only()`` so
+    they are not fetched either. Writes always use the full serializer.
+    """
+
+    _sparse_fields = None
+
+    def get_sparse_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        value = self.request.query_params.get("fields")
+        if not value:
+            return None
+        if self._sparse_fields is None:
+            serializer_class = self.get_serializer_class()
+            available = [
+                name
+                for name, field in serializer_class().fields.items()
+                if not field.write_only
+            ]
+            # Reverse relations only appear when expanded, but may be selected.
+            available += [
+                name
+                for name in getattr(serializer_class, "expandable_fields", {})
+                if name not in available
+            ]
+            self._sparse_fields = parse_fields(value, available)
+        return self._sparse_fields
+
+    def filter_queryset(self, queryset):
+        # Narrowed here rather than in get_queryset() so viewsets that
+        # override get_queryset() for scoping still get it.
+        queryset = super().filter_queryset(queryset)
+        names = self.get_sparse_fields()
+        if not names:
+            return queryset
+
+        columns = concrete_columns(
+            queryset.model, self.get_serializer_class()().fields, names
+        )
+        if columns is None:
+            return queryset
+
+        # Relations loaded with select_related (e.g. by ?expand=) must not be deferred.
+        if isinstance(queryset.query.select_related, dict):
+            columns.update(queryset.query.select_related)
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_sparse_fields()
+        if names:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in names:
+                    target.fields.pop(name)
+            expand = getattr(target, "_expand", None)
+            if expand:
+                target._expand = {
+                    name: subtree for name, subtree in expand.items() if name in names
+                }
+        return serializer
+
+    def get_list_field_names(self):
+        return self.get_sparse_fields()
@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for pinning an upper bound on SQL queries. Unlike
+    ``assertNumQueries`` it tolerates doing better than the budget, and a
+    failure lists every query that ran so the N+1 is visible in the report.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using="default"):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context)
+        if executed > budget:
+            queries = "\n".join(
+                f"{number}. {query['sql']}"
+                for number, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"{executed} queries executed, budget is {budget}:\n{queries}")
@@ -8,3 +8,589 @@ Guidance for future tests in this module:
 - Validate project-wide concerns (routing, exception handling, global settings).
 """
 
+import os
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from accounts.models import User
+from archive.models import ArchivedReservation, ArchivedTrip
+from buses.models import Bus
+from buses.serializers import BusSerializer
+from core.audit_index import AuditLogIndex
+from core.db_router import ReadReplicaRouter, routing_scope
+from core.middleware import ReadReplicaMiddleware
+from core.renderers import FastJSONRenderer, msgpack
+from core.testing import QueryBudgetMixin
+from events.outbox import record_event
+from organization.models import Organization
+from reservations.models import Reservation
+from reservations.serializers import ReservationSerializer
+from routes.models import Route, RouteStop
+from routes.serializers import RouteSerializer
+from trips.itinerary import connection_index
+from trips.models import Trip
+from trips.serializers import TripSerializer
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReadReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+
+    def test_reads_outside_a_request_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Bus), "default")
+
+    def test_safe_request_reads_from_replica(self):
+        with routing_scope(use_replica=True):
+            self.assertEqual(self.router.db_for_read(Bus), "replica1")
+
+    def test_unsafe_request_reads_from_primary(self):
+        with routing_scope(use_replica=False):
+            self.assertEqual(self.router.db_for_read(Bus), "default")
+
+    def test_write_pins_rest_of_request_to_primary(self):
+        with routing_scope(use_replica=True):
+            self.assertEqual(self.router.db_for_write(Bus), "default")
+            self.assertEqual(self.router.db_for_read(Bus), "default")
+
+        with routing_scope(use_replica=True):
+            self.assertEqual(self.router.db_for_read(Bus), "replica1")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured_uses_primary(self):
+        with routing_scope(use_replica=True):
+            self.assertEqual(self.router.db_for_read(Bus), "default")
+
+    def test_migrations_never_run_on_replicas(self):
+        self.assertFalse(self.router.allow_migrate("replica1", "buses"))
+        self.assertIsNone(self.router.allow_migrate("default", "buses"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReadReplicaMiddlewareTests(SimpleTestCase):
+    def _route_read(self, method, view_class):
+        seen = {}
+
+        def get_response(request):
+            view = view_class.as_view()
+            middleware.process_view(request, view, (), {})
+            seen["db"] = ReadReplicaRouter().db_for_read(Bus)
+            return HttpResponse()
+
+        middleware = ReadReplicaMiddleware(get_response)
+        middleware(RequestFactory().generic(method, "/"))
+        return seen["db"]
+
+    def test_get_request_reads_from_replica(self):
+        self.assertEqual(self._route_read("GET", APIView), "replica1")
+
+    def test_post_request_reads_from_primary(self):
+        self.assertEqual(self._route_read("POST", APIView), "default")
+
+    def test_view_can_opt_out_of_replica_reads(self):
+        class PrimaryOnlyView(APIView):
+            use_read_replica = False
+
+        self.assertEqual(self._route_read("GET", PrimaryOnlyView), "default")
+
+
+class FastListSerializerTests(TestCase):
+    def setUp(self):
+        bus = Bus.objects.create(matricule="FL-01", capacity=40)
+        route = Route.objects.create(bus=bus, direction="Fast -> List")
+        trip = Trip.objects.create(route=route, depart_time=timezone.now())
+        Trip.objects.create(route=route, depart_time=timezone.now() + timedelta(hours=3))
+        Reservation.objects.create(trip=trip, passenger_name="Ali")
+        trip.start()
+
+    def _assert_identical(self, url, queryset, serializer_class):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(response.content, expected)
+
+    def test_bus_list_matches_model_serializer(self):
+        self._assert_identical("/api/v1/buses/", Bus.objects.all(), BusSerializer)
+
+    def test_route_list_matches_model_serializer(self):
+        self._assert_identical("/api/v1/routes/", Route.objects.all(), RouteSerializer)
+
+    def test_trip_list_matches_model_serializer(self):
+        self._assert_identical("/api/v1/trips/", Trip.objects.all(), TripSerializer)
+
+    def test_reservation_list_matches_model_serializer(self):
+        self._assert_identical(
+            "/api/v1/reservations/", Reservation.objects.all(), ReservationSerializer
+        )
+
+    def test_list_builds_no_model_instances(self):
+        with self.assertNumQueries(1):
+            self.client.get("/api/v1/trips/")
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_output_matches_stdlib_renderer(self):
+        data = {
+            "when": timezone.now(),
+            "price": Decimal("12.50"),
+            "name": "Zo\u00e9 \u2028 separator",
+            1: [None, True, 1.5],
+        }
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json"),
+            JSONRenderer().render(data, "application/json"),
+        )
+
+    def test_non_finite_floats_are_rejected_like_stdlib(self):
+        for value in (float("nan"), float("inf"), float("-inf")):
+            data = {"rows": [{"load": value}]}
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data, "application/json")
+            with self.assertRaisesMessage(ValueError, "Out of range float values"):
+                FastJSONRenderer().render(data, "application/json")
+
+    def test_indented_output_falls_back_to_stdlib(self):
+        data = {"id": 1}
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+
+@skipIf(msgpack is None, "msgpack is not installed")
+class MessagePackFormatTests(TestCase):
+    def test_list_can_be_rendered_as_msgpack(self):
+        Bus.objects.create(matricule="MP-01", capacity=30)
+        response = self.client.get("/api/v1/buses/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(
+            msgpack.unpackb(response.content),
+            [{"id": Bus.objects.get().id, "matricule": "MP-01", "capacity": 30, "version": 1}],
+        )
+
+    def test_create_accepts_msgpack_body(self):
+        response = self.client.post(
+            "/api/v1/buses/",
+            msgpack.packb({"matricule": "MP-02", "capacity": 12}),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Bus.objects.filter(matricule="MP-02").exists())
+
+    def test_malformed_msgpack_body_is_rejected(self):
+        response = self.client.post(
+            "/api/v1/buses/", b"\xc1", content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        bus = Bus.objects.create(matricule="SF-01", capacity=20)
+        self.route = Route.objects.create(bus=bus, direction="Sparse -> Fields")
+        self.trip = Trip.objects.create(route=self.route, depart_time=timezone.now())
+
+    def test_list_returns_only_requested_fields(self):
+        response = self.client.get("/api/v1/trips/", {"fields": "id,status"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"id": self.trip.id, "status": self.trip.status}])
+
+    def test_list_select_is_narrowed(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/v1/trips/", {"fields": "id,status"})
+        sql = queries[0]["sql"]
+        self.assertIn('"status"', sql)
+        self.assertNotIn('"depart_time"', sql)
+
+    def test_detail_select_is_narrowed(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/v1/routes/{self.route.id}/", {"fields": "direction"})
+        self.assertEqual(response.data, {"direction": "Sparse -> Fields"})
+        self.assertNotIn('"bus_id"', queries[0]["sql"])
+
+    def test_fields_combine_with_expand(self):
+        response = self.client.get(
+            f"/api/v1/trips/{self.trip.id}/", {"fields": "id,route", "expand": "route.bus"}
+        )
+        self.assertEqual(set(response.data), {"id", "route"})
+        self.assertEqual(response.data["route"]["bus"]["matricule"], "SF-01")
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/v1/buses/", {"fields": "id,colour"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post(
+            "/api/v1/buses/?fields=id", {"matricule": "SF-02", "capacity": 8}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["matricule"], "SF-02")
+
+    def test_expanded_reverse_relation_can_be_selected(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Lina")
+        response = self.client.get(
+            f"/api/v1/trips/{self.trip.id}/", {"fields": "id,reservations", "expand": "reservations"}
+        )
+        self.assertEqual(set(response.data), {"id", "reservations"})
+        self.assertEqual(response.data["reservations"][0]["passenger_name"], "Lina")
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Every /api/v1/ endpoint runs a fixed number of queries: the budget
+    holds with a handful of rows and with many (and, for batch writes, with
+    a handful of ids and with many), so an N+1 fails here with the
+    offending SQL listed. Only the seat streams are left out: they hold the
+    connection open and poll.
+    """
+
+    SMALL = 2
+    LARGE = 25
+
+    # (path, budget); paths are formatted with the ids of the first rows.
+    READ_BUDGETS = [
+        ("/api/v1/accounts/users/", 1),
+        ("/api/v1/accounts/users/{user}/", 1),
+        ("/api/v1/organization/", 1),
+        ("/api/v1/organization/{organization}/", 1),
+        ("/api/v1/buses/", 1),
+        ("/api/v1/buses/{bus}/", 1),
+        ("/api/v1/routes/", 1),
+        ("/api/v1/routes/?expand=bus", 1),
+        ("/api/v1/routes/{route}/", 1),
+        ("/api/v1/routes/{route}/stops/", 2),
+        ("/api/v1/trips/", 1),
+        ("/api/v1/trips/?expand=route.bus,reservations", 2),
+        ("/api/v1/trips/{trip}/", 1),
+        ("/api/v1/trips/{trip}/manifest/", 2),
+        ("/api/v1/trips/{trip}/seats/", 2),
+        ("/api/v1/trips/search/?origin=Place 0&destination=Place 1", 2),
+        # Places, then the cold index load: counter, connections, reservation map.
+        ("/api/v1/trips/itineraries/?origin=Place 0&destination=Place 2", 4),
+        ("/api/v1/trips/conflicts/", 2),
+        ("/api/v1/reservations/", 1),
+        ("/api/v1/reservations/?expand=trip.route", 1),
+        ("/api/v1/reservations/{reservation}/", 1),
+        ("/api/v1/reservations/search/?q=passenger", 1),
+        ("/api/v1/analytics/route-occupancy/", 1),
+        ("/api/v1/events/", 1),
+        ("/api/v1/sync/", 6),
+        ("/api/v1/archive/trips/", 1),
+        ("/api/v1/archive/trips/{archived_trip}/", 2),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        connection_index.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username="budget-admin", password="pw")
+        self.client.force_authenticate(self.admin)
+        self.start = timezone.now() + timedelta(hours=1)
+
+    def _grow(self, size):
+        existing = Bus.objects.count()
+        for index in range(existing, size):
+            organization = Organization.objects.create(name=f"Org {index}")
+            User.objects.create_user(
+                username=f"driver-{index}", password="pw", role="driver", organization=organization
+            )
+            bus = Bus.objects.create(matricule=f"QB-{index:03}", capacity=50)
+            route = Route.objects.create(
+                bus=bus,
+                direction=f"Place {index % 3} -> Place {(index + 1) % 3}",
+                duration=timedelta(hours=1),
+            )
+            RouteStop.objects.create(route=route, position=0, name=f"Stop {index}")
+            trip = Trip.objects.create(route=route, depart_time=self.start + timedelta(minutes=index))
+            for seat in range(2):
+                reservation = Reservation.objects.create(
+                    trip=trip, passenger_name=f"Passenger {index}-{seat}"
+                )
+                record_event("reservation.create", reservation, "budget")
+            archived = ArchivedTrip.objects.create(
+                id=100_000 + index,
+                route=route,
+                direction=route.direction,
+                depart_time=self.start - timedelta(days=100, minutes=index),
+                seat_capacity=50,
+                reservation_count=1,
+            )
+            ArchivedReservation.objects.create(
+                id=100_000 + index,
+                trip=archived,
+                passenger_name=f"Archived {index}",
+                created_at=archived.depart_time,
+            )
+        self.ids = {
+            "user": User.objects.order_by("id").values_list("id", flat=True)[0],
+            "organization": Organization.objects.order_by("id").values_list("id", flat=True)[0],
+            "bus": Bus.objects.order_by("id").values_list("id", flat=True)[0],
+            "route": Route.objects.order_by("id").values_list("id", flat=True)[0],
+            "trip": Trip.objects.order_by("id").values_list("id", flat=True)[0],
+            "reservation": Reservation.objects.order_by("id").values_list("id", flat=True)[0],
+            "archived_trip": ArchivedTrip.objects.order_by("id").values_list("id", flat=True)[0],
+        }
+
+    def test_read_endpoints_stay_within_budget_as_data_grows(self):
+        for size in (self.SMALL, self.LARGE):
+            self._grow(size)
+            for path, budget in self.READ_BUDGETS:
+                url = path.format(**self.ids)
+                with self.subTest(url=url, size=size):
+                    cache.clear()
+                    connection_index.clear()
+                    with self.assertMaxQueries(budget):
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _batch_fixtures(self, size):
+        """``size`` fresh ids per batch endpoint, so batch writes grow with the data."""
+        bus = Bus.objects.create(matricule=f"QB-T{size}", capacity=50)
+        route = Route.objects.create(bus=bus, direction=f"Batch {size} -> Depot", duration=timedelta(hours=1))
+        far = self.start + timedelta(days=60 + size)
+        return {
+            "buses": [Bus.objects.create(matricule=f"QB-F{size}-{i}", capacity=5).id for i in range(size)],
+            "routes": [
+                Route.objects.create(bus=bus, direction=f"Free {size}-{i} -> Depot").id for i in range(size)
+            ],
+            "trips": [
+                Trip.objects.create(route=route, depart_time=far - timedelta(days=30, hours=2 * i)).id
+                for i in range(size)
+            ],
+            "departures": [far + timedelta(hours=2 * i) for i in range(size)],
+            "timetable_route": route.id,
+        }
+
+    def _users_csv(self, size):
+        # Kept under PARALLEL_HASH_THRESHOLD: the process pool is not what is measured.
+        rows = "".join(f"import-{size}-{i},,secret-{i},passenger\n" for i in range(size // 2))
+        return SimpleUploadedFile("users.csv", f"username,email,password,role\n{rows}".encode())
+
+    def test_write_endpoints_stay_within_budget_as_data_grows(self):
+        for size in (self.SMALL, self.LARGE):
+            self._grow(size)
+            driver = User.objects.filter(role="driver").values_list("id", flat=True)[0]
+            # The newest grown trip: still CREATED and booked, so it can start.
+            running = Trip.objects.filter(route__bus__matricule__startswith="QB-0").order_by("-id")[0].id
+            batch = self._batch_fixtures(size)
+            grown_buses = Bus.objects.filter(matricule__startswith="QB-0").values_list("id", flat=True)
+            refresh = self.client.post(
+                "/api/v1/accounts/token/", {"username": "budget-admin", "password": "pw"}
+            ).data["refresh"]
+            writes = [
+                (
+                    "post",
+                    "/api/v1/reservations/",
+                    {"trip": self.ids["trip"], "passenger_name": f"Walk-in {size}"},
+                    16,
+                ),
+                (
+                    "post",
+                    "/api/v1/trips/",
+                    {"route": self.ids["route"], "depart_time": self.start + timedelta(days=size)},
+                    16,
+                ),
+                ("patch", f"/api/v1/trips/{self.ids['trip']}/", {"driver": driver}, 16),
+                ("post", f"/api/v1/trips/{running}/start/", {}, 11),
+                ("post", f"/api/v1/trips/{running}/end/", {}, 15),
+                (
+                    "post",
+                    "/api/v1/trips/timetable/",
+                    {"route": batch["timetable_route"], "departures": batch["departures"]},
+                    14,
+                ),
+                ("post", "/api/v1/trips/assign-drivers/", {"date": self.start.date()}, 13),
+                (
+                    "post",
+                    "/api/v1/buses/reassign/",
+                    {"capacities": [{"bus": bus, "capacity": 50 + size} for bus in grown_buses]},
+                    20,
+                ),
+                ("post", "/api/v1/trips/bulk-delete/", {"ids": batch["trips"]}, 16),
+                ("post", "/api/v1/routes/bulk-delete/", {"ids": batch["routes"]}, 14),
+                ("post", "/api/v1/buses/bulk-delete/", {"ids": batch["buses"]}, 12),
+                (
+                    "post",
+                    "/api/v1/accounts/token/",
+                    {"username": "budget-admin", "password": "pw"},
+                    1,
+                ),
+                ("post", "/api/v1/accounts/token/refresh/", {"refresh": refresh}, 1),
+            ]
+            for method, url, data, budget in writes:
+                with self.subTest(method=method, url=url, size=size):
+                    with self.assertMaxQueries(budget):
+                        response = getattr(self.client, method)(url, data, format="json")
+                    self.assertLess(response.status_code, 300, response.data)
+
+            with self.subTest(url="/api/v1/accounts/users/import/", size=size):
+                with self.assertMaxQueries(4):
+                    response = self.client.post(
+                        "/api/v1/accounts/users/import/", {"file": self._users_csv(size)}, format="multipart"
+                    )
+                self.assertLess(response.status_code, 300, response.data)
+
+    def test_model_str_does_not_load_relations(self):
+        self._grow(self.SMALL)
+        trip = Trip.objects.get(pk=self.ids["trip"])
+        reservation = Reservation.objects.get(pk=self.ids["reservation"])
+        with self.assertNumQueries(0):
+            str(trip)
+            str(reservation)
+
+
+class AuditLogIndexTests(SimpleTestCase):
+    LINES = [
+        "2026-10-18 09:00:00,000 INFO user=7 action=trip.create trip=123 route=4 transition=NONE->CREATED",
+        "2026-10-18 09:05:00,000 INFO user=9 action=reservation.create trip=123 reservation=55",
+        "2026-10-18 10:00:00,000 INFO user=7 action=bus.create bus=3",
+        "2026-10-19 08:00:00,000 INFO user=7 action=trip.start trip=123 transition=CREATED->STARTED",
+        "2026-10-19 08:30:00,000 INFO user=anonymous action=trip.create trip=1230 route=4",
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = os.path.join(directory.name, "audit.log")
+        self._write("\n".join(self.LINES) + "\n")
+
+    def _write(self, text, mode="w"):
+        with open(self.log_path, mode) as log:
+            log.write(text)
+
+    def _index(self):
+        index = AuditLogIndex(self.log_path)
+        self.addCleanup(index.close)
+        return index
+
+    def test_timeline_of_a_trip(self):
+        index = self._index()
+        self.assertEqual(index.update(), 5)
+        self.assertEqual(index.find(trip=123), [self.LINES[0], self.LINES[1], self.LINES[3]])
+
+    def test_actions_by_user_on_a_day(self):
+        index = self._index()
+        index.update()
+        found = index.find(user="7", since=datetime(2026, 10, 18), until=datetime(2026, 10, 19))
+        self.assertEqual(found, [self.LINES[0], self.LINES[2]])
+        self.assertEqual(index.find(action="trip.create", limit=1), [self.LINES[0]])
+
+    def test_updates_only_parse_appended_complete_lines(self):
+        index = self._index()
+        index.update()
+        appended = "2026-10-19 09:00:00,000 INFO user=7 action=trip.end trip=123"
+        self._write(appended, mode="a")
+        self.assertEqual(index.update(), 0)
+
+        self._write("\n", mode="a")
+        self.assertEqual(index.update(), 1)
+        self.assertEqual(index.find(trip=123)[-1], appended)
+
+    def test_rotated_log_is_reindexed(self):
+        index = self._index()
+        index.update()
+        self._write("2026-10-20 07:00:00,000 INFO user=2 action=trip.end trip=123\n")
+        self.assertEqual(index.update(), 1)
+        self.assertEqual(len(index.find(trip=123)), 1)
+
+    def test_command_prints_matching_lines(self):
+        out = StringIO()
+        call_command("audit_log", "--log", self.log_path, "--user", "7", "--date", "2026-10-19", stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [self.LINES[3]])
+
+
+class AdminChangelistTests(QueryBudgetMixin, TestCase):
+    CHANGELISTS = [
+        "/admin/reservations/reservation/",
+        "/admin/trips/trip/",
+        "/admin/routes/route/",
+        "/admin/events/outboxevent/",
+        "/admin/archive/archivedtrip/",
+    ]
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="changelist-admin", password="pw")
+        self.client.force_login(self.admin)
+        self.start = timezone.now() + timedelta(days=1)
+
+    def _grow(self, size):
+        for index in range(Bus.objects.count(), size):
+            bus = Bus.objects.create(matricule=f"AD-{index:03}", capacity=5)
+            route = Route.objects.create(bus=bus, direction=f"Admin {index} -> Elsewhere")
+            driver = User.objects.create_user(username=f"admin-driver-{index}", password="pw", role="driver")
+            trip = Trip.objects.create(
+                route=route, depart_time=self.start + timedelta(minutes=index), driver=driver
+            )
+            reservation = Reservation.objects.create(trip=trip, passenger_name=f"Rider {index}")
+            record_event("reservation.create", reservation, "admin")
+
+    def test_changelists_do_not_query_per_row(self):
+        counts = {}
+        for size in (2, 25):
+            self._grow(size)
+            for url in self.CHANGELISTS:
+                with self.subTest(url=url, size=size):
+                    with CaptureQueriesContext(connection) as context:
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    counts.setdefault(url, []).append(len(context))
+        for url, (small, large) in counts.items():
+            with self.subTest(url=url):
+                self.assertEqual(small, large)
+
+    def test_filters_do_not_scan_for_distinct_values(self):
+        self._grow(3)
+        for url in self.CHANGELISTS:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertFalse([q["sql"] for q in context.captured_queries if "DISTINCT" in q["sql"]])
+
+        response = self.client.get("/admin/events/outboxevent/", {"event_type": "reservation.create"})
+        self.assertEqual(response.context["cl"].result_count, 3)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_large_unfiltered_changelist_uses_estimated_count(self):
+        self._grow(3)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/admin/reservations/reservation/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([q["sql"] for q in context.captured_queries if "COUNT(" in q["sql"]])
+        self.assertEqual(response.context["cl"].result_count, Reservation.objects.order_by("-id")[0].id)
+
+        # Filters narrow the query, so the count is exact again.
+        day = timezone.localtime(self.start).replace(hour=0, minute=0, second=0, microsecond=0)
+        response = self.client.get(
+            "/admin/trips/trip/",
+            {"depart_time__gte": day.isoformat(), "depart_time__lt": (day + timedelta(days=2)).isoformat()},
+        )
+        self.assertEqual(response.context["cl"].result_count, 3)
+
+    def test_relations_use_raw_id_widgets(self):
+        self._grow(1)
+        reservation = Reservation.objects.get()
+        with self.assertMaxQueries(12):
+            response = self.client.get(f"/admin/reservations/reservation/{reservation.id}/change/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, f'name="trip" value="{reservation.trip_id}"')
+        for name in ("trip", "board_stop", "alight_stop"):
+            self.assertNotContains(response, f'<select name="{name}"')
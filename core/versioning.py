@@ -0,0 +1,75 @@
+from django.db import models
+from django.utils.cache import parse_etags
+from rest_framework.permissions import SAFE_METHODS
+
+from .exceptions import PreconditionFailed
+
+
+class VersionedModel(models.Model):
+    """
+    Optimistic concurrency: ``save()`` on an existing row runs
+    ``UPDATE ... WHERE id = %s AND version = %s`` and bumps ``version``, so a
+    write based on a stale copy raises PreconditionFailed instead of silently
+    overwriting. ``QuerySet.update()`` bypasses the check.
+    """
+
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = self.version
+        version_field = self._meta.get_field("version")
+        values = [entry for entry in values if entry[0] is not version_field]
+        values.append((version_field, None, expected + 1))
+
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update
+        )
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise PreconditionFailed()
+        if updated:
+            self.version = expected + 1
+        return updated
+
+
+def version_etag(version):
+    return f'"{version}"'
+
+
+class ConditionalWriteMixin:
+    """
+    Detail-view mixin for VersionedModel: responses carry the row version as
+    an ETag and unsafe requests with ``If-Match`` are refused with 412 when
+    it no longer matches. The model's compare-and-swap save covers the race
+    between this check and the write.
+    """
+
+    _versioned_object = None
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.request.method not in SAFE_METHODS:
+            self.check_if_match(obj)
+        self._versioned_object = obj
+        return obj
+
+    def check_if_match(self, obj):
+        header = self.request.headers.get("If-Match")
+        if header is None:
+            return
+        etags = parse_etags(header)
+        if "*" not in etags and version_etag(obj.version) not in etags:
+            raise PreconditionFailed()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        obj = self._versioned_object
+        if (
+            obj is not None
+            and response.status_code < 300
+            and request.method != "DELETE"
+            and "version" not in obj.get_deferred_fields()
+        ):
+            response["ETag"] = version_etag(obj.version)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,32 @@
+from django.contrib import admin
+
+from core.admin import LargeTableAdminMixin
+
+from .models import OutboxEvent
+
+
+class RecentEventTypeFilter(admin.SimpleListFilter):
+    """
+    Event types seen in the latest ``sample_size`` events, read through the
+    primary key index instead of a DISTINCT over the whole outbox. Older
+    types can still be filtered by URL (``?event_type=``).
+    """
+
+    title = "event type"
+    parameter_name = "event_type"
+    sample_size = 1000
+
+    def lookups(self, request, model_admin):
+        recent = OutboxEvent.objects.order_by("-id").values_list("event_type", flat=True)
+        return [(event_type, event_type) for event_type in sorted(set(recent[: self.sample_size]))]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(event_type=self.value())
+        return queryset
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "event_type", "aggregate_type", "aggregate_id", "actor", "created_at")
+    list_filter = (RecentEventTypeFilter,)
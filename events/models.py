@@ -0,0 +1,20 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class OutboxEvent(models.Model):
+    """
+    Domain event written in the same transaction as the change it describes.
+    The auto-increment ``id`` is the change-feed cursor.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=50)
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.PositiveIntegerField()
+    actor = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.id} {self.event_type} {self.aggregate_type}={self.aggregate_id}"
@@ -0,0 +1,31 @@
+from .models import OutboxEvent
+
+
+def record_event(event_type, instance, actor, payload=None, aggregate_id=None):
+    """
+    Append ``event_type`` for ``instance`` to the outbox. Call it inside the
+    transaction that performs the change so the event commits (or rolls back)
+    with it.
+    """
+    return OutboxEvent.objects.create(
+        event_type=event_type,
+        aggregate_type=instance._meta.model_name,
+        aggregate_id=instance.pk if aggregate_id is None else aggregate_id,
+        actor=str(actor),
+        payload=payload or {},
+    )
+
+
+def record_events(event_type, model, aggregate_ids, actor):
+    """Append one ``event_type`` event per id with a single bulk INSERT."""
+    return OutboxEvent.objects.bulk_create(
+        [
+            OutboxEvent(
+                event_type=event_type,
+                aggregate_type=model._meta.model_name,
+                aggregate_id=aggregate_id,
+                actor=str(actor),
+            )
+            for aggregate_id in aggregate_ids
+        ]
+    )
@@ -0,0 +1,17 @@
+from rest_framework import serializers
+
+from .models import OutboxEvent
+
+
+class OutboxEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OutboxEvent
+        fields = [
+            "id",
+            "event_type",
+            "aggregate_type",
+            "aggregate_id",
+            "actor",
+            "payload",
+            "created_at",
+        ]
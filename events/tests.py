@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from buses.models import Bus
+from events.models import OutboxEvent
+from routes.models import Route
+
+
+class OutboxWriteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.bus = Bus.objects.create(matricule="EV-01", capacity=3)
+        self.route = Route.objects.create(bus=self.bus, direction="A -> B")
+
+    def test_trip_lifecycle_is_recorded_in_order(self):
+        response = self.client.post(
+            "/api/v1/trips/",
+            {"route": self.route.id, "depart_time": timezone.now().isoformat()},
+            format="json",
+        )
+        trip_id = response.data["id"]
+        response = self.client.post(
+            "/api/v1/reservations/",
+            {"trip": trip_id, "passenger_name": "Ali"},
+            format="json",
+        )
+        self.client.post(f"/api/v1/trips/{trip_id}/start/")
+        self.client.post(f"/api/v1/trips/{trip_id}/end/")
+
+        events = list(OutboxEvent.objects.order_by("id").values_list("event_type", flat=True))
+        self.assertEqual(events, ["trip.create", "reservation.create", "trip.start", "trip.end"])
+        created = OutboxEvent.objects.get(event_type="trip.create")
+        self.assertEqual(created.aggregate_type, "trip")
+        self.assertEqual(created.aggregate_id, trip_id)
+        self.assertEqual(created.payload["route"], self.route.id)
+
+    def test_delete_records_event_with_old_id(self):
+        bus = Bus.objects.create(matricule="EV-02", capacity=3)
+        self.client.delete(f"/api/v1/buses/{bus.id}/")
+        event = OutboxEvent.objects.get(event_type="bus.delete")
+        self.assertEqual(event.aggregate_id, bus.id)
+
+    def test_failed_change_writes_no_event(self):
+        with mock.patch("buses.views.record_event", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(
+                    "/api/v1/buses/", {"matricule": "EV-03", "capacity": 5}, format="json"
+                )
+        self.assertFalse(Bus.objects.filter(matricule="EV-03").exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class EventFeedApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            username="feedadmin", email="feed@admin.com", password="feedpass"
+        )
+        self.client.force_authenticate(user=self.admin)
+        bus = Bus.objects.create(matricule="EV-10", capacity=3)
+        for index in range(5):
+            OutboxEvent.objects.create(
+                event_type="bus.update",
+                aggregate_type="bus",
+                aggregate_id=bus.id,
+                actor="1",
+                payload={"n": index},
+            )
+        self.ids = list(OutboxEvent.objects.order_by("id").values_list("id", flat=True))
+
+    def test_pages_through_feed_with_cursor(self):
+        response = self.client.get("/api/v1/events/", {"limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e["id"] for e in response.data["results"]], self.ids[:2])
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(
+            "/api/v1/events/", {"after": response.data["next_cursor"], "limit": 10}
+        )
+        self.assertEqual([e["id"] for e in response.data["results"]], self.ids[2:])
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual(response.data["results"][0]["payload"], {"n": 2})
+
+    def test_empty_page_keeps_cursor(self):
+        response = self.client.get("/api/v1/events/", {"after": self.ids[-1]})
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(response.data["next_cursor"], self.ids[-1])
+
+    def test_rejects_invalid_cursor(self):
+        response = self.client.get("/api/v1/events/", {"after": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get("/api/v1/events/")
+        self.assertIn(
+            response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN]
+        )
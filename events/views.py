@@ -0,0 +1,53 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.permissions import IsSuperAdminorOrgAdmin
+from core.fast_serializers import ValuesSerializer
+
+from .models import OutboxEvent
+from .serializers import OutboxEventSerializer
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+def _int_param(request, name, default, minimum):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({name: "Expected an integer."})
+    if value < minimum:
+        raise ValidationError({name: f"Must be at least {minimum}."})
+    return value
+
+
+class EventFeedView(APIView):
+    """
+    Change feed over the outbox: ``?after=<cursor>`` returns the next events
+    in id order using a keyset (``id > cursor``) scan of the primary key.
+    Consumers store ``next_cursor`` and pass it back on the next call.
+    """
+
+    permission_classes = [IsSuperAdminorOrgAdmin]
+    event_serializer = ValuesSerializer(OutboxEventSerializer)
+
+    def get(self, request):
+        after = _int_param(request, "after", default=0, minimum=0)
+        limit = min(_int_param(request, "limit", default=DEFAULT_PAGE_SIZE, minimum=1), MAX_PAGE_SIZE)
+
+        queryset = OutboxEvent.objects.filter(id__gt=after).order_by("id")[: limit + 1]
+        results = self.event_serializer.serialize(queryset)
+        has_more = len(results) > limit
+        results = results[:limit]
+
+        return Response(
+            {
+                "results": results,
+                "next_cursor": results[-1]["id"] if results else after,
+                "has_more": has_more,
+            }
+        )
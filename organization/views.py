@@ -3,10 +3,11 @@ from rest_framework.permissions import IsAuthenticated
 from organization.models import Organization
 from organization.serializer import OrganizationSerializer
 from accounts.permissions import IsSuperAdminorOrgAdmin
+from core.sparse_fields import SparseFieldsMixin
 
 # Create your views here.
 
-class OrganizationViewSet(ModelViewSet):
+class OrganizationViewSet(SparseFieldsMixin, ModelViewSet):
     serializer_class = OrganizationSerializer
     permission_classes = [IsAuthenticated]
 
@@ -1,9 +1,24 @@
 from django.contrib import admin
 
+from core.admin import LargeTableAdminMixin
+
 from .models import Reservation
+from .search import search_passengers
 
 
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "passenger_name", "trip", "created_at")
+    list_select_related = ("trip",)
+    raw_id_fields = ("trip", "board_stop", "alight_stop")
+    list_filter = ("created_at",)
     search_fields = ("passenger_name",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Same FTS index as the API search instead of an icontains scan.
+        if not search_term.strip():
+            return queryset, False
+        results = search_passengers(queryset, search_term)
+        if not results.exists():
+            results = search_passengers(queryset, search_term, fuzzy=True)
+        return results, False
@@ -0,0 +1,62 @@
+from django.db import migrations
+
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE reservations_passenger_fts USING fts5(
+        passenger_name,
+        content='reservations_reservation',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER reservations_passenger_fts_ai AFTER INSERT ON reservations_reservation BEGIN
+        INSERT INTO reservations_passenger_fts(rowid, passenger_name)
+        VALUES (new.id, new.passenger_name);
+    END
+    """,
+    """
+    CREATE TRIGGER reservations_passenger_fts_ad AFTER DELETE ON reservations_reservation BEGIN
+        INSERT INTO reservations_passenger_fts(reservations_passenger_fts, rowid, passenger_name)
+        VALUES ('delete', old.id, old.passenger_name);
+    END
+    """,
+    """
+    CREATE TRIGGER reservations_passenger_fts_au AFTER UPDATE OF passenger_name ON reservations_reservation BEGIN
+        INSERT INTO reservations_passenger_fts(reservations_passenger_fts, rowid, passenger_name)
+        VALUES ('delete', old.id, old.passenger_name);
+        INSERT INTO reservations_passenger_fts(rowid, passenger_name)
+        VALUES (new.id, new.passenger_name);
+    END
+    """,
+    "INSERT INTO reservations_passenger_fts(reservations_passenger_fts) VALUES ('rebuild')",
+]
+
+REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS reservations_passenger_fts_au",
+    "DROP TRIGGER IF EXISTS reservations_passenger_fts_ad",
+    "DROP TRIGGER IF EXISTS reservations_passenger_fts_ai",
+    "DROP TABLE IF EXISTS reservations_passenger_fts",
+]
+
+
+def _run(statements):
+    def run(_apps, schema_editor):
+        # FTS5 is SQLite only; reservations.search falls back to icontains elsewhere.
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservations", "0002_import_legacy_transport_data"),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:53
+
+from django.db import migrations, models
+
+# SQLite adds this column by rebuilding reservations_reservation, which drops
+# the FTS triggers from 0003. Any later migration that rebuilds the table
+# needs the same step.
+RESTORE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS reservations_passenger_fts_ai AFTER INSERT ON reservations_reservation BEGIN
+        INSERT INTO reservations_passenger_fts(rowid, passenger_name)
+        VALUES (new.id, new.passenger_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reservations_passenger_fts_ad AFTER DELETE ON reservations_reservation BEGIN
+        INSERT INTO reservations_passenger_fts(reservations_passenger_fts, rowid, passenger_name)
+        VALUES ('delete', old.id, old.passenger_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reservations_passenger_fts_au AFTER UPDATE OF passenger_name ON reservations_reservation BEGIN
+        INSERT INTO reservations_passenger_fts(reservations_passenger_fts, rowid, passenger_name)
+        VALUES ('delete', old.id, old.passenger_name);
+        INSERT INTO reservations_passenger_fts(rowid, passenger_name)
+        VALUES (new.id, new.passenger_name);
+    END
+    """,
+]
+
+
+def restore_fts_triggers(_apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in RESTORE_FTS_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0003_passenger_name_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(restore_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0003_routestop_routestop_unique_route_stop_position'),
+        ('reservations', '0004_reservation_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='alight_stop',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='alightings', to='routes.routestop'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='board_stop',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='boardings', to='routes.routestop'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_reservation_alight_stop_reservation_board_stop'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['created_at'], name='reservation_created'),
+        ),
+    ]
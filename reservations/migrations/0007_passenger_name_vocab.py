@@ -0,0 +1,32 @@
+from django.db import migrations
+
+FORWARD_SQL = [
+    # Read-only view of the terms in reservations_passenger_fts; it has no
+    # storage of its own, so the 0003 triggers keep it current.
+    "CREATE VIRTUAL TABLE reservations_passenger_vocab USING fts5vocab(reservations_passenger_fts, row)",
+]
+
+REVERSE_SQL = [
+    "DROP TABLE IF EXISTS reservations_passenger_vocab",
+]
+
+
+def _run(statements):
+    def run(_apps, schema_editor):
+        # FTS5 is SQLite only; reservations.search falls back to icontains elsewhere.
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reservations", "0006_reservation_created_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
@@ -1,12 +1,67 @@
-from django.db import models
+from django.db import models, transaction
 
+from routes.models import RouteStop
+from sync.models import SyncedModel, SyncedQuerySet
+from trips.inventory import book, release
 from trips.models import Trip
 
 
-class Reservation(models.Model):
+class ReservationQuerySet(SyncedQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # Seats are booked in Reservation.save, which bulk_create skips along
+        # with the occupancy, live and manifest receivers. ValueError as
+        # Django raises for models it cannot bulk create.
+        raise ValueError(
+            "Reservation.objects.bulk_create would bypass the seat inventory; "
+            "create reservations with save()."
+        )
+
+
+class Reservation(SyncedModel):
     trip = models.ForeignKey(Trip, on_delete=models.PROTECT, related_name="reservations")
     passenger_name = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Both null: the passenger rides the whole route.
+    board_stop = models.ForeignKey(
+        RouteStop, on_delete=models.PROTECT, null=True, blank=True, related_name="boardings"
+    )
+    alight_stop = models.ForeignKey(
+        RouteStop, on_delete=models.PROTECT, null=True, blank=True, related_name="alightings"
+    )
+
+    objects = ReservationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Admin date filter: created_at ranges.
+            models.Index(fields=["created_at"], name="reservation_created"),
+        ]
+
+    def segment_span(self):
+        if self.board_stop_id is None:
+            return None, None
+        return self.board_stop.position, self.alight_stop.position
+
+    def save(self, *args, **kwargs):
+        # The seat is taken in the trip's segment inventory in the same
+        # transaction as the insert; CapacityError leaves nothing behind.
+        with transaction.atomic(using=kwargs.get("using") or self._state.db or "default"):
+            if self._state.adding:
+                book(self.trip, *self.segment_span())
+            else:
+                previous = (
+                    Reservation.objects.select_related("trip__route__bus", "board_stop", "alight_stop")
+                    .filter(pk=self.pk)
+                    .first()
+                )
+                if previous is not None and (
+                    previous.trip_id,
+                    previous.board_stop_id,
+                    previous.alight_stop_id,
+                ) != (self.trip_id, self.board_stop_id, self.alight_stop_id):
+                    release(previous.trip, *previous.segment_span())
+                    book(self.trip, *self.segment_span())
+            super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.passenger_name} -> Trip {self.trip.id}"
+        return f"{self.passenger_name} -> Trip {self.trip_id}"
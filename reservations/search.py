@@ -0,0 +1,150 @@
+"""
+Passenger name search over the ``reservations_passenger_fts`` FTS5 index.
+
+The index is an external-content table over ``reservations_reservation``
+kept current by triggers (see migrations 0003/0004), so bulk inserts and queryset
+deletes are covered as well as ``save()``/``delete()``. Other database
+backends fall back to ``icontains``.
+
+Matching is by word prefix with case and diacritics folded. Misspellings are
+handled by a separate ``fuzzy`` pass that callers run only when the prefix
+search found nothing: each query word is widened to the indexed words within
+a small edit distance, looked up through the ``reservations_passenger_vocab``
+view of the index's term list (migration 0007).
+"""
+
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "reservations_passenger_fts"
+VOCAB_TABLE = "reservations_passenger_vocab"
+
+# Words shorter than this are too ambiguous to correct and stay prefix-only.
+FUZZY_MIN_LENGTH = 4
+# Most indexed words a misspelt query word is widened to.
+FUZZY_MAX_CANDIDATES = 20
+
+_TOKEN = re.compile(r"\w+")
+
+
+def fts_available(using="default"):
+    return connections[using].vendor == "sqlite"
+
+
+def _tokens(term):
+    return _TOKEN.findall(unicodedata.normalize("NFKC", term))
+
+
+def fold(word):
+    """Case and diacritic folding matching the index's unicode61 tokenizer."""
+    decomposed = unicodedata.normalize("NFKD", word)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance (insertions, deletions, substitutions
+    and adjacent transpositions), or ``limit + 1`` once it is known to exceed
+    ``limit``.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _allowed_edits(word):
+    return 1 if len(word) < 8 else 2
+
+
+def _prefix_distance(word, term, limit):
+    # The query word may itself be a prefix ("benpi" for "benoit"), so compare
+    # it against the term's prefixes of about the same length.
+    return min(
+        edit_distance(word, term[:length], limit)
+        for length in range(max(len(word) - limit, 1), len(word) + limit + 1)
+    )
+
+
+def build_match_query(term):
+    """
+    Turn free text into an FTS5 query: every word must match the start of a
+    word in the name. The index folds case and diacritics, so "beno" finds
+    "Benoît".
+    """
+    return " ".join(f'"{token}"*' for token in _tokens(term))
+
+
+def build_fuzzy_match_query(term, using="default"):
+    """
+    Like ``build_match_query`` but each word of four or more letters also
+    matches indexed words within one edit (two from eight letters), so
+    "Hadad" finds "Haddad". Reads the whole term list once; returns "" when
+    no word has a close term, as the query could then only repeat the
+    prefix search.
+    """
+    words = [fold(token) for token in _tokens(term)]
+    fuzzy = [word for word in words if len(word) >= FUZZY_MIN_LENGTH]
+    if not fuzzy:
+        return ""
+    shortest = min(len(word) - _allowed_edits(word) for word in fuzzy)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"SELECT term FROM {VOCAB_TABLE} WHERE length(term) >= %s", [shortest])
+        terms = [row[0] for row in cursor.fetchall()]
+
+    clauses = []
+    widened = False
+    for word in words:
+        candidates = []
+        if len(word) >= FUZZY_MIN_LENGTH:
+            limit = _allowed_edits(word)
+            scored = []
+            for candidate in terms:
+                if candidate.startswith(word):
+                    continue
+                distance = _prefix_distance(word, candidate, limit)
+                if distance <= limit:
+                    scored.append((distance, candidate))
+            candidates = [candidate for _, candidate in sorted(scored)[:FUZZY_MAX_CANDIDATES]]
+        widened = widened or bool(candidates)
+        clauses.append(" OR ".join([f'"{word}"*'] + [f'"{candidate}"' for candidate in candidates]))
+    if not widened:
+        return ""
+    return " AND ".join(f"({clause})" for clause in clauses)
+
+
+def search_passengers(queryset, term, fuzzy=False):
+    """
+    Filter ``queryset`` to names matching ``term``. ``fuzzy=True`` runs the
+    misspelling-tolerant pass instead; it is meant as a fallback when the
+    plain search is empty and matches nothing on non-SQLite backends.
+    """
+    if not fts_available(queryset.db):
+        if fuzzy:
+            return queryset.none()
+        tokens = _TOKEN.findall(term)
+        if not tokens:
+            return queryset.none()
+        for token in tokens:
+            queryset = queryset.filter(passenger_name__icontains=token)
+        return queryset
+    match = build_fuzzy_match_query(term, queryset.db) if fuzzy else build_match_query(term)
+    if not match:
+        return queryset.none()
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    )
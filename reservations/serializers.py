@@ -1,9 +1,29 @@
 from rest_framework import serializers
 
+from core.expansion import ExpandableSerializerMixin
+
 from .models import Reservation
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class ReservationSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "trip": ("trips.serializers.TripSerializer", False),
+    }
+
     class Meta:
         model = Reservation
-        fields = "__all__"
+        fields = ["id", "trip", "passenger_name", "created_at", "board_stop", "alight_stop"]
+
+    def validate(self, attrs):
+        trip = attrs.get("trip", getattr(self.instance, "trip", None))
+        board = attrs.get("board_stop", getattr(self.instance, "board_stop", None))
+        alight = attrs.get("alight_stop", getattr(self.instance, "alight_stop", None))
+
+        if (board is None) != (alight is None):
+            raise serializers.ValidationError("Give both board_stop and alight_stop, or neither.")
+        if board is not None:
+            if board.route_id != trip.route_id or alight.route_id != trip.route_id:
+                raise serializers.ValidationError("Stops must belong to the trip's route.")
+            if board.position >= alight.position:
+                raise serializers.ValidationError("alight_stop must come after board_stop.")
+        return attrs
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from trips.live import publish_trip_update
+from trips.inventory import release
+from trips.manifest import invalidate_manifest
+
+from .models import Reservation
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_manifest(instance.trip_id)
+    if created:
+        publish_trip_update(instance.trip)
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    release(instance.trip, *instance.segment_span())
+    invalidate_manifest(instance.trip_id)
+    publish_trip_update(instance.trip)
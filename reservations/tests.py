@@ -1,4 +1,7 @@
-from django.test import TestCase
+from datetime import timedelta
+
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -111,3 +114,73 @@ class ReservationApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Reservation.objects.filter(id=reservation.id).exists())
 
+
+
+class PassengerSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        bus = Bus.objects.create(matricule="PS-01", capacity=10)
+        route = Route.objects.create(bus=bus, direction="Search -> Index")
+        self.trip = Trip.objects.create(route=route, depart_time=timezone.now())
+        self.other_trip = Trip.objects.create(route=route, depart_time=timezone.now() + timedelta(hours=3))
+        self.amine = Reservation.objects.create(trip=self.trip, passenger_name="Amine Benoît")
+        self.amina = Reservation.objects.create(trip=self.other_trip, passenger_name="Amina Haddad")
+        Reservation.objects.create(trip=self.trip, passenger_name="Sara Lamine")
+        Reservation.objects.create(trip=self.trip, passenger_name="Amir Lamine")
+
+    def _search(self, **params):
+        response = self.client.get("/api/v1/reservations/search/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in response.data]
+
+    def test_prefix_matches_start_of_any_word(self):
+        # "Lamine" contains "amin" but no word starts with it.
+        self.assertEqual(set(self._search(q="amin")), {self.amine.id, self.amina.id})
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self._search(q="ami ben"), [self.amine.id])
+
+    def test_case_and_diacritics_are_folded(self):
+        self.assertEqual(self._search(q="BENOIT"), [self.amine.id])
+
+    def test_misspellings_fall_back_to_close_words(self):
+        self.assertEqual(self._search(q="Hadad"), [self.amina.id])
+        self.assertEqual(self._search(q="amine benpit"), [self.amine.id])
+        # Transposed letters count as one edit; the prefix still has to match.
+        self.assertEqual(len(self._search(q="sara lmaine")), 1)
+
+    def test_fuzzy_pass_only_runs_when_prefix_search_is_empty(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(set(self._search(q="amin")), {self.amine.id, self.amina.id})
+        # Too short to correct, and too far from any indexed word.
+        self.assertEqual(self._search(q="amx"), [])
+        self.assertEqual(self._search(q="zzzzzz"), [])
+
+    def test_filters_by_trip(self):
+        self.assertEqual(self._search(q="amina", trip=self.other_trip.id), [self.amina.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        Reservation.objects.filter(id=self.amina.id).update(passenger_name="Nadia Haddad")
+        self.assertEqual(self._search(q="nadia"), [self.amina.id])
+        Reservation.objects.filter(id=self.amina.id).delete()
+        self.assertEqual(self._search(q="haddad"), [])
+
+    def test_limit_caps_results(self):
+        self.assertEqual(len(self._search(q="amin", limit=1)), 1)
+
+    def test_requires_query(self):
+        response = self.client.get("/api/v1/reservations/search/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", response.data)
+
+    def test_admin_search_uses_index(self):
+        model_admin = site._registry[Reservation]
+        queryset, may_have_duplicates = model_admin.get_search_results(
+            RequestFactory().get("/"), Reservation.objects.all(), "haddad"
+        )
+        self.assertFalse(may_have_duplicates)
+        self.assertEqual(list(queryset), [self.amina])
+        queryset, _ = model_admin.get_search_results(
+            RequestFactory().get("/"), Reservation.objects.all(), "hadda"
+        )
+        self.assertEqual(list(queryset), [self.amina])
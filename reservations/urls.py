@@ -1,9 +1,10 @@
 from django.urls import path
 
-from .views import ReservationDetailView, ReservationListCreateView
+from .views import ReservationDetailView, ReservationListCreateView, ReservationSearchView
 
 
 urlpatterns = [
     path("reservations/", ReservationListCreateView.as_view()),
+    path("reservations/search/", ReservationSearchView.as_view()),
     path("reservations/<int:pk>/", ReservationDetailView.as_view()),
 ]
@@ -1,11 +1,19 @@
 import logging
 
-from rest_framework.generics import ListCreateAPIView, RetrieveDestroyAPIView
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveDestroyAPIView
 
-from core.exceptions import CapacityError, LifecycleError
+from core.exceptions import LifecycleError
+from core.expansion import ExpandMixin
+from core.fast_serializers import ValuesSerializer
+from core.mixins import FastListMixin
+from core.sparse_fields import SparseFieldsMixin
+from events.outbox import record_event
 from trips.models import Trip
 
 from .models import Reservation
+from .search import search_passengers
 from .serializers import ReservationSerializer
 
 audit_logger = logging.getLogger("audit")
@@ -18,9 +26,10 @@ def _audit_user(request):
     return "anonymous"
 
 
-class ReservationListCreateView(ListCreateAPIView):
+class ReservationListCreateView(SparseFieldsMixin, ExpandMixin, FastListMixin, ListCreateAPIView):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
+    fast_serializer = ValuesSerializer(ReservationSerializer)
 
     def perform_create(self, serializer):
         trip = serializer.validated_data["trip"]
@@ -28,10 +37,13 @@ class ReservationListCreateView(ListCreateAPIView):
         if trip.status != Trip.STATUS_CREATED:
             raise LifecycleError("Cannot reserve this non-CREATED trip")
 
-        if trip.seats_left() <= 0:
-            raise CapacityError("No seats available")
-
-        reservation = serializer.save()
+        with transaction.atomic():
+            # Reservation.save books the seat in the trip's segment inventory
+            # and raises CapacityError when any segment on the way is full.
+            reservation = serializer.save()
+            record_event(
+                "reservation.create", reservation, _audit_user(self.request), serializer.data
+            )
         audit_logger.info(
             "user=%s action=reservation.create trip=%s reservation=%s",
             _audit_user(self.request),
@@ -40,17 +52,71 @@ class ReservationListCreateView(ListCreateAPIView):
         )
 
 
-class ReservationDetailView(RetrieveDestroyAPIView):
+class ReservationDetailView(SparseFieldsMixin, ExpandMixin, RetrieveDestroyAPIView):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
 
     def perform_destroy(self, instance):
         reservation_id = instance.id
         trip_id = instance.trip_id
-        super().perform_destroy(instance)
+        with transaction.atomic():
+            super().perform_destroy(instance)
+            record_event(
+                "reservation.delete",
+                instance,
+                _audit_user(self.request),
+                {"trip": trip_id},
+                aggregate_id=reservation_id,
+            )
         audit_logger.info(
             "user=%s action=reservation.delete trip=%s reservation=%s",
             _audit_user(self.request),
             trip_id,
             reservation_id,
         )
+
+
+class ReservationSearchView(SparseFieldsMixin, FastListMixin, ListAPIView):
+    """
+    ``?q=`` passenger name search through the FTS index: every word in ``q``
+    must prefix-match a word of the name. If that finds nothing the search is
+    repeated with misspellings tolerated (see reservations.search). Optional
+    ``trip`` filter and ``limit`` (default 50, max 200); newest reservations
+    first.
+    """
+
+    serializer_class = ReservationSerializer
+    fast_serializer = ValuesSerializer(ReservationSerializer)
+    default_limit = 50
+    max_limit = 200
+    fuzzy = False
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if response.data or self.fuzzy:
+            return response
+        self.fuzzy = True
+        return super().list(request, *args, **kwargs)
+
+    def get_limit(self):
+        value = self.request.query_params.get("limit")
+        if value is None:
+            return self.default_limit
+        if not value.isdigit() or int(value) == 0:
+            raise ValidationError({"limit": "Expected a positive integer."})
+        return min(int(value), self.max_limit)
+
+    def get_queryset(self):
+        term = self.request.query_params.get("q", "").strip()
+        if not term:
+            raise ValidationError({"q": "Enter a passenger name to search for."})
+
+        queryset = search_passengers(Reservation.objects.all(), term, fuzzy=self.fuzzy)
+
+        trip = self.request.query_params.get("trip")
+        if trip is not None:
+            if not trip.isdigit():
+                raise ValidationError({"trip": "Expected a trip id."})
+            queryset = queryset.filter(trip_id=trip)
+
+        return queryset.order_by("-created_at", "-id")[: self.get_limit()]
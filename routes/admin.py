@@ -1,10 +1,19 @@
 from django.contrib import admin
 
-from .models import Route
+from core.admin import LargeTableAdminMixin
+
+from .models import Route, RouteStop
+
+
+class RouteStopInline(admin.TabularInline):
+    model = RouteStop
+    extra = 0
 
 
 @admin.register(Route)
-class RouteAdmin(admin.ModelAdmin):
+class RouteAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    inlines = [RouteStopInline]
     list_display = ("id", "direction", "bus")
     list_select_related = ("bus",)
+    raw_id_fields = ("bus",)
     search_fields = ("direction", "bus__matricule")
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0002_route_change_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteStop',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('name', models.CharField(max_length=100)),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stops', to='routes.route')),
+            ],
+            options={
+                'ordering': ['route', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='routestop',
+            constraint=models.UniqueConstraint(fields=('route', 'position'), name='unique_route_stop_position'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:07
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of routes.places as of this migration, so later changes to
+# the parser cannot change what this backfill produced.
+_SEPARATOR = re.compile(r"\s*(?:->|=>|→|—|–)\s*|\s+-\s+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_place(name):
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _SPACES.sub(" ", stripped).strip().casefold()
+
+
+def parse_direction(direction):
+    parts = [part.strip() for part in _SEPARATOR.split(direction or "")]
+    if len(parts) < 2 or not parts[0] or not parts[-1]:
+        return None, None
+    return parts[0], parts[-1]
+
+
+def backfill_places(apps, schema_editor):
+    Place = apps.get_model('routes', 'Place')
+    Route = apps.get_model('routes', 'Route')
+    places = {}
+
+    def resolve(name):
+        key = normalize_place(name)
+        if key not in places:
+            places[key], _ = Place.objects.get_or_create(normalized_name=key, defaults={'name': name})
+        return places[key]
+
+    routes = []
+    for route in Route.objects.only('id', 'direction').iterator():
+        origin, destination = parse_direction(route.direction)
+        if origin:
+            route.origin, route.destination = resolve(origin), resolve(destination)
+            routes.append(route)
+    Route.objects.bulk_update(routes, ['origin', 'destination'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0003_routestop_routestop_unique_route_stop_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized_name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='destination',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='arriving_routes', to='routes.place'),
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='origin',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='departing_routes', to='routes.place'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['origin', 'destination'], name='route_origin_destination'),
+        ),
+        migrations.RunPython(backfill_places, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0004_place_route_origin_destination'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='duration',
+            field=models.DurationField(blank=True, null=True),
+        ),
+    ]
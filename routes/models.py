@@ -1,11 +1,116 @@
 from django.db import models
 
 from buses.models import Bus
+from sync.models import SyncedModel, SyncedQuerySet
 
+from .places import normalize_place, parse_direction
 
-class Route(models.Model):
+
+class Place(models.Model):
+    name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def resolve(cls, name):
+        place, _created = cls.objects.get_or_create(
+            normalized_name=normalize_place(name), defaults={"name": name}
+        )
+        return place
+
+
+class RouteQuerySet(SyncedQuerySet):
+    def update(self, **kwargs):
+        # origin/destination are derived from direction; keep them in step.
+        if "direction" in kwargs:
+            direction = kwargs["direction"]
+            if not isinstance(direction, str):
+                raise ValueError(
+                    "Route direction can only be updated to a plain string, from which "
+                    "origin and destination are parsed; save() each route instead."
+                )
+            kwargs["origin"], kwargs["destination"] = Route.resolve_places(direction)
+        return super().update(**kwargs)
+
+    update.alters_data = True
+
+
+class Route(SyncedModel):
     bus = models.ForeignKey(Bus, on_delete=models.PROTECT, related_name="routes")
     direction = models.CharField(max_length=100)
+    # Scheduled time from departure to arrival; routes without one are left
+    # out of itinerary search.
+    duration = models.DurationField(null=True, blank=True)
+    # Parsed from ``direction`` on save; the (origin, destination) index
+    # serves trip search.
+    origin = models.ForeignKey(
+        Place,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+        related_name="departing_routes",
+    )
+    destination = models.ForeignKey(
+        Place,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="arriving_routes",
+    )
+
+    objects = RouteQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["origin", "destination"], name="route_origin_destination"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        route = super().from_db(db, field_names, values)
+        # Deferred when loaded with only()/defer(); save() then re-resolves.
+        route._saved_direction = route.__dict__.get("direction")
+        return route
+
+    @staticmethod
+    def resolve_places(direction):
+        """``(origin, destination)`` Place rows for ``direction``, or ``(None, None)``."""
+        origin, destination = parse_direction(direction)
+        if not origin:
+            return None, None
+        return Place.resolve(origin), Place.resolve(destination)
+
+    def save(self, *args, **kwargs):
+        # Places are only looked up when direction changed since loading.
+        if self._state.adding or self.direction != getattr(self, "_saved_direction", None):
+            self.origin, self.destination = self.resolve_places(self.direction)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "direction" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "origin", "destination"}
+        super().save(*args, **kwargs)
+        self._saved_direction = self.direction
 
     def __str__(self):
         return f"Route {self.id} - {self.direction}"
+
+
+class RouteStop(models.Model):
+    """One stop of a route; ``position`` orders stops from 0. Segment k runs from stop k to k + 1."""
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="stops")
+    position = models.PositiveSmallIntegerField()
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ["route", "position"]
+        constraints = [
+            models.UniqueConstraint(fields=["route", "position"], name="unique_route_stop_position"),
+        ]
+
+    def __str__(self):
+        return f"{self.route_id}#{self.position} {self.name}"
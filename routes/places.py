@@ -0,0 +1,29 @@
+"""
+Origin/destination parsing for ``Route.direction`` ("Alpha -> Beta").
+
+Place names are matched on a normalized form (case, accents and spacing
+folded) so "Saint-Étienne", "saint-etienne" and "SAINT-ETIENNE " resolve to
+the same Place row through its unique index.
+"""
+
+import re
+import unicodedata
+
+# "->", "=>", "→", "—", "–" or a hyphen with spaces around it; a bare hyphen
+# is part of names like "Aix-en-Provence".
+_SEPARATOR = re.compile(r"\s*(?:->|=>|→|—|–)\s*|\s+-\s+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_place(name):
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _SPACES.sub(" ", stripped).strip().casefold()
+
+
+def parse_direction(direction):
+    """``(origin, destination)`` display names, or ``(None, None)`` if unparseable."""
+    parts = [part.strip() for part in _SEPARATOR.split(direction or "")]
+    if len(parts) < 2 or not parts[0] or not parts[-1]:
+        return None, None
+    return parts[0], parts[-1]
@@ -1,9 +1,33 @@
 from rest_framework import serializers
 
-from .models import Route
+from core.expansion import ExpandableSerializerMixin
 
+from .models import Route, RouteStop
+
+
+class RouteSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "bus": ("buses.serializers.BusSerializer", False),
+        "trips": ("trips.serializers.TripSerializer", True),
+    }
 
-class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
-        fields = "__all__"
+        fields = ["id", "bus", "direction", "duration", "origin", "destination"]
+
+
+class RouteStopSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RouteStop
+        fields = ["id", "position", "name"]
+
+
+class RouteStopsUpdateSerializer(serializers.Serializer):
+    stops = serializers.ListField(
+        child=serializers.CharField(max_length=100), allow_empty=True, max_length=200
+    )
+
+    def validate_stops(self, value):
+        if len(value) == 1:
+            raise serializers.ValidationError("A route needs at least two stops, or none.")
+        return value
@@ -1,9 +1,15 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models.functions import Upper
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from buses.models import Bus
-from routes.models import Route
+from routes.models import Place, Route
+from routes.places import normalize_place, parse_direction
 from trips.models import Trip
 from django.utils import timezone
 
@@ -86,3 +92,82 @@ class RouteApiTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
         self.assertEqual(response.data["code"], "protected_delete")
 
+
+class RouteBulkDeleteApiTests(TestCase):
+    def test_skips_routes_with_trips(self):
+        bus = Bus.objects.create(matricule="RD-01", capacity=10)
+        free = Route.objects.create(bus=bus, direction="Free")
+        busy = Route.objects.create(bus=bus, direction="Busy")
+        Trip.objects.create(route=busy, depart_time=timezone.now())
+
+        response = APIClient().post(
+            "/api/v1/routes/bulk-delete/", {"ids": [free.id, busy.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted"], [free.id])
+        self.assertEqual(response.data["blocked"][0]["id"], busy.id)
+        self.assertEqual(list(Route.objects.values_list("id", flat=True)), [busy.id])
+
+    def test_query_count_does_not_grow_with_ids(self):
+        bus = Bus.objects.create(matricule="RD-02", capacity=10)
+        few = [Route.objects.create(bus=bus, direction=f"F{i} -> X") for i in range(2)]
+        many = [Route.objects.create(bus=bus, direction=f"M{i} -> X") for i in range(20)]
+        client = APIClient()
+        for batch in (few, many):
+            with self.assertNumQueries(14):
+                response = client.post(
+                    "/api/v1/routes/bulk-delete/", {"ids": [route.id for route in batch]}, format="json"
+                )
+            self.assertEqual(len(response.data["deleted"]), len(batch))
+
+
+class RoutePlaceParsingTests(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(matricule="PL-01", capacity=30)
+
+    def test_direction_is_split_into_places(self):
+        route = Route.objects.create(bus=self.bus, direction="Saint-Étienne -> Lyon")
+        self.assertEqual(route.origin.name, "Saint-Étienne")
+        self.assertEqual(route.destination.name, "Lyon")
+
+    def test_places_are_shared_across_spellings(self):
+        first = Route.objects.create(bus=self.bus, direction="Saint-Étienne → Lyon")
+        second = Route.objects.create(bus=self.bus, direction="  saint-etienne  -  LYON ")
+        self.assertEqual(first.origin_id, second.origin_id)
+        self.assertEqual(first.destination_id, second.destination_id)
+        self.assertEqual(Place.objects.count(), 2)
+
+    def test_unparseable_direction_leaves_places_empty(self):
+        route = Route.objects.create(bus=self.bus, direction="Circular line")
+        self.assertIsNone(route.origin)
+        self.assertIsNone(route.destination)
+
+    def test_changing_direction_moves_route(self):
+        route = Route.objects.create(bus=self.bus, direction="A -> B")
+        route.direction = "B -> C"
+        route.save(update_fields=["direction"])
+        route.refresh_from_db()
+        self.assertEqual(route.origin.name, "B")
+        self.assertEqual(route.destination.name, "C")
+
+    def test_saving_without_direction_change_skips_place_lookups(self):
+        route = Route.objects.create(bus=self.bus, direction="A -> B")
+        route = Route.objects.get(pk=route.pk)
+        route.duration = timedelta(hours=1)
+        with CaptureQueriesContext(connection) as queries:
+            route.save()
+        self.assertFalse([query for query in queries if "routes_place" in query["sql"]])
+        self.assertEqual(route.origin.name, "A")
+
+    def test_queryset_update_keeps_places_in_step(self):
+        route = Route.objects.create(bus=self.bus, direction="A -> B")
+        Route.objects.filter(pk=route.pk).update(direction="C -> D")
+        route.refresh_from_db()
+        self.assertEqual((route.origin.name, route.destination.name), ("C", "D"))
+
+        with self.assertRaises(ValueError):
+            Route.objects.filter(pk=route.pk).update(direction=Upper("direction"))
+
+    def test_normalize_place(self):
+        self.assertEqual(normalize_place("  Aix-en-Provence "), "aix-en-provence")
+        self.assertEqual(parse_direction("Aix-en-Provence - Nice"), ("Aix-en-Provence", "Nice"))
@@ -1,9 +1,11 @@
 from django.urls import path
 
-from .views import RouteDetailView, RouteListCreateView
+from .views import RouteBulkDeleteView, RouteDetailView, RouteListCreateView, RouteStopsView
 
 
 urlpatterns = [
     path("routes/", RouteListCreateView.as_view()),
+    path("routes/bulk-delete/", RouteBulkDeleteView.as_view()),
     path("routes/<int:pk>/", RouteDetailView.as_view()),
+    path("routes/<int:pk>/stops/", RouteStopsView.as_view()),
 ]
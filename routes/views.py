@@ -1,9 +1,24 @@
 import logging
 
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .models import Route
-from .serializers import RouteSerializer
+from core.bulk_delete import BulkDeleteView
+from core.exceptions import FreezeError
+from core.expansion import ExpandMixin
+from core.fast_serializers import ValuesSerializer
+from core.mixins import FastListMixin
+from core.sparse_fields import SparseFieldsMixin
+from events.outbox import record_event
+from reservations.models import Reservation
+from trips.inventory import reset_route
+from trips.models import Trip
+
+from .models import Route, RouteStop
+from .serializers import RouteSerializer, RouteStopSerializer, RouteStopsUpdateSerializer
 
 audit_logger = logging.getLogger("audit")
 
@@ -15,12 +30,15 @@ def _audit_user(request):
     return "anonymous"
 
 
-class RouteListCreateView(ListCreateAPIView):
+class RouteListCreateView(SparseFieldsMixin, ExpandMixin, FastListMixin, ListCreateAPIView):
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
+    fast_serializer = ValuesSerializer(RouteSerializer)
 
     def perform_create(self, serializer):
-        route = serializer.save()
+        with transaction.atomic():
+            route = serializer.save()
+            record_event("route.create", route, _audit_user(self.request), serializer.data)
         audit_logger.info(
             "user=%s action=route.create route=%s bus=%s",
             _audit_user(self.request),
@@ -29,15 +47,65 @@ class RouteListCreateView(ListCreateAPIView):
         )
 
 
-class RouteDetailView(RetrieveUpdateDestroyAPIView):
+class RouteDetailView(SparseFieldsMixin, ExpandMixin, RetrieveUpdateDestroyAPIView):
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            route = serializer.save()
+            record_event("route.update", route, _audit_user(self.request), serializer.data)
+
     def perform_destroy(self, instance):
         route_id = instance.id
-        super().perform_destroy(instance)
+        with transaction.atomic():
+            super().perform_destroy(instance)
+            record_event("route.delete", instance, _audit_user(self.request), aggregate_id=route_id)
         audit_logger.info(
             "user=%s action=route.delete route=%s",
             _audit_user(self.request),
             route_id,
         )
+
+
+class RouteBulkDeleteView(BulkDeleteView):
+    model = Route
+    dependent_model = Trip
+    dependent_field = "route"
+    blocked_reason = "Cannot delete route with existing trips"
+
+
+class RouteStopsView(APIView):
+    """
+    Ordered stops of a route. PUT ``{"stops": [names]}`` replaces them;
+    refused once any of the route's trips has reservations, since those
+    are booked against the current segments.
+    """
+
+    def get(self, request, pk):
+        route = get_object_or_404(Route, pk=pk)
+        return Response(RouteStopSerializer(route.stops.all(), many=True).data)
+
+    def put(self, request, pk):
+        route = get_object_or_404(Route, pk=pk)
+        serializer = RouteStopsUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        names = serializer.validated_data["stops"]
+
+        with transaction.atomic():
+            if Reservation.objects.filter(trip__route=route).exists():
+                raise FreezeError("Cannot change stops of a route with reservations")
+            route.stops.all().delete()
+            stops = RouteStop.objects.bulk_create(
+                RouteStop(route=route, position=position, name=name)
+                for position, name in enumerate(names)
+            )
+            reset_route(route.id)
+            record_event("route.stops", route, _audit_user(request), {"stops": names})
+        audit_logger.info(
+            "user=%s action=route.stops route=%s stops=%s",
+            _audit_user(request),
+            route.id,
+            len(stops),
+        )
+        return Response(RouteStopSerializer(stops, many=True).data)
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from sync.models import ChangeSequence, Tombstone, change_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync tombstones older than --days. Clients whose cursor is "
+        "below the pruned range get 410 and must resync from since=0."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        with transaction.atomic():
+            expired = Tombstone.objects.filter(deleted_at__lt=cutoff)
+            through = expired.aggregate(through=Max("seq"))["through"]
+            if through is None:
+                self.stdout.write("No tombstones to prune.")
+                return
+            deleted, _ = Tombstone.objects.filter(seq__lte=through).delete()
+            change_counter()
+            ChangeSequence.objects.filter(pk=1, pruned_through__lt=through).update(
+                pruned_through=through
+            )
+        self.stdout.write(f"Pruned {deleted} tombstones through seq {through}.")
@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import F, Max
+
+SYNCED = [
+    ("buses", "Bus"),
+    ("routes", "Route"),
+    ("trips", "Trip"),
+    ("reservations", "Reservation"),
+]
+
+
+def backfill(apps, schema_editor):
+    """
+    Number existing rows so a first ``since=0`` sync sees them. Each model's
+    rows get ``offset + pk``, which keeps sequence numbers unique without a
+    per-row update.
+    """
+    db = schema_editor.connection.alias
+    offset = 0
+    for app_label, model_name in SYNCED:
+        model = apps.get_model(app_label, model_name)
+        top = model.objects.using(db).aggregate(top=Max("pk"))["top"] or 0
+        model.objects.using(db).update(change_seq=F("pk") + offset)
+        offset += top
+
+    ChangeSequence = apps.get_model("sync", "ChangeSequence")
+    ChangeSequence.objects.using(db).update_or_create(pk=1, defaults={"value": offset})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sync", "0001_initial"),
+        ("buses", "0002_bus_change_seq"),
+        ("routes", "0002_route_change_seq"),
+        ("trips", "0002_trip_change_seq"),
+        ("reservations", "0004_reservation_change_seq"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,160 @@
+from contextvars import ContextVar
+
+from django.db import models, transaction
+from django.db.models import Case, F, Max, Value, When
+
+
+class ChangeSequence(models.Model):
+    """
+    Single-row counter behind every ``change_seq``. Allocating takes the
+    row's write lock until the surrounding transaction commits, so sequence
+    numbers become visible in the order they were handed out and a client
+    polling ``since=<seq>`` cannot skip a late-committing change.
+    """
+
+    value = models.BigIntegerField(default=0)
+    # Highest tombstone seq removed by prune_tombstones; cursors below it must resync.
+    pruned_through = models.BigIntegerField(default=0)
+
+
+# Rows stamped per UPDATE by SyncedQuerySet.update, keeping the CASE's
+# bound parameters well under SQLite's limit.
+UPDATE_CHUNK_SIZE = 500
+
+
+def _highest_issued_seq(using):
+    from .resources import synced_models
+
+    issued = [Tombstone.objects.using(using).aggregate(top=Max("seq"))["top"] or 0]
+    for model in synced_models().values():
+        issued.append(model._base_manager.using(using).aggregate(top=Max("change_seq"))["top"] or 0)
+    return max(issued)
+
+
+def _recreate_counter(using):
+    # Migration 0002 seeds the row, but a flush (or a database set up
+    # without migrations) leaves none: continue past every number already
+    # handed out.
+    counter, _ = ChangeSequence.objects.using(using).get_or_create(
+        pk=1, defaults={"value": _highest_issued_seq(using)}
+    )
+    return counter
+
+
+def change_counter(using="default"):
+    """Return the ChangeSequence row, recreating it if it is missing."""
+    try:
+        return ChangeSequence.objects.using(using).get(pk=1)
+    except ChangeSequence.DoesNotExist:
+        return _recreate_counter(using)
+
+
+def allocate_change_seqs(count=1, using="default"):
+    """Reserve ``count`` consecutive sequence numbers and return them as a range."""
+    with transaction.atomic(using=using, savepoint=False):
+        counter = ChangeSequence.objects.using(using)
+        if not counter.filter(pk=1).update(value=F("value") + count):
+            _recreate_counter(using)
+            counter.filter(pk=1).update(value=F("value") + count)
+        last = counter.values_list("value", flat=True).get(pk=1)
+    return range(last - count + 1, last + 1)
+
+
+# Models whose tombstones the current queryset delete() has already written.
+_bulk_tombstoned = ContextVar("bulk_tombstoned", default=frozenset())
+
+
+def record_tombstones(model, pks, using="default"):
+    from .resources import resource_name
+
+    resource = resource_name(model)
+    Tombstone.objects.using(using).bulk_create(
+        Tombstone(seq=seq, resource=resource, object_id=pk)
+        for pk, seq in zip(pks, allocate_change_seqs(len(pks), using))
+    )
+
+
+def tombstones_recorded(model):
+    return model in _bulk_tombstoned.get()
+
+
+class SyncedQuerySet(models.QuerySet):
+    """
+    Stamps fresh sequence numbers on bulk writes that bypass ``save()`` and
+    writes tombstones for bulk deletes in one batch instead of per row.
+    """
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list("pk", flat=True))
+            if pks:
+                record_tombstones(self.model, pks, self.db)
+            token = _bulk_tombstoned.set(_bulk_tombstoned.get() | {self.model})
+            try:
+                return super().delete()
+            finally:
+                _bulk_tombstoned.reset(token)
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            for obj, seq in zip(objs, allocate_change_seqs(len(objs), self.db)):
+                obj.change_seq = seq
+            return super().bulk_create(objs, *args, **kwargs)
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list("pk", flat=True))
+            if not pks:
+                return 0
+            seqs = allocate_change_seqs(len(pks), self.db)
+            updated = 0
+            for start in range(0, len(pks), UPDATE_CHUNK_SIZE):
+                chunk = pks[start : start + UPDATE_CHUNK_SIZE]
+                kwargs["change_seq"] = Case(
+                    *(When(pk=pk, then=Value(seq)) for pk, seq in zip(chunk, seqs[start:])),
+                    output_field=models.BigIntegerField(),
+                )
+                # _base_manager is a plain manager, so this does not recurse.
+                updated += self.model._base_manager.using(self.db).filter(pk__in=chunk).update(**kwargs)
+            return updated
+
+
+class SyncedModel(models.Model):
+    """
+    Abstract base for rows offline clients mirror through ``/sync/``. Every
+    write gets a new ``change_seq``; deletes leave a Tombstone (see signals).
+    """
+
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    objects = SyncedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or self._state.db or "default"
+        # Keeps a savepoint so a caller can catch a failed save (e.g. a
+        # PreconditionFailed version conflict) and carry on in its transaction.
+        with transaction.atomic(using=using):
+            self.change_seq = allocate_change_seqs(using=using)[0]
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "change_seq"}
+            super().save(*args, **kwargs)
+
+
+class Tombstone(models.Model):
+    """Marks a deleted synced row so clients can drop their copy."""
+
+    seq = models.BigIntegerField(unique=True)
+    resource = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.seq} {self.resource}={self.object_id}"
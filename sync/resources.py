@@ -0,0 +1,39 @@
+from functools import lru_cache
+
+from django.apps import apps
+from django.utils.module_loading import import_string
+
+from core.fast_serializers import ValuesSerializer
+
+# Response key -> (model label, API serializer). Order is the order clients
+# should apply a batch in, parents first.
+SYNC_RESOURCES = {
+    "buses": ("buses.Bus", "buses.serializers.BusSerializer"),
+    "routes": ("routes.Route", "routes.serializers.RouteSerializer"),
+    "trips": ("trips.Trip", "trips.serializers.TripSerializer"),
+    "reservations": ("reservations.Reservation", "reservations.serializers.ReservationSerializer"),
+}
+
+
+def synced_models():
+    return {name: apps.get_model(label) for name, (label, _path) in SYNC_RESOURCES.items()}
+
+
+def resource_name(model):
+    for name, (label, _path) in SYNC_RESOURCES.items():
+        if model._meta.label == label:
+            return name
+    return None
+
+
+@lru_cache(maxsize=None)
+def sync_serializer(name):
+    """The resource's API serializer plus ``change_seq``, as a ValuesSerializer."""
+    serializer_class = import_string(SYNC_RESOURCES[name][1])
+
+    class Meta(serializer_class.Meta):
+        fields = [*serializer_class.Meta.fields, "change_seq"]
+
+    return ValuesSerializer(
+        type(f"Sync{serializer_class.__name__}", (serializer_class,), {"Meta": Meta})
+    )
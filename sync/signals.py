@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete
+
+from .models import record_tombstones, tombstones_recorded
+from .resources import synced_models
+
+
+def record_tombstone(sender, instance, using, **kwargs):
+    if not tombstones_recorded(sender):
+        record_tombstones(sender, [instance.pk], using)
+
+
+# Connected per model: a sender-less receiver would disable fast deletes
+# for every other model in the project.
+for model in synced_models().values():
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"sync-tombstone-{model._meta.label}")
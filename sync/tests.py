@@ -0,0 +1,148 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from buses.models import Bus
+from reservations.models import Reservation
+from routes.models import Route
+from sync.models import ChangeSequence, Tombstone
+from trips.models import Trip
+
+
+class ChangeSequenceTests(TestCase):
+    def test_every_save_takes_a_new_sequence_number(self):
+        bus = Bus.objects.create(matricule="SQ-01", capacity=10)
+        first = bus.change_seq
+        route = Route.objects.create(bus=bus, direction="A -> B")
+        self.assertGreater(route.change_seq, first)
+        route.direction = "B -> A"
+        route.save(update_fields=["direction"])
+        route.refresh_from_db()
+        self.assertGreater(route.change_seq, first + 1)
+
+    def test_bulk_writes_get_distinct_sequence_numbers(self):
+        buses = Bus.objects.bulk_create(
+            [Bus(matricule=f"SQ-B{index}", capacity=10) for index in range(3)]
+        )
+        self.assertEqual(len({bus.change_seq for bus in buses}), 3)
+
+        before = ChangeSequence.objects.get().value
+        Bus.objects.filter(matricule__startswith="SQ-B").update(capacity=20)
+        seqs = set(Bus.objects.values_list("change_seq", flat=True))
+        self.assertEqual(seqs, {before + 1, before + 2, before + 3})
+
+    def test_large_updates_are_stamped_in_chunks(self):
+        Bus.objects.bulk_create([Bus(matricule=f"SQ-C{index}", capacity=10) for index in range(5)])
+        before = ChangeSequence.objects.get().value
+        with mock.patch("sync.models.UPDATE_CHUNK_SIZE", 2):
+            updated = Bus.objects.filter(matricule__startswith="SQ-C").update(capacity=20)
+        self.assertEqual(updated, 5)
+        seqs = set(Bus.objects.values_list("change_seq", flat=True))
+        self.assertEqual(seqs, set(range(before + 1, before + 6)))
+
+    def test_missing_counter_row_is_recreated_past_issued_numbers(self):
+        bus = Bus.objects.create(matricule="SQ-F1", capacity=10)
+        Bus.objects.create(matricule="SQ-F2", capacity=10).delete()
+        highest = Tombstone.objects.get().seq
+        ChangeSequence.objects.all().delete()
+
+        bus.capacity = 12
+        bus.save()
+        self.assertEqual(bus.change_seq, highest + 1)
+        self.assertEqual(ChangeSequence.objects.get().value, highest + 1)
+
+    def test_deletes_leave_tombstones(self):
+        bus = Bus.objects.create(matricule="SQ-02", capacity=10)
+        bus_id = bus.id
+        bus.delete()
+        Bus.objects.bulk_create([Bus(matricule=f"SQ-D{index}", capacity=5) for index in range(2)])
+        Bus.objects.filter(matricule__startswith="SQ-D").delete()
+        self.assertEqual(Tombstone.objects.filter(resource="buses").count(), 3)
+        self.assertTrue(Tombstone.objects.filter(object_id=bus_id).exists())
+
+
+class SyncApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="kiosk", role="driver"))
+        self.bus = Bus.objects.create(matricule="SY-01", capacity=10)
+        self.route = Route.objects.create(bus=self.bus, direction="Sync -> Down")
+        self.trip = Trip.objects.create(route=self.route, depart_time=timezone.now())
+        self.reservation = Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+
+    def _sync(self, **params):
+        response = self.client.get("/api/v1/sync/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_download_from_zero(self):
+        data = self._sync(since=0)
+        self.assertEqual([row["id"] for row in data["changes"]["buses"]], [self.bus.id])
+        self.assertEqual(data["changes"]["trips"][0]["route"], self.route.id)
+        self.assertEqual(data["changes"]["reservations"][0]["passenger_name"], "Ali")
+        self.assertEqual(data["next_cursor"], self.reservation.change_seq)
+        self.assertFalse(data["has_more"])
+
+    def test_only_changes_since_cursor_are_returned(self):
+        cursor = self._sync(since=0)["next_cursor"]
+        self.trip.start()
+        Reservation.objects.create(trip=self.trip, passenger_name="Late")
+        Reservation.objects.filter(passenger_name="Late").delete()
+
+        data = self._sync(since=cursor)
+        self.assertEqual(data["changes"]["buses"], [])
+        self.assertEqual([row["status"] for row in data["changes"]["trips"]], ["STARTED"])
+        self.assertEqual(data["changes"]["reservations"], [])
+        self.assertEqual(len(data["deleted"]["reservations"]), 1)
+        self.assertEqual(self._sync(since=data["next_cursor"])["changes"]["trips"], [])
+
+    def test_batches_are_bounded_and_resume_from_cursor(self):
+        for index in range(5):
+            Bus.objects.create(matricule=f"SY-B{index}", capacity=10)
+
+        seen, cursor, calls = [], 0, 0
+        while True:
+            data = self._sync(since=cursor, limit=3)
+            calls += 1
+            batch = sum(len(rows) for rows in data["changes"].values())
+            self.assertLessEqual(batch, 3)
+            seen.extend(row["change_seq"] for rows in data["changes"].values() for row in rows)
+            cursor = data["next_cursor"]
+            if not data["has_more"]:
+                break
+        self.assertEqual(calls, 3)
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(len(set(seen)), 9)
+
+    def test_pruned_cursor_must_resync(self):
+        bus = Bus.objects.create(matricule="SY-02", capacity=10)
+        cursor = self._sync(since=0)["next_cursor"]
+        bus.delete()
+        Bus.objects.create(matricule="SY-03", capacity=10).delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=60))
+        call_command("prune_tombstones", days=30, stdout=StringIO())
+
+        response = self.client.get("/api/v1/sync/", {"since": cursor})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.data["code"], "resync_required")
+        self.assertEqual(self.client.get("/api/v1/sync/", {"since": 0}).status_code, status.HTTP_200_OK)
+
+    def test_missing_counter_row_is_recreated(self):
+        ChangeSequence.objects.all().delete()
+        data = self._sync(since=0)
+        self.assertEqual(data["next_cursor"], self.reservation.change_seq)
+        self.assertEqual(ChangeSequence.objects.get().value, self.reservation.change_seq)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get("/api/v1/sync/")
+        self.assertIn(
+            response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+        )
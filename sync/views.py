@@ -0,0 +1,78 @@
+import heapq
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.exceptions import ResyncRequired
+
+from .models import Tombstone, change_counter
+from .resources import SYNC_RESOURCES, sync_serializer, synced_models
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+
+def _int_param(request, name, default, minimum):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({name: "Expected an integer."})
+    if value < minimum:
+        raise ValidationError({name: f"Must be at least {minimum}."})
+    return value
+
+
+class SyncView(APIView):
+    """
+    Delta feed for offline clients: ``?since=<seq>`` returns the rows and
+    deletions with a higher ``change_seq``, oldest first, at most ``limit``
+    per call. Each source is a keyset scan of its ``change_seq`` index; the
+    per-source batches are merged and cut at ``limit`` so ``next_cursor``
+    never skips a change. ``since=0`` is a full download.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = _int_param(request, "since", default=0, minimum=0)
+        limit = min(_int_param(request, "limit", default=DEFAULT_BATCH_SIZE, minimum=1), MAX_BATCH_SIZE)
+
+        pruned_through = change_counter().pruned_through
+        if 0 < since < pruned_through:
+            raise ResyncRequired()
+
+        streams = []
+        for name, model in synced_models().items():
+            queryset = model.objects.filter(change_seq__gt=since).order_by("change_seq")[: limit + 1]
+            rows = sync_serializer(name).serialize(queryset)
+            streams.append([(row["change_seq"], "changes", name, row) for row in rows])
+
+        tombstones = (
+            Tombstone.objects.filter(seq__gt=since)
+            .order_by("seq")
+            .values_list("seq", "resource", "object_id")[: limit + 1]
+        )
+        streams.append([(seq, "deleted", resource, object_id) for seq, resource, object_id in tombstones])
+
+        merged = list(heapq.merge(*streams, key=lambda entry: entry[0]))
+        has_more = len(merged) > limit
+        batch = merged[:limit]
+
+        changes = {name: [] for name in SYNC_RESOURCES}
+        deleted = {name: [] for name in SYNC_RESOURCES}
+        for _seq, kind, name, item in batch:
+            (changes if kind == "changes" else deleted)[name].append(item)
+
+        return Response(
+            {
+                "changes": changes,
+                "deleted": deleted,
+                "next_cursor": batch[-1][0] if batch else since,
+                "has_more": has_more,
+            }
+        )
@@ -1,9 +1,14 @@
 from django.contrib import admin
 
+from core.admin import LargeTableAdminMixin
+
 from .models import Trip
 
 
 @admin.register(Trip)
-class TripAdmin(admin.ModelAdmin):
-    list_display = ("id", "route", "status", "depart_time", "start_trip_at", "end_trip_at")
+class TripAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "route", "driver", "status", "depart_time", "start_trip_at", "end_trip_at")
+    list_select_related = ("route", "driver")
+    raw_id_fields = ("route", "driver")
+    list_filter = ("depart_time",)
     search_fields = ("route__direction", "route__bus__matricule")
@@ -0,0 +1,142 @@
+"""
+Driver assignment.
+
+A driver may not hold two trips whose intervals (see trips.schedule) come
+closer than DRIVER_MIN_REST. Manual assignments are checked with two small
+queries on the (driver, depart_time) index.
+
+``assign_drivers`` fills a day's unassigned trips greedily: trips in
+departure order, drivers in a heap keyed by when they are next free, so
+each trip goes to the driver who has been waiting longest. Trips that
+drivers already hold, including ones spilling over from the day before,
+stay put and block their driver's time. Cost is O(n log d) for n trips and
+d drivers plus two queries to load and one UPDATE to save.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+
+from core.exceptions import ScheduleConflict
+from routes.models import Route
+
+from .models import Trip
+from .schedule import IntervalSchedule, expected_duration, longest_duration
+
+
+def min_rest():
+    return getattr(settings, "DRIVER_MIN_REST", timedelta(minutes=30))
+
+
+def drivers():
+    return get_user_model().objects.filter(role="driver", is_active=True)
+
+
+def check_driver_schedule(driver_id, route, depart_time, exclude=None):
+    """Raise ScheduleConflict if ``driver_id`` cannot also drive ``route`` at ``depart_time``."""
+    rest = min_rest()
+    end = depart_time + expected_duration(route.duration)
+    trips = Trip.objects.filter(driver_id=driver_id)
+    if exclude is not None:
+        trips = trips.exclude(pk=exclude)
+    # A driver's trips are kept apart, so of those departing earlier only
+    # the latest can reach into this one: no need to bound the window by
+    # the longest route.
+    fields = ("id", "status", "depart_time", "route__duration")
+    rows = [
+        *trips.filter(depart_time__lt=depart_time).order_by("-depart_time").values_list(*fields)[:1],
+        *trips.filter(depart_time__gte=depart_time, depart_time__lt=end + rest).values_list(*fields),
+    ]
+    conflicts = sorted(
+        trip_id
+        for trip_id, status, depart, duration in rows
+        if status != Trip.STATUS_ENDED and depart + expected_duration(duration) + rest > depart_time
+    )
+    if conflicts:
+        trip_ids = ", ".join(str(trip_id) for trip_id in conflicts)
+        raise ScheduleConflict(
+            f"Driver {driver_id} is already driving trip(s) {trip_ids} at that time",
+            code="driver_conflict",
+        )
+
+
+def plan_driver_assignment(start, end, driver_ids=None):
+    """
+    Assign drivers to the unassigned CREATED trips departing in
+    ``[start, end)``. Returns ``(assignments, unassigned)``: trip id ->
+    driver id, and the ids of trips no driver could take.
+    """
+    rest = min_rest()
+    longest = longest_duration(Route.objects.all())
+    pool = drivers()
+    if driver_ids is not None:
+        pool = pool.filter(id__in=driver_ids)
+    driver_ids = list(pool.values_list("id", flat=True))
+
+    trips = Trip.objects.filter(depart_time__gt=start - rest - longest, depart_time__lt=end + rest)
+    open_trips = []
+    held = {driver_id: [] for driver_id in driver_ids}
+    rows = (
+        trips.exclude(status=Trip.STATUS_ENDED)
+        .order_by("depart_time", "id")
+        .values_list("id", "driver_id", "status", "depart_time", "route__duration")
+    )
+    for trip_id, driver_id, status, depart, duration in rows:
+        interval = (depart, depart + expected_duration(duration), trip_id)
+        if driver_id is not None:
+            if driver_id in held:
+                held[driver_id].append(interval)
+        elif status == Trip.STATUS_CREATED and start <= depart < end:
+            open_trips.append(interval)
+
+    schedules = {driver_id: IntervalSchedule(longest, intervals) for driver_id, intervals in held.items()}
+    free_at = [(datetime.min.replace(tzinfo=start.tzinfo), driver_id) for driver_id in driver_ids]
+    heapq.heapify(free_at)
+
+    assignments = {}
+    unassigned = []
+    for depart, arrive, trip_id in open_trips:
+        skipped = []
+        while free_at and free_at[0][0] <= depart:
+            entry = heapq.heappop(free_at)
+            schedule = schedules[entry[1]]
+            if schedule.overlapping(depart - rest, arrive + rest):
+                # Free now, but a trip they already hold is too close.
+                skipped.append(entry)
+                continue
+            schedule.add(depart, arrive, trip_id)
+            assignments[trip_id] = entry[1]
+            heapq.heappush(free_at, (arrive + rest, entry[1]))
+            break
+        else:
+            unassigned.append(trip_id)
+        for entry in skipped:
+            heapq.heappush(free_at, entry)
+    return assignments, unassigned
+
+
+@transaction.atomic
+def assign_drivers(start, end, driver_ids=None):
+    """
+    Plan and save driver assignments for ``[start, end)`` with one UPDATE.
+    A trip that got a driver by hand in the meantime keeps that driver and
+    is left out of the returned assignments.
+    """
+    assignments, unassigned = plan_driver_assignment(start, end, driver_ids)
+    open_trips = set(
+        Trip.objects.filter(pk__in=assignments, driver__isnull=True).values_list("id", flat=True)
+    )
+    assignments = {trip_id: driver_id for trip_id, driver_id in assignments.items() if trip_id in open_trips}
+    if assignments:
+        Trip.objects.filter(pk__in=assignments, driver__isnull=True).update(
+            driver_id=Case(
+                *(When(pk=trip_id, then=Value(driver_id)) for trip_id, driver_id in assignments.items()),
+                output_field=models.IntegerField(),
+            ),
+            version=F("version") + 1,
+        )
+    return assignments, unassigned
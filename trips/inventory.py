@@ -0,0 +1,129 @@
+"""
+Per-segment seat inventory for trips.
+
+A TripSegmentInventory row holds one counter per route segment. Booking
+from stop i to stop j checks ``max(counts[i:j]) < capacity`` and writes the
+incremented list back with a compare-and-swap on ``version``: O(segments)
+work and no reservation scan. Reservations without stops ride every
+segment. A row is built from the trip's reservations the first time a trip
+is booked, so trips that predate it need no backfill.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from core.exceptions import CapacityError
+from routes.models import RouteStop
+
+from .models import TripSegmentInventory
+
+MAX_ATTEMPTS = 5
+
+
+def segment_count(route_id):
+    return max(RouteStop.objects.filter(route_id=route_id).count() - 1, 1)
+
+
+def _bounds(start, end, segments):
+    if start is None:
+        return 0, segments
+    return start, end
+
+
+def build_counts(trip):
+    segments = segment_count(trip.route_id)
+    counts = [0] * segments
+    spans = (
+        trip.reservations.values_list("board_stop__position", "alight_stop__position")
+        .annotate(riders=Count("id"))
+        .order_by()
+    )
+    for start, end, riders in spans:
+        start, end = _bounds(start, end, segments)
+        # Stops of a route the trip has since left may reach past this one's.
+        for segment in range(min(start, segments), min(end, segments)):
+            counts[segment] += riders
+    return counts
+
+
+def _load(trip, build_missing):
+    row = (
+        TripSegmentInventory.objects.filter(trip_id=trip.id)
+        .values_list("counts", "version")
+        .first()
+    )
+    if row is not None or not build_missing:
+        return row
+    counts = build_counts(trip)
+    try:
+        with transaction.atomic():
+            TripSegmentInventory.objects.create(trip_id=trip.id, counts=counts, version=0)
+    except IntegrityError:
+        return _load(trip, build_missing=False)
+    return counts, 0
+
+
+def _adjust(trip, start, end, delta, capacity=None):
+    for _attempt in range(MAX_ATTEMPTS):
+        row = _load(trip, build_missing=delta > 0)
+        if row is None:
+            # Nothing booked through the inventory yet; it is built on demand.
+            return None
+        counts, version = row
+        start, end = _bounds(start, end, len(counts))
+        if capacity is not None and max(counts[start:end]) >= capacity:
+            raise CapacityError("No seats available")
+
+        updated = list(counts)
+        for segment in range(start, end):
+            updated[segment] = max(updated[segment] + delta, 0)
+        swapped = TripSegmentInventory.objects.filter(trip_id=trip.id, version=version).update(
+            counts=updated, version=version + 1
+        )
+        if swapped:
+            return updated
+    raise CapacityError("Seat inventory is busy, retry the booking", code="inventory_busy")
+
+
+def book(trip, start=None, end=None):
+    """Take a seat from stop ``start`` to stop ``end`` (positions); CapacityError if none."""
+    return _adjust(trip, start, end, 1, capacity=trip.route.bus.capacity)
+
+
+def release(trip, start=None, end=None):
+    return _adjust(trip, start, end, -1)
+
+
+def whole_route_seats(capacity, counts, reserved):
+    """
+    Seats free end to end from an inventory row's ``counts``; trips without
+    a row fall back to their plain reservation count ``reserved``.
+    """
+    if counts is None:
+        return capacity - reserved
+    return capacity - max(counts)
+
+
+def seats_left(trip, start=None, end=None):
+    """Free seats on every segment from ``start`` to ``end`` (whole route by default)."""
+    capacity = trip.route.bus.capacity
+    counts = (
+        TripSegmentInventory.objects.filter(trip_id=trip.id)
+        .values_list("counts", flat=True)
+        .first()
+    )
+    if counts is None:
+        # Never booked through the inventory, so every rider spans the route.
+        return capacity - trip.reservations.count()
+    start, end = _bounds(start, end, len(counts))
+    return capacity - max(counts[start:end])
+
+
+def reset_route(route_id):
+    """Drop inventories of a route's trips after its stops change; rebuilt on demand."""
+    TripSegmentInventory.objects.filter(trip__route_id=route_id).delete()
+
+
+def reset_trip(trip_id):
+    """Drop one trip's inventory, e.g. after it moves to another route; rebuilt on demand."""
+    TripSegmentInventory.objects.filter(trip_id=trip_id).delete()
@@ -0,0 +1,242 @@
+"""
+Multi-leg itinerary search over an in-memory connection index.
+
+Every upcoming CREATED trip on a route with a known origin, destination and
+duration is one connection (origin place, departure) -> (destination place,
+arrival), sorted by departure. The index is loaded once, then refreshed
+incrementally from the sync change sequence: only trips, routes, buses and
+reservations with a ``change_seq`` above the last refresh are re-read.
+Deleted reservations are traced back to their trip through a map of the
+indexed trips' reservation ids, since tombstones only carry the id.
+
+Searches run a round-based connection scan: round k finds the earliest
+arrival at every place using at most k legs, boarding only connections
+with enough free seats that leave at least the minimum transfer time after
+the previous arrival. Each round is one pass over the sorted connections,
+so a full day's timetable answers in milliseconds.
+"""
+
+import bisect
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from buses.models import Bus
+from reservations.models import Reservation
+from routes.models import Route
+from sync.models import Tombstone, change_counter
+
+from .inventory import whole_route_seats
+from .models import Trip
+
+
+@dataclass(frozen=True, slots=True)
+class Connection:
+    trip: int
+    route: int
+    origin: int
+    destination: int
+    depart: datetime
+    arrive: datetime
+    seats: int
+
+
+def _load_connections(trips):
+    rows = (
+        trips.filter(
+            status=Trip.STATUS_CREATED,
+            route__origin__isnull=False,
+            route__destination__isnull=False,
+            route__duration__isnull=False,
+        )
+        .annotate(reserved=Count("reservations"))
+        .values_list(
+            "id",
+            "route_id",
+            "route__origin_id",
+            "route__destination_id",
+            "depart_time",
+            "route__duration",
+            "route__bus__capacity",
+            "segment_inventory__counts",
+            "reserved",
+        )
+    )
+    return {
+        trip_id: Connection(
+            trip_id,
+            route_id,
+            origin_id,
+            destination_id,
+            depart,
+            depart + duration,
+            whole_route_seats(capacity, counts, reserved),
+        )
+        for trip_id, route_id, origin_id, destination_id, depart, duration, capacity, counts, reserved in rows
+    }
+
+
+class ConnectionIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._by_trip = {}
+        # reservation id -> trip id, for the trips in the horizon
+        self._riders = {}
+        self._snapshot = ((), ())
+        self._seq = None
+        self._loaded_until = None
+        self._refreshed_at = 0.0
+
+    def _fresh(self):
+        interval = getattr(settings, "ITINERARY_REFRESH_SECONDS", 2)
+        return time.monotonic() - self._refreshed_at < interval
+
+    def refresh(self, force=False):
+        if not force and self._fresh():
+            return
+        with self._lock:
+            # Requests that queued behind another refresh use its result.
+            if not force and self._fresh():
+                return
+            now = timezone.now()
+            until = now + getattr(settings, "ITINERARY_HORIZON", timedelta(hours=36))
+            # Every seq up to the committed counter value is committed too
+            # (see sync.models.ChangeSequence), so nothing can be skipped.
+            seq = change_counter().value
+
+            if self._seq is None:
+                trips = Trip.objects.filter(depart_time__gte=now, depart_time__lt=until)
+                self._by_trip = _load_connections(trips)
+                self._riders = dict(
+                    Reservation.objects.filter(trip__in=trips).values_list("id", "trip_id")
+                )
+            else:
+                self._apply_changes(now, until, seq)
+            self._seq = seq
+            self._loaded_until = until
+
+            connections = sorted(
+                (c for c in self._by_trip.values() if c.depart >= now),
+                key=lambda c: (c.depart, c.trip),
+            )
+            self._by_trip = {c.trip: c for c in connections}
+            self._riders = {
+                reservation_id: trip_id
+                for reservation_id, trip_id in self._riders.items()
+                if trip_id in self._by_trip
+            }
+            self._snapshot = (tuple(connections), tuple(c.depart for c in connections))
+            self._refreshed_at = time.monotonic()
+
+    def _apply_changes(self, now, until, seq):
+        """Re-read the trips affected by what changed since the last refresh."""
+        changed = {"change_seq__gt": self._seq, "change_seq__lte": seq}
+        dirty = set()
+        tombstones = Tombstone.objects.filter(seq__gt=self._seq, seq__lte=seq)
+        for resource, object_id in tombstones.values_list("resource", "object_id"):
+            if resource == "reservations":
+                trip_id = self._riders.pop(object_id, None)
+                if trip_id is not None:
+                    dirty.add(trip_id)
+            elif resource == "trips":
+                self._by_trip.pop(object_id, None)
+
+        dirty.update(Trip.objects.filter(**changed).values_list("id", flat=True))
+        for reservation_id, trip_id in Reservation.objects.filter(**changed).values_list("id", "trip_id"):
+            # A reservation moved to another trip frees a seat on the old one.
+            previous = self._riders.get(reservation_id)
+            if previous is not None:
+                dirty.add(previous)
+            dirty.add(trip_id)
+        routes = set(Route.objects.filter(**changed).values_list("id", flat=True))
+        buses = Bus.objects.filter(**changed).values_list("id", flat=True)
+        routes.update(Route.objects.filter(bus_id__in=buses).values_list("id", flat=True))
+        if routes:
+            dirty.update(
+                Trip.objects.filter(
+                    route_id__in=routes, depart_time__gte=now, depart_time__lt=until
+                ).values_list("id", flat=True)
+            )
+        # Trips that moved into the horizon since the last refresh.
+        dirty.update(
+            Trip.objects.filter(
+                depart_time__gte=self._loaded_until, depart_time__lt=until
+            ).values_list("id", flat=True)
+        )
+
+        for trip_id in dirty:
+            self._by_trip.pop(trip_id, None)
+        if dirty:
+            trips = Trip.objects.filter(id__in=dirty, depart_time__gte=now, depart_time__lt=until)
+            self._by_trip.update(_load_connections(trips))
+            self._riders.update(
+                Reservation.objects.filter(trip__in=trips).values_list("id", "trip_id")
+            )
+
+    def search(self, origin, destination, depart_after, passengers=1, max_legs=3, min_transfer=None):
+        """
+        Pareto-optimal itineraries from ``origin`` to ``destination`` (place
+        ids): the earliest arrival with one leg, then each strictly earlier
+        arrival that needs one more leg, up to ``max_legs``. Each
+        itinerary is a list of Connections.
+        """
+        if min_transfer is None:
+            min_transfer = getattr(settings, "ITINERARY_MIN_TRANSFER", timedelta(minutes=10))
+        connections, departures = self._snapshot
+        first = bisect.bisect_left(departures, depart_after)
+
+        # label: (arrival time, connection that got there or None, round of that connection)
+        rounds = [{origin: (depart_after, None, 0)}]
+        for leg in range(1, max_legs + 1):
+            previous = rounds[-1]
+            labels = dict(previous)
+            improved = False
+            for index in range(first, len(connections)):
+                connection = connections[index]
+                if connection.seats < passengers:
+                    continue
+                label = previous.get(connection.origin)
+                if label is None:
+                    continue
+                ready = label[0] if label[1] is None else label[0] + min_transfer
+                if connection.depart < ready:
+                    continue
+                current = labels.get(connection.destination)
+                if current is None or connection.arrive < current[0]:
+                    labels[connection.destination] = (connection.arrive, connection, leg)
+                    improved = True
+            rounds.append(labels)
+            if not improved:
+                break
+
+        itineraries = []
+        best = None
+        for leg in range(1, len(rounds)):
+            label = rounds[leg].get(destination)
+            if label is None or label[2] != leg or (best is not None and label[0] >= best):
+                continue
+            best = label[0]
+            itineraries.append(self._legs(rounds, destination, leg))
+        return itineraries
+
+    @staticmethod
+    def _legs(rounds, place, leg):
+        legs = []
+        label = rounds[leg][place]
+        while label[1] is not None:
+            connection, leg = label[1], label[2]
+            legs.append(connection)
+            label = rounds[leg - 1][connection.origin]
+        legs.reverse()
+        return legs
+
+
+connection_index = ConnectionIndex()
@@ -0,0 +1,39 @@
+from django.db import transaction
+
+from core.pubsub import Broker
+
+seat_broker = Broker()
+
+
+def trip_topic(trip_id):
+    return f"trip:{trip_id}"
+
+
+def route_topic(route_id):
+    return f"route:{route_id}"
+
+
+def seat_snapshot(trip):
+    return {
+        "trip": trip.id,
+        "route": trip.route_id,
+        "status": trip.status,
+        "seats_left": trip.seats_left(),
+    }
+
+
+def publish_trip_update(trip):
+    """
+    Push the trip's seat count and status to live subscribers once the
+    current transaction commits. Nothing is computed when nobody listens.
+    """
+
+    def publish():
+        topics = [trip_topic(trip.id), route_topic(trip.route_id)]
+        if not any(seat_broker.has_subscribers(topic) for topic in topics):
+            return
+        snapshot = seat_snapshot(trip)
+        for topic in topics:
+            seat_broker.publish(topic, snapshot)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,78 @@
+"""
+Pre-rendered passenger manifests for drivers.
+
+The manifest body and its ETag are built once per trip and kept in the
+default cache, so repeated fetches are a cache hit and usually a bodiless
+304, with no query beyond the trip lookup. Entries are stored under the
+trip's current generation, a random token kept at ``manifest_cache_key``.
+Reservation writes (and archiving) delete that token once they commit; the
+next read starts a new generation and renders afresh. A render that began
+before the write stores its rows under the old generation, which no reader
+looks up any more, so it cannot bring a stale list back. Entries also
+expire after MANIFEST_CACHE_TTL seconds.
+
+The default LocMem cache is per process: every worker then renders and
+keeps its own copy and only sees its own invalidations. Production needs a
+shared backend (Redis, Memcached) in CACHES for the cache to be shared and
+the invalidations to reach it.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.renderers import FastJSONRenderer
+
+
+def manifest_cache_key(trip_id):
+    """Key of the trip's manifest generation; deleting it invalidates the manifest."""
+    return f"trips:manifest:{trip_id}"
+
+
+def _entry_key(trip_id, generation):
+    return f"trips:manifest:{trip_id}:{generation}"
+
+
+def _generation(trip_id):
+    key = manifest_cache_key(trip_id)
+    generation = cache.get(key)
+    if generation is None:
+        # add() so that concurrent first readers agree on one generation.
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def render_manifest(trip):
+    """Return ``(body, etag)`` for the trip's current reservations."""
+    rows = list(
+        trip.reservations.order_by("passenger_name", "id").values_list("id", "passenger_name")
+    )
+    body = FastJSONRenderer().render(
+        {
+            "trip": trip.id,
+            "count": len(rows),
+            "fields": ["reservation", "passenger_name"],
+            "passengers": rows,
+        }
+    )
+    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+    return body, etag
+
+
+def get_manifest(trip):
+    """Return ``(body, etag)`` for ``trip``, rendering it when the current generation has none."""
+    key = _entry_key(trip.id, _generation(trip.id))
+    cached = cache.get(key)
+    if cached is None:
+        cached = render_manifest(trip)
+        cache.set(key, cached, timeout=getattr(settings, "MANIFEST_CACHE_TTL", 3600))
+    return cached
+
+
+def invalidate_manifest(trip_id):
+    """Start a new manifest generation once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(manifest_cache_key(trip_id)))
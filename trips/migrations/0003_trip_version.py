@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0002_trip_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
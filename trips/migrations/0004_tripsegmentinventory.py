@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0003_trip_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripSegmentInventory',
+            fields=[
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='segment_inventory', serialize=False, to='trips.trip')),
+                ('counts', models.JSONField(default=list)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
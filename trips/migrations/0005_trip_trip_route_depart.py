@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0004_tripsegmentinventory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['route', 'depart_time'], name='trip_route_depart'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0005_trip_trip_route_depart'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['depart_time'], name='trip_depart'),
+        ),
+    ]
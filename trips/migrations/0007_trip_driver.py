@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('trips', '0006_trip_trip_depart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='driver',
+            field=models.ForeignKey(blank=True, db_index=False, limit_choices_to={'role': 'driver'}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='driven_trips', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['driver', 'depart_time'], name='trip_driver_depart'),
+        ),
+    ]
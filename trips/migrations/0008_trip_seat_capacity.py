@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 18:46
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def snapshot_ended_trips(apps, schema_editor):
+    """Trips that ended before the column existed get their bus's current seats."""
+    db = schema_editor.connection.alias
+    Trip = apps.get_model("trips", "Trip")
+    Route = apps.get_model("routes", "Route")
+    capacity = Route.objects.using(db).filter(pk=OuterRef("route_id")).values("bus__capacity")
+    Trip.objects.using(db).filter(status="ENDED").update(seat_capacity=Subquery(capacity[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0007_trip_driver'),
+        ('routes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='seat_capacity',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(snapshot_ended_trips, migrations.RunPython.noop),
+    ]
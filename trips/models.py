@@ -1,8 +1,18 @@
-from django.db import models
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils import timezone
 
+from core.exceptions import ScheduleConflict
+from core.versioning import VersionedModel
+from sync.models import SyncedModel
+
+from .live import publish_trip_update
 
-class Trip(models.Model):
+
+class Trip(VersionedModel, SyncedModel):
     # --------------------------
     # lifecycle states
     # --------------------------
@@ -33,9 +43,33 @@ class Trip(models.Model):
         default=STATUS_CREATED
     )
 
+    driver = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="driven_trips",
+        limit_choices_to={"role": "driver"},
+        db_index=False,
+    )
+
     start_trip_at = models.DateTimeField(null=True, blank=True)
     end_trip_at = models.DateTimeField(null=True, blank=True)
 
+    # Seats of the route's bus when the trip ended. Occupancy history keeps
+    # this figure after the route changes bus or the bus is resized.
+    seat_capacity = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Trip search: route_id IN (...) AND depart_time in a window.
+            models.Index(fields=["route", "depart_time"], name="trip_route_depart"),
+            # Itinerary index: trips entering its time horizon.
+            models.Index(fields=["depart_time"], name="trip_depart"),
+            # Driver conflict checks: one driver's trips in a time window.
+            models.Index(fields=["driver", "depart_time"], name="trip_driver_depart"),
+        ]
+
     # --------------------------
     # enforce CREATED at birth
     # --------------------------
@@ -48,14 +82,14 @@ class Trip(models.Model):
     # --------------------------
     def _check_structural_freeze(self):
         if self.pk is None:
-            return
+            return None
 
         old = Trip.objects.get(pk=self.pk)
 
         frozen = old.status in [self.STATUS_STARTED, self.STATUS_ENDED]
 
         if not frozen:
-            return
+            return old
 
         structural_changed = (
             old.route != self.route or
@@ -65,19 +99,58 @@ class Trip(models.Model):
         if structural_changed:
             raise ValueError("Trip structure is frozen")
 
+        return old
+
+    # --------------------------
+    # bus double-booking guard
+    # --------------------------
+    def _check_bus_schedule(self, old):
+        from .schedule import check_trip_schedule
+
+        if self.status == self.STATUS_ENDED:
+            return
+        if old is not None and (old.route_id, old.depart_time) == (self.route_id, self.depart_time):
+            return
+        check_trip_schedule(self.route, self.depart_time, exclude=self.pk)
+
+    def clean(self):
+        super().clean()
+        if self.route_id is None or self.depart_time is None:
+            return
+        old = Trip.objects.filter(pk=self.pk).first() if self.pk else None
+        try:
+            self._check_bus_schedule(old)
+        except ScheduleConflict as exc:
+            raise ValidationError({"depart_time": exc.message})
+
     # --------------------------
     # unified save pipeline
     # --------------------------
     def save(self, *args, **kwargs):
+        from .inventory import reset_trip
+
         self._enforce_birth_state()
-        self._check_structural_freeze()
-        super().save(*args, **kwargs)
+        # The bus check runs in the transaction that writes the trip, so no
+        # competing write can slip in between check and save. Inside a
+        # caller's transaction it runs as is: a refusal raised before any
+        # write leaves that transaction usable, without a savepoint.
+        using = kwargs.get("using") or self._state.db or "default"
+        in_transaction = transaction.get_connection(using).in_atomic_block
+        with nullcontext() if in_transaction else transaction.atomic(using=using):
+            old = self._check_structural_freeze()
+            self._check_bus_schedule(old)
+            super().save(*args, **kwargs)
+            if old is not None and old.route_id != self.route_id:
+                # The counts are per segment of the old route's stops.
+                reset_trip(self.pk)
 
     # --------------------------
     # domain logic
     # --------------------------
-    def seats_left(self):
-        return self.route.bus.capacity - self.reservations.count()
+    def seats_left(self, start=None, end=None):
+        from .inventory import seats_left
+
+        return seats_left(self, start, end)
 
     # --------------------------
     # lifecycle transitions
@@ -92,6 +165,7 @@ class Trip(models.Model):
         self.start_trip_at = timezone.now()
         self.status = self.STATUS_STARTED
         super().save()  # bypass freeze intentionally
+        publish_trip_update(self)
 
     def end(self):
         if self.status != self.STATUS_STARTED:
@@ -99,10 +173,31 @@ class Trip(models.Model):
 
         self.end_trip_at = timezone.now()
         self.status = self.STATUS_ENDED
+        self.seat_capacity = (
+            Trip.objects.filter(pk=self.pk).values_list("route__bus__capacity", flat=True).get()
+        )
         super().save()  # bypass freeze intentionally
+        publish_trip_update(self)
 
     # --------------------------
     # debug display
     # --------------------------
     def __str__(self):
-        return f"Trip {self.id} - {self.route.direction} ({self.status})"
\ No newline at end of file
+        return f"Trip {self.id} - Route {self.route_id} ({self.status})"
+
+
+class TripSegmentInventory(models.Model):
+    """
+    Seats taken per route segment for one trip: ``counts[k]`` reservations
+    ride segment k. Updated by compare-and-swap on ``version`` (see
+    trips.inventory), so a booking never scans reservations.
+    """
+
+    trip = models.OneToOneField(
+        Trip, on_delete=models.CASCADE, primary_key=True, related_name="segment_inventory"
+    )
+    counts = models.JSONField(default=list)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Trip {self.trip_id} {self.counts}"
@@ -0,0 +1,215 @@
+"""
+Bus schedule conflicts.
+
+A trip occupies its route's bus from ``depart_time`` for the route's
+expected duration (``Route.duration``, else TRIP_DEFAULT_DURATION). Two
+trips conflict when their buses are the same and those intervals overlap,
+even if they run on different routes. ``Trip.save`` (and so the API and
+the admin) checks every trip it creates or moves; ``Trip.clean`` reports
+the same conflict as a form error. Bulk paths check their whole batch up
+front: ``timetable_conflicts`` for a timetable, ``reassignment_conflicts``
+for routes moving to other buses.
+
+Intervals of one bus are kept in an IntervalSchedule sorted by start. No
+interval is longer than the bus's longest route, so everything overlapping
+``[start, end)`` starts inside ``[start - longest, end)``: two bisects find
+the candidates. Loading a schedule is one range query on the
+(route, depart_time) index over that same window.
+"""
+
+import bisect
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from core.exceptions import ScheduleConflict
+from routes.models import Route
+
+from .models import Trip
+
+
+def expected_duration(duration):
+    return duration or getattr(settings, "TRIP_DEFAULT_DURATION", timedelta(hours=2))
+
+
+def longest_duration(routes):
+    durations = routes.aggregate(
+        longest=Max("duration"), unknown=Count("id", filter=Q(duration__isnull=True))
+    )
+    longest = durations["longest"] or timedelta(0)
+    if durations["unknown"]:
+        longest = max(longest, expected_duration(None))
+    return longest
+
+
+class IntervalSchedule:
+    """Trips as ``(start, end, trip id)`` intervals sorted by start."""
+
+    def __init__(self, longest, intervals=()):
+        self.longest = longest
+        self.intervals = sorted(intervals)
+        self.starts = [interval[0] for interval in self.intervals]
+
+    def overlapping(self, start, end):
+        first = bisect.bisect_right(self.starts, start - self.longest)
+        last = bisect.bisect_left(self.starts, end)
+        return [interval for interval in self.intervals[first:last] if interval[1] > start]
+
+    def add(self, start, end, trip_id=None):
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.intervals.insert(index, (start, end, trip_id))
+        self.longest = max(self.longest, end - start)
+
+
+def trip_intervals(trips):
+    rows = trips.exclude(status=Trip.STATUS_ENDED).values_list("id", "depart_time", "route__duration")
+    return [(depart, depart + expected_duration(duration), trip_id) for trip_id, depart, duration in rows]
+
+
+def _bus_intervals(bus_id, start, end, exclude=None):
+    """``(longest, intervals)`` for every trip of ``bus_id`` that may overlap ``[start, end)``."""
+    routes = Route.objects.filter(bus_id=bus_id)
+    longest = longest_duration(routes)
+    trips = Trip.objects.filter(
+        route_id__in=routes.values("id"),
+        depart_time__gt=start - longest,
+        depart_time__lt=end,
+    )
+    if exclude is not None:
+        trips = trips.exclude(pk=exclude)
+    return longest, trip_intervals(trips)
+
+
+def load_bus_schedule(bus_id, start, end, exclude=None):
+    """IntervalSchedule of every trip of ``bus_id`` that may overlap ``[start, end)``."""
+    return IntervalSchedule(*_bus_intervals(bus_id, start, end, exclude))
+
+
+def check_trip_schedule(route, depart_time, exclude=None):
+    """
+    Raise ScheduleConflict if a trip on ``route`` at ``depart_time`` would
+    double-book its bus. Call it in the transaction that saves the trip.
+    """
+    end = depart_time + expected_duration(route.duration)
+    # Every candidate already starts before ``end``; one pass, no schedule to build.
+    _, intervals = _bus_intervals(route.bus_id, depart_time, end, exclude)
+    conflicts = sorted(trip_id for _, interval_end, trip_id in intervals if interval_end > depart_time)
+    if conflicts:
+        trip_ids = ", ".join(str(trip_id) for trip_id in conflicts)
+        raise ScheduleConflict(f"Bus {route.bus_id} is already scheduled for trip(s) {trip_ids}")
+
+
+def timetable_conflicts(route, departures):
+    """
+    Check a batch of new departures on ``route`` against the bus's existing
+    trips and against each other. Returns one entry per departure that
+    conflicts, naming the existing trip or the earlier departure it overlaps.
+    """
+    if not departures:
+        return []
+    departures = sorted(departures)
+    duration = expected_duration(route.duration)
+    schedule = load_bus_schedule(route.bus_id, departures[0], departures[-1] + duration)
+
+    conflicts = []
+    for depart in departures:
+        end = depart + duration
+        overlapping = schedule.overlapping(depart, end)
+        if overlapping:
+            other_start, _, other_trip = overlapping[0]
+            conflicts.append(
+                {
+                    "depart_time": depart,
+                    "trip": other_trip,
+                    "other_depart_time": other_start,
+                }
+            )
+        schedule.add(depart, end)
+    return conflicts
+
+
+def _overlapping_pairs(rows):
+    """
+    Sweep ``(bus, trip, route, depart_time, route duration)`` rows sorted by
+    bus, then start, and return one conflict entry per overlapping pair.
+    """
+    conflicts = []
+    active = []
+    current_bus = None
+    for bus_id, trip_id, route_id, depart, duration in rows:
+        if bus_id != current_bus:
+            current_bus, active = bus_id, []
+        interval_end = depart + expected_duration(duration)
+        active = [other for other in active if other["end"] > depart]
+        for other in active:
+            conflicts.append(
+                {
+                    "bus": bus_id,
+                    "trip": other["trip"],
+                    "route": other["route"],
+                    "depart_time": other["depart_time"],
+                    "other_trip": trip_id,
+                    "other_route": route_id,
+                    "other_depart_time": depart,
+                }
+            )
+        active.append({"trip": trip_id, "route": route_id, "depart_time": depart, "end": interval_end})
+    return conflicts
+
+
+def conflict_report(start, end):
+    """
+    Every pair of non-ended trips sharing a bus with overlapping intervals,
+    where at least one of them departs in ``[start, end)``. One query plus a
+    sweep over each bus's trips in start order.
+    """
+    longest = longest_duration(Route.objects.all())
+    rows = (
+        Trip.objects.filter(depart_time__gt=start - longest, depart_time__lt=end)
+        .exclude(status=Trip.STATUS_ENDED)
+        .order_by("route__bus_id", "depart_time", "id")
+        .values_list("route__bus_id", "id", "route_id", "depart_time", "route__duration")
+    )
+    return [
+        conflict
+        for conflict in _overlapping_pairs(rows)
+        if conflict["depart_time"] >= start or conflict["other_depart_time"] >= start
+    ]
+
+
+def reassignment_conflicts(assignments):
+    """
+    Pairs of non-ended trips that would hold the same bus at overlapping
+    times once routes move as ``assignments`` (route id -> bus id) says.
+    Only pairs with a trip on a moved route are reported; the rest were
+    already there. Three queries: the routes of the target buses, their
+    longest duration and their trips still running or to come.
+    """
+    if not assignments:
+        return []
+    targets = set(assignments.values())
+    route_buses = dict(
+        Route.objects.filter(Q(id__in=assignments) | Q(bus_id__in=targets)).values_list("id", "bus_id")
+    )
+    route_buses.update(assignments)
+    route_buses = {route_id: bus_id for route_id, bus_id in route_buses.items() if bus_id in targets}
+
+    longest = longest_duration(Route.objects.filter(id__in=route_buses))
+    trips = (
+        Trip.objects.filter(route_id__in=route_buses, depart_time__gt=timezone.now() - longest)
+        .exclude(status=Trip.STATUS_ENDED)
+        .values_list("id", "route_id", "depart_time", "route__duration")
+    )
+    # Grouped by the bus each trip will have, which the database does not know yet.
+    rows = sorted(
+        ((route_buses[route_id], trip_id, route_id, depart, duration) for trip_id, route_id, depart, duration in trips),
+        key=lambda row: (row[0], row[3], row[1]),
+    )
+    return [
+        conflict
+        for conflict in _overlapping_pairs(rows)
+        if conflict["route"] in assignments or conflict["other_route"] in assignments
+    ]
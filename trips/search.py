@@ -0,0 +1,69 @@
+"""
+Origin/destination trip search.
+
+Place names resolve through Place's unique ``normalized_name`` index, routes
+through the (origin, destination) index and trips through (route,
+depart_time), so the cost depends on the matching trips, not on how many
+routes exist.
+"""
+
+from django.db.models import Count
+
+from routes.models import Place, Route
+from routes.places import normalize_place
+
+from .inventory import whole_route_seats
+from .models import Trip
+
+
+def resolve_places(*names):
+    """Place rows for ``names`` in order; None for names no route uses."""
+    keys = [normalize_place(name) for name in names]
+    found = {place.normalized_name: place for place in Place.objects.filter(normalized_name__in=keys)}
+    return [found.get(key) for key in keys]
+
+
+def search_trips(origin, destination, start, end=None, min_seats=1, limit=50):
+    """
+    Upcoming CREATED trips from ``origin`` to ``destination`` (Place rows)
+    departing in ``[start, end)`` with at least ``min_seats`` free end to end.
+    """
+    routes = Route.objects.filter(origin=origin, destination=destination).values("id")
+    trips = Trip.objects.filter(
+        route_id__in=routes, status=Trip.STATUS_CREATED, depart_time__gte=start
+    )
+    if end is not None:
+        trips = trips.filter(depart_time__lt=end)
+    trips = (
+        trips.annotate(reserved=Count("reservations"))
+        .values(
+            "id",
+            "route_id",
+            "depart_time",
+            "reserved",
+            "route__bus__capacity",
+            "segment_inventory__counts",
+        )
+        .order_by("depart_time", "id")
+    )
+
+    results = []
+    for trip in trips.iterator(chunk_size=limit * 2):
+        seats = whole_route_seats(
+            trip["route__bus__capacity"], trip["segment_inventory__counts"], trip["reserved"]
+        )
+        if seats < min_seats:
+            continue
+        results.append(
+            {
+                "trip": trip["id"],
+                "route": trip["route_id"],
+                "depart_time": trip["depart_time"],
+                "origin": origin.name,
+                "destination": destination.name,
+                "seats_left": seats,
+            }
+        )
+        if len(results) == limit:
+            break
+    return results
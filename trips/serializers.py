@@ -1,9 +1,19 @@
+from django.db import transaction
 from rest_framework import serializers
 
+from core.expansion import ExpandableSerializerMixin
+from routes.models import Route
+
 from .models import Trip
+from .drivers import check_driver_schedule
+
 
+class TripSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "route": ("routes.serializers.RouteSerializer", False),
+        "reservations": ("reservations.serializers.ReservationSerializer", True),
+    }
 
-class TripSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
         fields = [
@@ -11,11 +21,49 @@ class TripSerializer(serializers.ModelSerializer):
             "route",
             "depart_time",
             "status",
+            "driver",
             "start_trip_at",
             "end_trip_at",
+            "version",
         ]
         read_only_fields = [
             "status",
             "start_trip_at",
             "end_trip_at",
-        ]
\ No newline at end of file
+        ]
+
+    def _check_schedules(self, attrs):
+        route = attrs.get("route", getattr(self.instance, "route", None))
+        depart_time = attrs.get("depart_time", getattr(self.instance, "depart_time", None))
+        driver = attrs.get("driver", getattr(self.instance, "driver", None))
+        exclude = getattr(self.instance, "pk", None)
+        moved = self.instance is None or (route, depart_time) != (self.instance.route, self.instance.depart_time)
+        if driver is not None and (moved or driver != self.instance.driver):
+            check_driver_schedule(driver.id, route, depart_time, exclude=exclude)
+
+    # Driver conflicts are checked in the transaction that writes the trip,
+    # so no competing write can slip in between check and save; Trip.save
+    # does the same for the bus.
+    def create(self, validated_data):
+        with transaction.atomic(savepoint=False):
+            self._check_schedules(validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic(savepoint=False):
+            self._check_schedules(validated_data)
+            return super().update(instance, validated_data)
+
+
+class TimetableSerializer(serializers.Serializer):
+    route = serializers.PrimaryKeyRelatedField(queryset=Route.objects.all())
+    departures = serializers.ListField(
+        child=serializers.DateTimeField(), allow_empty=False, max_length=500
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+
+class DriverAssignmentSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    drivers = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    dry_run = serializers.BooleanField(default=False)
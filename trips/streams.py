@@ -0,0 +1,117 @@
+"""
+Server-Sent Events of live seat availability.
+
+Under ASGI the views and the event stream run as coroutines: an open,
+idle stream waits on its subscription queue and holds no thread. Setting
+a stream up is not thread-free. The rest of MIDDLEWARE (Django's
+MiddlewareMixin classes) runs its request and response hooks through
+sync_to_async, and the snapshot queries go through the async ORM, which
+also runs in a thread. Both cost a fixed number of hops per connection,
+not per event.
+"""
+
+import asyncio
+import json
+
+from django.db.models import Count
+from django.http import Http404, StreamingHttpResponse
+
+from core.db_router import use_primary_database
+from routes.models import Route
+
+from .inventory import whole_route_seats
+from .live import route_topic, seat_broker, trip_topic
+from .models import Trip
+
+HEARTBEAT_SECONDS = 15
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def _trip_snapshot(trip_id):
+    trip = (
+        await Trip.objects.filter(pk=trip_id)
+        .annotate(reserved=Count("reservations"))
+        .values("id", "route_id", "status", "reserved", "route__bus__capacity", "segment_inventory__counts")
+        .afirst()
+    )
+    if trip is None:
+        return None
+    return {
+        "trip": trip["id"],
+        "route": trip["route_id"],
+        "status": trip["status"],
+        "seats_left": whole_route_seats(
+            trip["route__bus__capacity"], trip["segment_inventory__counts"], trip["reserved"]
+        ),
+    }
+
+
+async def _route_snapshot(route_id):
+    trips = (
+        Trip.objects.filter(route_id=route_id)
+        .exclude(status=Trip.STATUS_ENDED)
+        .annotate(reserved=Count("reservations"))
+        .values("id", "status", "reserved", "route__bus__capacity", "segment_inventory__counts")
+        .order_by("depart_time")
+    )
+    return [
+        {
+            "trip": trip["id"],
+            "route": route_id,
+            "status": trip["status"],
+            "seats_left": whole_route_seats(
+                trip["route__bus__capacity"], trip["segment_inventory__counts"], trip["reserved"]
+            ),
+        }
+        async for trip in trips
+    ]
+
+
+async def _event_stream(topic, snapshot, close_when_ended):
+    subscription = seat_broker.subscribe(topic)
+    try:
+        yield _sse("snapshot", snapshot)
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield _sse("seats", message)
+            if close_when_ended and message["status"] == Trip.STATUS_ENDED:
+                return
+    finally:
+        subscription.close()
+
+
+def _stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@use_primary_database
+async def trip_seat_stream(request, pk):
+    """Server-Sent Events of ``seats_left``/``status`` changes for one trip."""
+    snapshot = await _trip_snapshot(pk)
+    if snapshot is None:
+        raise Http404("No Trip matches the given query.")
+    return _stream_response(
+        _event_stream(trip_topic(pk), snapshot, close_when_ended=True)
+    )
+
+
+@use_primary_database
+async def route_seat_stream(request, pk):
+    """Server-Sent Events of seat changes for every upcoming trip on a route."""
+    if not await Route.objects.filter(pk=pk).aexists():
+        raise Http404("No Route matches the given query.")
+    snapshot = await _route_snapshot(pk)
+    return _stream_response(
+        _event_stream(route_topic(pk), snapshot, close_when_ended=False)
+    )
@@ -1,12 +1,31 @@
+import threading
+import time as clock
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from accounts.models import User
+from analytics.models import RouteDayOccupancy
 from buses.models import Bus
+from core.exceptions import ScheduleConflict
+from events.models import OutboxEvent
 from reservations.models import Reservation
 from routes.models import Route
-from trips.models import Trip
+from sync.models import ChangeSequence
+from trips.drivers import check_driver_schedule
+from trips.inventory import build_counts
+from trips.itinerary import ConnectionIndex, _load_connections, connection_index
+from trips.live import route_topic, seat_broker, trip_topic
+from trips.manifest import _entry_key, manifest_cache_key, render_manifest
+from trips.models import Trip, TripSegmentInventory
 
 
 class TripModelTests(TestCase):
@@ -18,7 +37,7 @@ class TripModelTests(TestCase):
     def test_new_trip_is_created_with_created_status(self):
         trip = Trip.objects.create(
             route=self.route,
-            depart_time=timezone.now(),
+            depart_time=timezone.now() + timedelta(hours=3),
             status=Trip.STATUS_STARTED,
         )
         self.assertEqual(trip.status, Trip.STATUS_CREATED)
@@ -80,7 +99,7 @@ class TripApiTests(TestCase):
     def test_create_trip_success(self):
         response = self.client.post(
             "/api/v1/trips/",
-            {"route": self.route.id, "depart_time": timezone.now().isoformat()},
+            {"route": self.route.id, "depart_time": (timezone.now() + timedelta(days=1)).isoformat()},
             format="json",
         )
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -167,3 +186,852 @@ class TripApiTests(TestCase):
         response = self.client.post(f"/api/v1/trips/{self.trip.id}/end/")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data["code"], "lifecycle_error")
+
+
+class SeatPublishingTests(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(matricule="TB-20", capacity=2)
+        self.route = Route.objects.create(bus=self.bus, direction="E -> F")
+        self.trip = Trip.objects.create(route=self.route, depart_time=timezone.now())
+
+    def _published(self, action):
+        with mock.patch.object(seat_broker, "has_subscribers", return_value=True), \
+                mock.patch.object(seat_broker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+        return publish.call_args_list
+
+    def test_reservation_changes_publish_seats_left(self):
+        calls = self._published(
+            lambda: Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        )
+        snapshot = {
+            "trip": self.trip.id,
+            "route": self.route.id,
+            "status": "CREATED",
+            "seats_left": 1,
+        }
+        self.assertEqual(
+            calls,
+            [
+                mock.call(trip_topic(self.trip.id), snapshot),
+                mock.call(route_topic(self.route.id), snapshot),
+            ],
+        )
+
+    def test_start_publishes_status(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        calls = self._published(self.trip.start)
+        self.assertEqual(calls[0].args[1]["status"], Trip.STATUS_STARTED)
+
+    def test_nothing_is_computed_without_subscribers(self):
+        with mock.patch.object(seat_broker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        publish.assert_not_called()
+
+
+class SeatStreamTests(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(matricule="TB-30", capacity=3)
+        self.route = Route.objects.create(bus=self.bus, direction="G -> H")
+        self.trip = Trip.objects.create(route=self.route, depart_time=timezone.now())
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+
+    async def test_trip_stream_sends_snapshot_then_updates(self):
+        response = await self.async_client.get(f"/api/v1/trips/{self.trip.id}/seats/stream/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = response.streaming_content
+
+        first = (await anext(stream)).decode()
+        self.assertTrue(first.startswith("event: snapshot\n"))
+        self.assertIn('"seats_left":2', first)
+
+        update = {"trip": self.trip.id, "route": self.route.id, "status": "ENDED", "seats_left": 2}
+        seat_broker.publish(trip_topic(self.trip.id), update)
+        second = (await anext(stream)).decode()
+        self.assertEqual(
+            second,
+            'event: seats\ndata: {"trip":%d,"route":%d,"status":"ENDED","seats_left":2}\n\n'
+            % (self.trip.id, self.route.id),
+        )
+
+        # An ended trip closes its stream and releases the subscription.
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+        self.assertFalse(seat_broker.has_subscribers(trip_topic(self.trip.id)))
+
+    async def test_route_stream_snapshot_lists_open_trips(self):
+        response = await self.async_client.get(f"/api/v1/routes/{self.route.id}/seats/stream/")
+        stream = response.streaming_content
+        first = (await anext(stream)).decode()
+        self.assertIn('"seats_left":2', first)
+        await stream.aclose()
+
+    async def test_unknown_trip_returns_404(self):
+        response = await self.async_client.get("/api/v1/trips/999999/seats/stream/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TripBulkDeleteApiTests(TestCase):
+    def test_skips_trips_with_reservations(self):
+        bus = Bus.objects.create(matricule="TD-01", capacity=10)
+        route = Route.objects.create(bus=bus, direction="T -> D")
+        free = Trip.objects.create(route=route, depart_time=timezone.now())
+        booked = Trip.objects.create(route=route, depart_time=timezone.now() + timedelta(hours=3))
+        Reservation.objects.create(trip=booked, passenger_name="Ali")
+
+        response = APIClient().post(
+            "/api/v1/trips/bulk-delete/", {"ids": [free.id, booked.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted"], [free.id])
+        self.assertEqual(
+            response.data["blocked"],
+            [
+                {
+                    "id": booked.id,
+                    "dependents": 1,
+                    "reason": "Cannot delete trip with existing reservations",
+                }
+            ],
+        )
+
+    def test_query_count_does_not_grow_with_ids(self):
+        bus = Bus.objects.create(matricule="TD-02", capacity=10)
+        routes = [Route.objects.create(bus=bus, direction=f"T{i} -> D") for i in range(2)]
+        now = timezone.now()
+
+        def trips(count, first_day):
+            return [
+                Trip.objects.create(route=routes[i % 2], depart_time=now + timedelta(days=first_day + i))
+                for i in range(count)
+            ]
+
+        few, many = trips(2, 0), trips(20, 2)
+        client = APIClient()
+        for batch in (few, many):
+            with self.assertNumQueries(16):
+                response = client.post(
+                    "/api/v1/trips/bulk-delete/", {"ids": [trip.id for trip in batch]}, format="json"
+                )
+            self.assertEqual(len(response.data["deleted"]), len(batch))
+        self.assertFalse(RouteDayOccupancy.objects.filter(trip_count__gt=0).exists())
+
+
+class TripExpandApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.bus = Bus.objects.create(matricule="TX-01", capacity=5)
+        self.route = Route.objects.create(bus=self.bus, direction="X -> Y")
+        self.trip = Trip.objects.create(route=self.route, depart_time=timezone.now())
+        self.reservation = Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+
+    def test_expand_inlines_route_bus_and_reservations(self):
+        response = self.client.get(
+            f"/api/v1/trips/{self.trip.id}/", {"expand": "route,route.bus,reservations"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["route"]["id"], self.route.id)
+        self.assertEqual(response.data["route"]["bus"]["matricule"], "TX-01")
+        self.assertEqual(
+            [r["passenger_name"] for r in response.data["reservations"]], ["Ali"]
+        )
+
+    def test_expanded_list_uses_fixed_number_of_queries(self):
+        for index in range(5):
+            trip = Trip.objects.create(
+                route=self.route, depart_time=timezone.now() + timedelta(days=index + 1)
+            )
+            Reservation.objects.create(trip=trip, passenger_name=f"P{index}")
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/v1/trips/", {"expand": "route.bus,reservations"})
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(response.data[0]["route"]["bus"]["id"], self.bus.id)
+
+    def test_unexpanded_response_is_unchanged(self):
+        response = self.client.get(f"/api/v1/trips/{self.trip.id}/")
+        self.assertEqual(response.data["route"], self.route.id)
+
+    def test_rejects_unknown_expansion(self):
+        response = self.client.get("/api/v1/trips/", {"expand": "driver"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("expand", response.data)
+
+    def test_reservation_expands_trip_route(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"/api/v1/reservations/{self.reservation.id}/", {"expand": "trip.route.bus"}
+            )
+        self.assertEqual(response.data["trip"]["route"]["bus"]["capacity"], 5)
+
+    def test_route_expands_trips(self):
+        response = self.client.get(f"/api/v1/routes/{self.route.id}/", {"expand": "trips"})
+        self.assertEqual([t["id"] for t in response.data["trips"]], [self.trip.id])
+
+
+class TripManifestApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.driver = User.objects.create(username="manifest-driver", role="driver")
+        self.client.force_authenticate(self.driver)
+        bus = Bus.objects.create(matricule="MF-01", capacity=10)
+        route = Route.objects.create(bus=bus, direction="Board -> Ride")
+        self.trip = Trip.objects.create(route=route, depart_time=timezone.now())
+        self.zoe = Reservation.objects.create(trip=self.trip, passenger_name="Zoe")
+        self.adam = Reservation.objects.create(trip=self.trip, passenger_name="Adam")
+        self.url = f"/api/v1/trips/{self.trip.id}/manifest/"
+
+    def test_manifest_lists_passengers_compactly(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.has_header("ETag"))
+        self.assertEqual(
+            response.json(),
+            {
+                "trip": self.trip.id,
+                "count": 2,
+                "fields": ["reservation", "passenger_name"],
+                "passengers": [[self.adam.id, "Adam"], [self.zoe.id, "Zoe"]],
+            },
+        )
+
+    def test_matching_etag_returns_not_modified_without_queries(self):
+        etag = self.client.get(self.url)["ETag"]
+        # One query for the trip lookup; the manifest itself comes from cache.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_reservation_changes_rebuild_manifest(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.create(trip=self.trip, passenger_name="Mina")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.zoe.delete()
+        self.assertEqual(self.client.get(self.url).json()["count"], 2)
+
+    def test_other_trips_keep_their_cache(self):
+        other = Trip.objects.create(
+            route=self.trip.route, depart_time=timezone.now() + timedelta(hours=3)
+        )
+        other_etag = self.client.get(f"/api/v1/trips/{other.id}/manifest/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.create(trip=self.trip, passenger_name="Mina")
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"/api/v1/trips/{other.id}/manifest/", HTTP_IF_NONE_MATCH=other_etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_late_render_does_not_outlive_newer_rows(self):
+        self.client.get(self.url)
+        generation = cache.get(manifest_cache_key(self.trip.id))
+        stale = render_manifest(self.trip)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.zoe.delete()
+        # A render that started before the delete finishes after its invalidation.
+        cache.set(_entry_key(self.trip.id, generation), stale)
+        self.assertEqual(self.client.get(self.url).json()["count"], 1)
+
+    def test_requires_driver(self):
+        passenger = User.objects.create(username="manifest-passenger", role="passenger")
+        self.client.force_authenticate(passenger)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_trip_returns_404(self):
+        response = self.client.get("/api/v1/trips/999999/manifest/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TripOptimisticConcurrencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        bus = Bus.objects.create(matricule="OC-T1", capacity=5)
+        self.route = Route.objects.create(bus=bus, direction="Lock -> Free")
+        self.trip = Trip.objects.create(route=self.route, depart_time=timezone.now())
+
+    def test_lifecycle_transition_bumps_version(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        self.trip.start()
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.version, 2)
+
+    def test_concurrent_edit_with_stale_if_match_is_rejected(self):
+        etag = self.client.get(f"/api/v1/trips/{self.trip.id}/")["ETag"]
+        first = self.client.patch(
+            f"/api/v1/trips/{self.trip.id}/",
+            {"depart_time": timezone.now().isoformat()},
+            format="json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        second = self.client.patch(
+            f"/api/v1/trips/{self.trip.id}/",
+            {"depart_time": timezone.now().isoformat()},
+            format="json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(second.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+
+class SegmentInventoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        bus = Bus.objects.create(matricule="SG-01", capacity=1)
+        self.route = Route.objects.create(bus=bus, direction="A -> D")
+        response = self.client.put(
+            f"/api/v1/routes/{self.route.id}/stops/", {"stops": ["A", "B", "C", "D"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.stops = {stop["name"]: stop["id"] for stop in response.data}
+        self.trip = Trip.objects.create(route=self.route, depart_time=timezone.now())
+
+    def _book(self, board, alight, name="Rider"):
+        return self.client.post(
+            "/api/v1/reservations/",
+            {
+                "trip": self.trip.id,
+                "passenger_name": name,
+                "board_stop": self.stops[board],
+                "alight_stop": self.stops[alight],
+            },
+            format="json",
+        )
+
+    def _seats(self, board, alight):
+        response = self.client.get(
+            f"/api/v1/trips/{self.trip.id}/seats/",
+            {"from": self.stops[board], "to": self.stops[alight]},
+        )
+        return response.data["seats_left"]
+
+    def test_one_seat_is_sold_per_segment(self):
+        self.assertEqual(self._book("A", "B").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._book("B", "D").status_code, status.HTTP_201_CREATED)
+        response = self._book("A", "C")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.trip.segment_inventory.counts, [1, 1, 1])
+        self.assertEqual(self.trip.reservations.count(), 2)
+
+    def test_seat_query_per_span(self):
+        self._book("B", "C")
+        self.assertEqual(self._seats("A", "B"), 1)
+        self.assertEqual(self._seats("A", "C"), 0)
+        self.assertEqual(self._seats("C", "D"), 1)
+        self.assertEqual(self.trip.seats_left(), 0)
+
+    def test_delete_frees_the_segments(self):
+        reservation_id = self._book("A", "C").data["id"]
+        self.client.delete(f"/api/v1/reservations/{reservation_id}/")
+        self.assertEqual(self._seats("A", "D"), 1)
+
+    def test_reservation_without_stops_rides_every_segment(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Whole")
+        self.assertEqual(self._book("C", "D").status_code, status.HTTP_409_CONFLICT)
+
+    def test_booking_does_not_scan_reservations(self):
+        self._book("A", "B")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._book("B", "C").status_code, status.HTTP_201_CREATED)
+        reads = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT") and 'FROM "reservations_reservation"' in query["sql"]
+        ]
+        self.assertEqual(reads, [])
+
+    def test_rejects_stops_in_wrong_order_or_route(self):
+        self.assertEqual(self._book("C", "A").status_code, status.HTTP_400_BAD_REQUEST)
+        other = Route.objects.create(bus=self.route.bus, direction="Elsewhere")
+        stop = other.stops.create(position=0, name="X")
+        response = self.client.post(
+            "/api/v1/reservations/",
+            {
+                "trip": self.trip.id,
+                "passenger_name": "Lost",
+                "board_stop": stop.id,
+                "alight_stop": self.stops["D"],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stops_are_frozen_once_booked(self):
+        self._book("A", "B")
+        response = self.client.put(
+            f"/api/v1/routes/{self.route.id}/stops/", {"stops": ["A", "Z"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+
+    def test_moving_trip_to_another_route_rebuilds_its_inventory(self):
+        self._book("A", "C")
+        other = Route.objects.create(bus=self.route.bus, direction="P -> Q")
+        other.stops.create(position=0, name="P")
+        other.stops.create(position=1, name="Q")
+
+        self.trip.route = other
+        self.trip.save()
+
+        self.assertFalse(TripSegmentInventory.objects.filter(trip=self.trip).exists())
+        # Rebuilt on the next booking against the new route's single segment.
+        self.assertEqual(build_counts(self.trip), [1])
+
+    def test_bulk_create_is_refused(self):
+        with self.assertRaisesMessage(ValueError, "would bypass the seat inventory"):
+            Reservation.objects.bulk_create([Reservation(trip=self.trip, passenger_name="Bulk")])
+        self.assertFalse(self.trip.reservations.exists())
+
+
+class TripSearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        bus = Bus.objects.create(matricule="TS-01", capacity=1)
+        self.route = Route.objects.create(bus=bus, direction="Alpha -> Beta")
+        Route.objects.create(bus=bus, direction="Beta -> Alpha")
+        self.tomorrow = timezone.now() + timedelta(days=1)
+        self.trip = Trip.objects.create(route=self.route, depart_time=self.tomorrow)
+
+    def _search(self, **params):
+        response = self.client.get("/api/v1/trips/search/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["trip"] for row in response.data]
+
+    def test_finds_trips_between_places_in_either_spelling(self):
+        self.assertEqual(self._search(origin="alpha", destination="BETA"), [self.trip.id])
+        self.assertEqual(self._search(origin="Beta", destination="Alpha"), [])
+
+    def test_full_and_past_trips_are_excluded(self):
+        Trip.objects.create(route=self.route, depart_time=timezone.now() - timedelta(hours=1))
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        self.assertEqual(self._search(origin="Alpha", destination="Beta"), [])
+
+    def test_date_window(self):
+        later = Trip.objects.create(route=self.route, depart_time=self.tomorrow + timedelta(days=3))
+        day = (self.tomorrow + timedelta(days=3)).date().isoformat()
+        self.assertEqual(
+            self._search(origin="Alpha", destination="Beta", date_from=day, date_to=day), [later.id]
+        )
+
+    def test_unknown_place_returns_nothing(self):
+        self.assertEqual(self._search(origin="Gamma", destination="Beta"), [])
+
+    def test_requires_both_places(self):
+        response = self.client.get("/api/v1/trips/search/", {"origin": "Alpha"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ItinerarySearchApiTests(TestCase):
+    def setUp(self):
+        connection_index.clear()
+        self.client = APIClient()
+        self.bus = Bus.objects.create(matricule="IT-01", capacity=1)
+        self.first_leg = Route.objects.create(
+            bus=self.bus, direction="Alpha -> Beta", duration=timedelta(hours=1)
+        )
+        self.second_leg = Route.objects.create(
+            bus=self.bus, direction="Beta -> Gamma", duration=timedelta(hours=1)
+        )
+        self.start = timezone.now() + timedelta(hours=1)
+        self.first_trip = Trip.objects.create(route=self.first_leg, depart_time=self.start)
+
+    def _search(self, **params):
+        params.setdefault("origin", "Alpha")
+        params.setdefault("destination", "Gamma")
+        connection_index.refresh(force=True)
+        response = self.client.get("/api/v1/trips/itineraries/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [[leg["trip"] for leg in itinerary["legs"]] for itinerary in response.data]
+
+    def test_connects_through_a_transfer_place(self):
+        second = Trip.objects.create(
+            route=self.second_leg, depart_time=self.start + timedelta(minutes=75)
+        )
+        connection_index.refresh(force=True)
+        response = self.client.get(
+            "/api/v1/trips/itineraries/", {"origin": "alpha", "destination": "GAMMA"}
+        )
+
+        self.assertEqual(len(response.data), 1)
+        legs = response.data[0]["legs"]
+        self.assertEqual([leg["trip"] for leg in legs], [self.first_trip.id, second.id])
+        self.assertEqual(legs[0]["destination"], "Beta")
+        self.assertEqual(response.data[0]["arrive"], legs[1]["arrive"])
+
+    def test_minimum_transfer_time_is_enforced(self):
+        second = Trip.objects.create(
+            route=self.second_leg, depart_time=self.start + timedelta(minutes=65)
+        )
+        self.assertEqual(self._search(), [])
+        self.assertEqual(self._search(min_transfer=5), [[self.first_trip.id, second.id]])
+
+    def test_full_legs_are_skipped(self):
+        Trip.objects.create(route=self.second_leg, depart_time=self.start + timedelta(hours=2))
+        Reservation.objects.create(trip=self.first_trip, passenger_name="Ali")
+        self.assertEqual(self._search(), [])
+
+    def test_faster_itinerary_with_more_legs_is_offered(self):
+        direct = Route.objects.create(
+            bus=Bus.objects.create(matricule="IT-02", capacity=1),
+            direction="Alpha -> Gamma",
+            duration=timedelta(hours=5),
+        )
+        direct_trip = Trip.objects.create(route=direct, depart_time=self.start)
+        second = Trip.objects.create(
+            route=self.second_leg, depart_time=self.start + timedelta(hours=2)
+        )
+        self.assertEqual(
+            self._search(), [[direct_trip.id], [self.first_trip.id, second.id]]
+        )
+        self.assertEqual(self._search(max_legs=1), [[direct_trip.id]])
+
+    def test_refresh_picks_up_changes_incrementally(self):
+        self.assertEqual(self._search(), [])
+
+        second = Trip.objects.create(
+            route=self.second_leg, depart_time=self.start + timedelta(hours=2)
+        )
+        self.assertEqual(self._search(), [[self.first_trip.id, second.id]])
+
+        reservation = Reservation.objects.create(trip=second, passenger_name="Ali")
+        self.assertEqual(self._search(), [])
+
+        reservation.delete()
+        self.assertEqual(self._search(), [[self.first_trip.id, second.id]])
+
+        self.second_leg.duration = None
+        self.second_leg.save()
+        self.assertEqual(self._search(), [])
+
+    def test_deleted_reservation_reloads_only_its_trip(self):
+        second = Trip.objects.create(
+            route=self.second_leg, depart_time=self.start + timedelta(hours=2)
+        )
+        reservation = Reservation.objects.create(trip=second, passenger_name="Ali")
+        self.assertEqual(self._search(), [])
+
+        reservation.delete()
+        with mock.patch("trips.itinerary._load_connections", wraps=_load_connections) as load:
+            self.assertEqual(self._search(), [[self.first_trip.id, second.id]])
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(list(load.call_args.args[0].values_list("id", flat=True)), [second.id])
+
+    def test_queued_refresh_reuses_the_one_it_waited_for(self):
+        connection_index.refresh(force=True)
+        connection_index._refreshed_at = 0.0
+        with mock.patch.object(ConnectionIndex, "_apply_changes") as apply_changes:
+            connection_index._lock.acquire()
+            waiter = threading.Thread(target=connection_index.refresh)
+            waiter.start()
+            clock.sleep(0.05)
+            # The refresh holding the lock finishes.
+            connection_index._refreshed_at = clock.monotonic()
+            connection_index._lock.release()
+            waiter.join()
+        apply_changes.assert_not_called()
+
+    def test_missing_change_counter_does_not_break_search(self):
+        second = Trip.objects.create(
+            route=self.second_leg, depart_time=self.start + timedelta(hours=2)
+        )
+        ChangeSequence.objects.all().delete()
+        self.assertEqual(self._search(), [[self.first_trip.id, second.id]])
+
+    def test_unknown_place_returns_nothing(self):
+        self.assertEqual(self._search(destination="Nowhere"), [])
+
+    def test_requires_both_places(self):
+        response = self.client.get("/api/v1/trips/itineraries/", {"origin": "Alpha"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BusScheduleConflictTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.bus = Bus.objects.create(matricule="SC-01", capacity=3)
+        self.outbound = Route.objects.create(
+            bus=self.bus, direction="Alpha -> Beta", duration=timedelta(hours=3)
+        )
+        self.inbound = Route.objects.create(bus=self.bus, direction="Beta -> Alpha")
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.trip = Trip.objects.create(route=self.outbound, depart_time=self.start)
+
+    def _create(self, route, depart_time):
+        return self.client.post(
+            "/api/v1/trips/",
+            {"route": route.id, "depart_time": depart_time.isoformat()},
+            format="json",
+        )
+
+    def test_overlapping_trip_on_another_route_of_the_same_bus_is_rejected(self):
+        response = self._create(self.inbound, self.start + timedelta(hours=2))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["code"], "schedule_conflict")
+
+        # The earlier trip would still be out with the default duration.
+        response = self._create(self.inbound, self.start - timedelta(hours=1))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_back_to_back_trips_and_other_buses_are_allowed(self):
+        response = self._create(self.inbound, self.start + timedelta(hours=3))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        other = Route.objects.create(
+            bus=Bus.objects.create(matricule="SC-02", capacity=3), direction="Alpha -> Beta"
+        )
+        response = self._create(other, self.start)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_update_is_checked_against_other_trips_only(self):
+        later = Trip.objects.create(route=self.inbound, depart_time=self.start + timedelta(hours=5))
+
+        response = self.client.patch(
+            f"/api/v1/trips/{self.trip.id}/",
+            {"depart_time": (self.start + timedelta(minutes=30)).isoformat()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.patch(
+            f"/api/v1/trips/{later.id}/",
+            {"depart_time": (self.start + timedelta(hours=1)).isoformat()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_model_save_and_clean_refuse_overlaps(self):
+        with self.assertRaises(ScheduleConflict):
+            Trip.objects.create(route=self.inbound, depart_time=self.start + timedelta(hours=1))
+
+        later = Trip.objects.create(route=self.inbound, depart_time=self.start + timedelta(hours=4))
+        later.depart_time = self.start + timedelta(hours=2)
+        with self.assertRaises(ValidationError) as caught:
+            later.full_clean()
+        self.assertIn("depart_time", caught.exception.message_dict)
+        with self.assertRaises(ScheduleConflict):
+            later.save()
+        self.assertEqual(Trip.objects.count(), 2)
+
+    def test_ended_trips_do_not_block_the_bus(self):
+        Reservation.objects.create(trip=self.trip, passenger_name="Ali")
+        self.trip.start()
+        self.trip.end()
+        response = self._create(self.inbound, self.start + timedelta(hours=1))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_timetable_rejects_conflicts_within_the_batch_and_with_existing_trips(self):
+        departures = [
+            self.start + timedelta(hours=4),
+            self.start + timedelta(hours=5),
+            self.start + timedelta(hours=1),
+        ]
+        response = self.client.post(
+            "/api/v1/trips/timetable/",
+            {"route": self.inbound.id, "departures": [d.isoformat() for d in departures]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            [(c["depart_time"], c["trip"]) for c in response.data["conflicts"]],
+            [(self.start + timedelta(hours=1), self.trip.id), (self.start + timedelta(hours=5), None)],
+        )
+        self.assertEqual(Trip.objects.count(), 1)
+
+    def test_timetable_creates_all_departures(self):
+        departures = [self.start + timedelta(hours=hours) for hours in (3, 6, 9)]
+        response = self.client.post(
+            "/api/v1/trips/timetable/",
+            {"route": self.inbound.id, "departures": [d.isoformat() for d in departures]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 3)
+        self.assertEqual(
+            list(Trip.objects.filter(route=self.inbound).order_by("depart_time").values_list("depart_time", flat=True)),
+            departures,
+        )
+
+    def test_timetable_trips_count_in_route_occupancy(self):
+        day = (self.start + timedelta(days=2)).replace(hour=6, minute=0, second=0)
+        self.client.post(
+            "/api/v1/trips/timetable/",
+            {
+                "route": self.inbound.id,
+                "departures": [(day + timedelta(hours=h)).isoformat() for h in (0, 3)],
+            },
+            format="json",
+        )
+        self.client.post(
+            "/api/v1/trips/",
+            {"route": self.inbound.id, "depart_time": (day + timedelta(hours=6)).isoformat()},
+            format="json",
+        )
+
+        response = self.client.get(
+            "/api/v1/analytics/route-occupancy/", {"route": self.inbound.id}
+        )
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["trip_count"], 3)
+        self.assertEqual(response.data[0]["seat_capacity"], 9)
+
+    def test_conflict_report_lists_overlapping_pairs_in_range(self):
+        # Trip.save refuses the overlap; the report is for rows that bypassed it.
+        (clash,) = Trip.objects.bulk_create(
+            [Trip(route=self.inbound, depart_time=self.start + timedelta(hours=1))]
+        )
+        Trip.objects.create(route=self.inbound, depart_time=self.start + timedelta(days=10))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/v1/trips/conflicts/",
+                {"date_from": self.start.date().isoformat(), "date_to": self.start.date().isoformat()},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["bus"], row["trip"], row["other_trip"]) for row in response.data],
+            [(self.bus.id, self.trip.id, clash.id)],
+        )
+        self.assertEqual(len(queries), 2)
+
+
+class DriverAssignmentTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.route = Route.objects.create(
+            bus=Bus.objects.create(matricule="DA-01", capacity=3),
+            direction="Alpha -> Beta",
+            duration=timedelta(hours=1),
+        )
+        self.other_route = Route.objects.create(
+            bus=Bus.objects.create(matricule="DA-02", capacity=3),
+            direction="Beta -> Alpha",
+            duration=timedelta(hours=1),
+        )
+        self.driver = User.objects.create_user(username="driver-a", password="pw", role="driver")
+        self.day = (timezone.now() + timedelta(days=2)).date()
+        self.morning = timezone.make_aware(datetime.combine(self.day, time(8)))
+
+    def _trip(self, route, depart_time, driver=None):
+        return Trip.objects.create(route=route, depart_time=depart_time, driver=driver)
+
+    def test_manual_assignment_respects_overlap_and_rest(self):
+        self._trip(self.route, self.morning, driver=self.driver)
+        close = self._trip(self.other_route, self.morning + timedelta(minutes=80))
+        later = self._trip(self.route, self.morning + timedelta(minutes=90))
+
+        response = self.client.patch(
+            f"/api/v1/trips/{close.id}/", {"driver": self.driver.id}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["code"], "driver_conflict")
+
+        response = self.client.patch(
+            f"/api/v1/trips/{later.id}/", {"driver": self.driver.id}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["driver"], self.driver.id)
+
+    def test_manual_check_reads_only_the_drivers_trips(self):
+        overnight = Route.objects.create(
+            bus=Bus.objects.create(matricule="DA-03", capacity=3),
+            direction="Gamma -> Alpha",
+            duration=timedelta(hours=10),
+        )
+        long_haul = self._trip(overnight, self.morning - timedelta(hours=9), driver=self.driver)
+        trip = self._trip(self.route, self.morning)
+
+        with CaptureQueriesContext(connection) as queries, self.assertRaises(ScheduleConflict) as raised:
+            check_driver_schedule(self.driver.id, self.route, self.morning, exclude=trip.id)
+        self.assertIn(str(long_haul.id), str(raised.exception))
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any("MAX(" in query["sql"] for query in queries))
+
+    def test_only_drivers_can_be_assigned(self):
+        passenger = User.objects.create_user(username="rider", password="pw")
+        trip = self._trip(self.route, self.morning)
+        response = self.client.patch(f"/api/v1/trips/{trip.id}/", {"driver": passenger.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_auto_assignment_covers_trips_without_conflicts(self):
+        second = User.objects.create_user(username="driver-b", password="pw", role="driver")
+        held = self._trip(self.route, self.morning + timedelta(hours=3), driver=self.driver)
+        trips = [
+            self._trip(self.route, self.morning),
+            self._trip(self.other_route, self.morning + timedelta(minutes=30)),
+            self._trip(self.other_route, self.morning + timedelta(hours=2)),
+            self._trip(self.route, self.morning + timedelta(hours=5)),
+        ]
+        self._trip(self.route, self.morning + timedelta(days=1))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/v1/trips/assign-drivers/", {"date": self.day.isoformat()}, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["unassigned"], [])
+        assigned = {row["trip"]: row["driver"] for row in response.data["assignments"]}
+        self.assertEqual(set(assigned), {trip.id for trip in trips})
+        # The 11:00 trip is held, so the driver busy until 11:30 cannot take 10:00.
+        self.assertEqual(assigned[trips[2].id], second.id)
+        self.assertEqual(len(queries), 13)
+
+        by_driver = {}
+        for trip in Trip.objects.filter(driver__isnull=False).select_related("route"):
+            by_driver.setdefault(trip.driver_id, []).append(trip.depart_time)
+        self.assertEqual(len(by_driver[self.driver.id]) + len(by_driver[second.id]), 5)
+        self.assertIn(held.depart_time, by_driver[self.driver.id])
+        for departures in by_driver.values():
+            departures.sort()
+            for before, after in zip(departures, departures[1:]):
+                self.assertGreaterEqual(after - before, timedelta(minutes=90))
+
+    def test_trips_assigned_by_hand_meanwhile_are_not_reported(self):
+        second = User.objects.create_user(username="driver-c", password="pw", role="driver")
+        taken = self._trip(self.route, self.morning, driver=second)
+        free = self._trip(self.other_route, self.morning + timedelta(hours=3))
+        # Planned while ``taken`` was still open.
+        plan = ({taken.id: self.driver.id, free.id: self.driver.id}, [])
+
+        with mock.patch("trips.drivers.plan_driver_assignment", return_value=plan), self.assertLogs(
+            "audit", "INFO"
+        ) as logs:
+            response = self.client.post(
+                "/api/v1/trips/assign-drivers/", {"date": self.day.isoformat()}, format="json"
+            )
+
+        self.assertEqual(response.data["assignments"], [{"trip": free.id, "driver": self.driver.id}])
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(
+            list(OutboxEvent.objects.filter(event_type="trip.update").values_list("aggregate_id", flat=True)),
+            [free.id],
+        )
+        taken.refresh_from_db()
+        self.assertEqual(taken.driver_id, second.id)
+
+    def test_trips_without_a_free_driver_are_reported(self):
+        first = self._trip(self.route, self.morning)
+        clash = self._trip(self.other_route, self.morning + timedelta(minutes=15))
+
+        response = self.client.post(
+            "/api/v1/trips/assign-drivers/",
+            {"date": self.day.isoformat(), "dry_run": True},
+            format="json",
+        )
+
+        self.assertEqual(response.data["assignments"], [{"trip": first.id, "driver": self.driver.id}])
+        self.assertEqual(response.data["unassigned"], [clash.id])
+        self.assertFalse(Trip.objects.filter(driver__isnull=False).exists())
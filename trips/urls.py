@@ -1,11 +1,35 @@
 from django.urls import path
 
-from .views import EndTripView, StartTripView, TripDetailView, TripListCreateView
+from .streams import route_seat_stream, trip_seat_stream
+from .views import (
+    BusConflictReportView,
+    DriverAssignmentView,
+    EndTripView,
+    ItinerarySearchView,
+    StartTripView,
+    TripBulkDeleteView,
+    TripDetailView,
+    TripListCreateView,
+    TripManifestView,
+    TripSearchView,
+    TripSeatsView,
+    TripTimetableView,
+)
 
 
 urlpatterns = [
     path("trips/", TripListCreateView.as_view()),
+    path("trips/bulk-delete/", TripBulkDeleteView.as_view()),
+    path("trips/search/", TripSearchView.as_view()),
+    path("trips/timetable/", TripTimetableView.as_view()),
+    path("trips/conflicts/", BusConflictReportView.as_view()),
+    path("trips/assign-drivers/", DriverAssignmentView.as_view()),
+    path("trips/itineraries/", ItinerarySearchView.as_view()),
     path("trips/<int:pk>/", TripDetailView.as_view()),
     path("trips/<int:pk>/start/", StartTripView.as_view()),
     path("trips/<int:pk>/end/", EndTripView.as_view()),
+    path("trips/<int:pk>/manifest/", TripManifestView.as_view()),
+    path("trips/<int:pk>/seats/", TripSeatsView.as_view()),
+    path("trips/<int:pk>/seats/stream/", trip_seat_stream),
+    path("routes/<int:pk>/seats/stream/", route_seat_stream),
 ]
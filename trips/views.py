@@ -1,14 +1,39 @@
 import logging
+from datetime import datetime, time, timedelta
 
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import parse_etags, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from accounts.permissions import IsDriver
+from analytics import occupancy
 from core.exceptions import LifecycleError
+from core.bulk_delete import BulkDeleteView
+from core.db_router import use_primary_database
+from core.expansion import ExpandMixin
+from core.fast_serializers import ValuesSerializer
+from core.mixins import FastListMixin
+from core.sparse_fields import SparseFieldsMixin
+from core.versioning import ConditionalWriteMixin
+from events.outbox import record_event, record_events
+from reservations.models import Reservation
+from routes.models import Place, RouteStop
 
+from .drivers import assign_drivers, plan_driver_assignment
+from .itinerary import connection_index
+from .manifest import get_manifest
 from .models import Trip
-from .serializers import TripSerializer
+from .schedule import conflict_report, timetable_conflicts
+from .search import resolve_places, search_trips
+from .serializers import DriverAssignmentSerializer, TimetableSerializer, TripSerializer
 
 audit_logger = logging.getLogger("audit")
 
@@ -20,12 +45,15 @@ def _audit_user(request):
     return "anonymous"
 
 
-class TripListCreateView(ListCreateAPIView):
+class TripListCreateView(SparseFieldsMixin, ExpandMixin, FastListMixin, ListCreateAPIView):
     queryset = Trip.objects.all()
     serializer_class = TripSerializer
+    fast_serializer = ValuesSerializer(TripSerializer)
 
     def perform_create(self, serializer):
-        trip = serializer.save()
+        with transaction.atomic():
+            trip = serializer.save()
+            record_event("trip.create", trip, _audit_user(self.request), serializer.data)
         audit_logger.info(
             "user=%s action=trip.create trip=%s route=%s transition=%s->%s",
             _audit_user(self.request),
@@ -36,13 +64,20 @@ class TripListCreateView(ListCreateAPIView):
         )
 
 
-class TripDetailView(RetrieveUpdateDestroyAPIView):
+class TripDetailView(ConditionalWriteMixin, SparseFieldsMixin, ExpandMixin, RetrieveUpdateDestroyAPIView):
     queryset = Trip.objects.all()
     serializer_class = TripSerializer
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            trip = serializer.save()
+            record_event("trip.update", trip, _audit_user(self.request), serializer.data)
+
     def perform_destroy(self, instance):
         trip_id = instance.id
-        super().perform_destroy(instance)
+        with transaction.atomic():
+            super().perform_destroy(instance)
+            record_event("trip.delete", instance, _audit_user(self.request), aggregate_id=trip_id)
         audit_logger.info(
             "user=%s action=trip.delete trip=%s",
             _audit_user(self.request),
@@ -57,7 +92,14 @@ class StartTripView(APIView):
         if trip.start_trip_at is not None:
             raise LifecycleError("This trip has already started.")
 
-        trip.start()
+        with transaction.atomic():
+            trip.start()
+            record_event(
+                "trip.start",
+                trip,
+                _audit_user(request),
+                {"transition": [before_status, trip.status], "start_trip_at": trip.start_trip_at},
+            )
         audit_logger.info(
             "user=%s action=trip.start trip=%s transition=%s->%s",
             _audit_user(request),
@@ -79,7 +121,14 @@ class EndTripView(APIView):
         if trip.end_trip_at is not None:
             raise LifecycleError("Trip already ended")
 
-        trip.end()
+        with transaction.atomic():
+            trip.end()
+            record_event(
+                "trip.end",
+                trip,
+                _audit_user(request),
+                {"transition": [before_status, trip.status], "end_trip_at": trip.end_trip_at},
+            )
         audit_logger.info(
             "user=%s action=trip.end trip=%s transition=%s->%s",
             _audit_user(request),
@@ -89,3 +138,308 @@ class EndTripView(APIView):
         )
 
         return Response({"end_trip_at": trip.end_trip_at}, status=status.HTTP_200_OK)
+
+
+@use_primary_database
+class TripManifestView(APIView):
+    """
+    Passenger list for drivers at boarding. The body is pre-rendered and
+    cached per trip; clients revalidate with If-None-Match and get a 304
+    while the trip's reservations are unchanged. Reads stay on the primary
+    so a lagging replica cannot seed the cache with a stale list.
+    """
+
+    permission_classes = [IsDriver]
+
+    def get(self, request, pk):
+        trip = get_object_or_404(Trip, pk=pk)
+        body, etag = get_manifest(trip)
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def _stop_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise ValidationError({name: "Expected a stop id."})
+    return int(value)
+
+
+class TripSeatsView(APIView):
+    """
+    ``?from=<stop id>&to=<stop id>``: seats free on every segment between
+    the two stops, read from the trip's segment inventory. Without stops,
+    seats free for the whole route.
+    """
+
+    def get(self, request, pk):
+        trip = get_object_or_404(Trip.objects.select_related("route__bus"), pk=pk)
+        board_id = _stop_param(request, "from")
+        alight_id = _stop_param(request, "to")
+        if (board_id is None) != (alight_id is None):
+            raise ValidationError("Give both from and to, or neither.")
+
+        start = end = None
+        if board_id is not None:
+            positions = dict(
+                RouteStop.objects.filter(
+                    route_id=trip.route_id, id__in=[board_id, alight_id]
+                ).values_list("id", "position")
+            )
+            if board_id not in positions or alight_id not in positions:
+                raise ValidationError("from and to must be stops of the trip's route.")
+            start, end = positions[board_id], positions[alight_id]
+            if start >= end:
+                raise ValidationError("to must come after from.")
+
+        return Response({"trip": trip.id, "seats_left": trip.seats_left(start, end)})
+
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValidationError({name: "Expected a YYYY-MM-DD date."})
+    return parsed
+
+
+def _datetime_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValidationError({name: "Expected an ISO 8601 datetime."})
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _positive_int_param(request, name, default, maximum=None):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    if not value.isdigit() or int(value) == 0:
+        raise ValidationError({name: "Expected a positive integer."})
+    return min(int(value), maximum) if maximum else int(value)
+
+
+class TripSearchView(APIView):
+    """
+    ``?origin=&destination=`` with optional ``date_from``/``date_to``
+    (YYYY-MM-DD, inclusive), ``seats`` (minimum free, default 1) and
+    ``limit``. Returns bookable trips soonest first; without ``date_from``
+    the window starts now.
+    """
+
+    default_limit = 50
+    max_limit = 200
+
+    def get(self, request):
+        origin_name = request.query_params.get("origin", "").strip()
+        destination_name = request.query_params.get("destination", "").strip()
+        if not origin_name or not destination_name:
+            raise ValidationError("origin and destination are required.")
+
+        date_from = _date_param(request, "date_from")
+        date_to = _date_param(request, "date_to")
+        start = _start_of_day(date_from) if date_from else timezone.now()
+        end = _start_of_day(date_to + timedelta(days=1)) if date_to else None
+        min_seats = _positive_int_param(request, "seats", 1)
+        limit = _positive_int_param(request, "limit", self.default_limit, self.max_limit)
+
+        origin, destination = resolve_places(origin_name, destination_name)
+        if origin is None or destination is None:
+            return Response([])
+        return Response(search_trips(origin, destination, start, end, min_seats, limit))
+
+
+def _leg_representation(connection, names):
+    return {
+        "trip": connection.trip,
+        "route": connection.route,
+        "origin": names[connection.origin],
+        "destination": names[connection.destination],
+        "depart": connection.depart,
+        "arrive": connection.arrive,
+        "seats_left": connection.seats,
+    }
+
+
+class ItinerarySearchView(APIView):
+    """
+    ``?origin=&destination=`` with optional ``depart_after`` (ISO 8601,
+    default now), ``passengers`` (default 1), ``max_legs`` (default 3) and
+    ``min_transfer`` (minutes). Returns one itinerary per leg count that
+    arrives strictly earlier than any itinerary with fewer legs.
+    """
+
+    default_max_legs = 3
+    max_max_legs = 4
+
+    def get(self, request):
+        origin_name = request.query_params.get("origin", "").strip()
+        destination_name = request.query_params.get("destination", "").strip()
+        if not origin_name or not destination_name:
+            raise ValidationError("origin and destination are required.")
+
+        depart_after = _datetime_param(request, "depart_after") or timezone.now()
+        passengers = _positive_int_param(request, "passengers", 1)
+        max_legs = _positive_int_param(request, "max_legs", self.default_max_legs, self.max_max_legs)
+        min_transfer = request.query_params.get("min_transfer")
+        if min_transfer is not None:
+            if not min_transfer.isdigit():
+                raise ValidationError({"min_transfer": "Expected a number of minutes."})
+            min_transfer = timedelta(minutes=int(min_transfer))
+
+        origin, destination = resolve_places(origin_name, destination_name)
+        if origin is None or destination is None or origin == destination:
+            return Response([])
+
+        connection_index.refresh()
+        itineraries = connection_index.search(
+            origin.id, destination.id, depart_after, passengers, max_legs, min_transfer
+        )
+        place_ids = {place for legs in itineraries for leg in legs for place in (leg.origin, leg.destination)}
+        names = dict(Place.objects.filter(id__in=place_ids).values_list("id", "name"))
+        return Response(
+            [
+                {
+                    "arrive": legs[-1].arrive,
+                    "legs": [_leg_representation(leg, names) for leg in legs],
+                }
+                for legs in itineraries
+            ]
+        )
+
+
+class TripTimetableView(APIView):
+    """
+    Create many trips on one route at once: ``{"route", "departures": [...]}``.
+    Each departure is checked against the bus's existing trips and the other
+    departures; any conflict blocks the whole batch (409). ``dry_run`` only
+    reports.
+    """
+
+    def post(self, request):
+        serializer = TimetableSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        route = serializer.validated_data["route"]
+        departures = serializer.validated_data["departures"]
+        dry_run = serializer.validated_data["dry_run"]
+
+        created = []
+        with transaction.atomic():
+            conflicts = timetable_conflicts(route, departures)
+            if not conflicts and not dry_run:
+                trips = Trip.objects.bulk_create(
+                    [Trip(route=route, depart_time=depart) for depart in sorted(departures)]
+                )
+                # bulk_create skips the occupancy receivers; add the trips per day.
+                with occupancy.deferred():
+                    for trip in trips:
+                        occupancy.apply_trip(
+                            route.id, trip.depart_time, trip.status, None, reservations=0, sign=1
+                        )
+                created = [trip.id for trip in trips]
+                record_events("trip.create", Trip, created, _audit_user(request))
+        if created:
+            audit_logger.info(
+                "user=%s action=trip.timetable route=%s trips=%s",
+                _audit_user(request),
+                route.id,
+                len(created),
+            )
+
+        if conflicts and not dry_run:
+            response_status = status.HTTP_409_CONFLICT
+        elif created:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(
+            {"dry_run": dry_run, "created": created, "conflicts": conflicts},
+            status=response_status,
+        )
+
+
+class BusConflictReportView(APIView):
+    """
+    ``?date_from=&date_to=`` (YYYY-MM-DD, inclusive; default the next seven
+    days): every pair of non-ended trips that hold the same bus at
+    overlapping times, at least one of them departing in the range.
+    """
+
+    default_days = 7
+
+    def get(self, request):
+        date_from = _date_param(request, "date_from") or timezone.localdate()
+        date_to = _date_param(request, "date_to") or date_from + timedelta(days=self.default_days - 1)
+        if date_to < date_from:
+            raise ValidationError("date_to must not be before date_from.")
+        return Response(
+            conflict_report(_start_of_day(date_from), _start_of_day(date_to + timedelta(days=1)))
+        )
+
+
+class DriverAssignmentView(APIView):
+    """
+    Give every unassigned CREATED trip departing on ``date`` a driver,
+    keeping existing assignments and the minimum rest between trips.
+    ``drivers`` limits the pool; ``dry_run`` only returns the plan.
+    """
+
+    def post(self, request):
+        serializer = DriverAssignmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        day = serializer.validated_data["date"]
+        driver_ids = serializer.validated_data.get("drivers")
+        dry_run = serializer.validated_data["dry_run"]
+        start, end = _start_of_day(day), _start_of_day(day + timedelta(days=1))
+
+        if dry_run:
+            assignments, unassigned = plan_driver_assignment(start, end, driver_ids)
+        else:
+            actor = _audit_user(request)
+            with transaction.atomic():
+                assignments, unassigned = assign_drivers(start, end, driver_ids)
+                record_events("trip.update", Trip, list(assignments), actor)
+            for trip_id, driver_id in assignments.items():
+                audit_logger.info(
+                    "user=%s action=trip.assign_driver trip=%s driver=%s", actor, trip_id, driver_id
+                )
+
+        return Response(
+            {
+                "date": day,
+                "dry_run": dry_run,
+                "assignments": [
+                    {"trip": trip_id, "driver": driver_id} for trip_id, driver_id in assignments.items()
+                ],
+                "unassigned": unassigned,
+            }
+        )
+
+
+class TripBulkDeleteView(BulkDeleteView):
+    model = Trip
+    dependent_model = Reservation
+    dependent_field = "trip"
+    blocked_reason = "Cannot delete trip with existing reservations"
+
+    def perform_delete(self, ids):
+        # The occupancy receivers run per trip; apply their deltas per (route, day).
+        with occupancy.deferred():
+            super().perform_delete(ids)